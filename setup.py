@@ -29,4 +29,13 @@ setuptools.setup(
         "importlib-metadata>=1.7.0",
         "packaging>=20.4",
     ],
+    entry_points={
+        "console_scripts": [
+            "testproject-send-spooled-reports=src.testproject.sdk.internal.agent.spool_uploader:main",
+            "testproject-upload-report-files=src.testproject.sdk.internal.agent.report_file_uploader:main",
+        ],
+        "pytest11": [
+            "testproject=src.testproject.plugins.pytest_plugin",
+        ],
+    },
 )
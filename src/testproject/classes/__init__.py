@@ -1,4 +1,5 @@
 from .actionexecutionresponse import ActionExecutionResponse
+from .batch_settings import BatchSettings
 from .elementsearchcriteria import ElementSearchCriteria
 from .proxydescriptor import ProxyDescriptor
 from .step_settings import StepSettings
@@ -7,6 +8,7 @@ from .web_driver_wait import TestProjectWebDriverWait as WebDriverWait
 
 __all__ = [
     "ActionExecutionResponse",
+    "BatchSettings",
     "ElementSearchCriteria",
     "ProxyDescriptor",
     "StepSettings",
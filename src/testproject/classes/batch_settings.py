@@ -0,0 +1,62 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class BatchSettings:
+    """Represents settings for sending reports to the Agent in batches.
+
+    Settings that are not specified are taken from environment variables, or their default value.
+
+    Args:
+        max_batch_size: is the maximum number of reports sent in a single batch (TP_MAX_REPORTS_BATCH_SIZE).
+        max_batch_bytes: is the maximum size of a batch payload in bytes (TP_MAX_REPORTS_BATCH_BYTES).
+        linger_ms: is the time in milliseconds to wait for more reports before sending a batch that is not full
+            (TP_REPORTS_BATCH_LINGER_MS).
+        adaptive: when True, the batch size starts at max_batch_size and is adjusted to the measured Agent
+            latency and error rate (TP_REPORTS_ADAPTIVE_BATCH).
+        target_latency_ms: is the batch round trip time in milliseconds above which an adaptive batch size is
+            decreased (TP_REPORTS_TARGET_LATENCY_MS).
+        compression: is the content encoding batches are compressed with, either "gzip" or "deflate"
+            (TP_REPORTS_COMPRESSION). Requires an Agent that supports compressed reports.
+        compression_threshold_bytes: is the batch payload size in bytes below which batches are not compressed
+            (TP_REPORTS_COMPRESSION_THRESHOLD_BYTES).
+
+    Examples:
+        # Send up to 100 reports or 2 MB at once, waiting up to 200 milliseconds for a batch to fill up.
+        driver = webdriver.Chrome(
+            batch_settings=BatchSettings(max_batch_size=100, max_batch_bytes=2097152, linger_ms=200)
+        )
+
+        # Compress batches larger than 4 KB when reporting to a remote Agent.
+        driver = webdriver.Chrome(batch_settings=BatchSettings(compression="gzip", compression_threshold_bytes=4096))
+
+    """
+
+    def __init__(
+        self,
+        max_batch_size=None,
+        max_batch_bytes=None,
+        linger_ms=None,
+        adaptive=None,
+        target_latency_ms=None,
+        compression=None,
+        compression_threshold_bytes=None,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.linger_ms = linger_ms
+        self.adaptive = adaptive
+        self.target_latency_ms = target_latency_ms
+        self.compression = compression
+        self.compression_threshold_bytes = compression_threshold_bytes
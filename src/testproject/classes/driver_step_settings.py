@@ -45,6 +45,9 @@ class DriverStepSettings:
             and step_settings.screenshot_condition is TakeScreenshotConditionType.Inherit
         ):
             step_settings.screenshot_condition = self.previous_settings.screenshot_condition
+        for option in ("screenshot_format", "screenshot_max_dimension", "screenshot_quality"):
+            if getattr(step_settings, option) is None:
+                setattr(step_settings, option, getattr(self.previous_settings, option))
         self.step_settings = step_settings
 
     def __enter__(self):
@@ -52,5 +55,6 @@ class DriverStepSettings:
         self.driver.command_executor.settings = self.step_settings
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Reverting to the previous settings."""
+        """Reverting to the previous settings, including the driver implicit wait set for the step."""
+        self.driver.command_executor.step_helper.restore_timeout(self.previous_settings.timeout)
         self.driver.command_executor.settings = self.previous_settings
@@ -24,6 +24,13 @@ class StepSettings:
         timeout: of the driver AKA explicit wait.
         invert_result: will invert step execution result when True.
         always_pass: will forcefully pass the step in case of failure when True.
+        screenshot_condition: defines when a screenshot is taken for a step.
+        screenshot_format: image format screenshots are reported in (ScreenshotFormat), None to keep the format of the
+            previous settings, or the PNG taken by the driver.
+        screenshot_max_dimension: maximum width and height in pixels screenshots are downscaled to, None to keep the
+            size of the previous settings, 0 to keep the size of the screenshots taken by the driver.
+        screenshot_quality: quality of screenshots reported as JPEG or WebP, from 1 to 100, None to keep the quality
+            of the previous settings.
 
     Examples:
         # This class should be used with a driver.
@@ -43,6 +50,9 @@ class StepSettings:
         invert_result=False,
         always_pass=False,
         screenshot_condition=TakeScreenshotConditionType.Failure,
+        screenshot_format=None,
+        screenshot_max_dimension=None,
+        screenshot_quality=None,
     ):
         self.sleep_time = sleep_time
         self.sleep_timing_type = sleep_timing_type
@@ -50,3 +60,6 @@ class StepSettings:
         self.always_pass = always_pass
         self.invert_result = invert_result
         self.screenshot_condition = screenshot_condition
+        self.screenshot_format = screenshot_format
+        self.screenshot_max_dimension = screenshot_max_dimension
+        self.screenshot_quality = screenshot_quality
@@ -43,6 +43,9 @@ class TestProjectWebDriverWait(WebDriverWait):
         Based on the function's result and given method, it will report this Step with all the needed information.
         Returns the result of the executed function.
         """
+        # Imported here, the helpers package imports this package while it is being initialized
+        from src.testproject.helpers.waitscopehelper import WaitScopeHelper
+
         timeout_exception = None
         result = None
         step_helper = self.driver.command_executor.step_helper
@@ -54,8 +57,8 @@ class TestProjectWebDriverWait(WebDriverWait):
         step_helper.handle_timeout(timeout=step_settings.timeout)
         # Handle sleep before
         step_helper.handle_sleep(sleep_timing_type=step_settings.sleep_timing_type, sleep_time=step_settings.sleep_time)
-        # Execute the function with default StepSettings.
-        with DriverStepSettings(self._driver, StepSettings()):
+        # Execute the function with default StepSettings, marking the driver commands it executes as part of a wait.
+        with DriverStepSettings(self._driver, StepSettings()), WaitScopeHelper.wait_scope():
             try:
                 result = getattr(super(), function_name)(method, message)
                 passed = True if result else False
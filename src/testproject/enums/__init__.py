@@ -2,8 +2,10 @@ from .environmentvariable import EnvironmentVariable
 from .executionfailuretype import ExecutionFailureType
 from .executionresulttype import ExecutionResultType
 from .findbytype import FindByType
+from .queue_overflow_policy import QueueOverflowPolicy
 from .reportnamingelement import ReportNamingElement
 from .screenshot_condition_type import TakeScreenshotConditionType
+from .screenshot_format import ScreenshotFormat
 from .sleep_timing_type import SleepTimingType
 
 __all__ = [
@@ -14,4 +16,6 @@ __all__ = [
     "EnvironmentVariable",
     "SleepTimingType",
     "TakeScreenshotConditionType",
+    "QueueOverflowPolicy",
+    "ScreenshotFormat",
 ]
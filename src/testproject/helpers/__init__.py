@@ -3,5 +3,15 @@ from .confighelper import ConfigHelper
 from .logginghelper import LoggingHelper
 from .reporthelper import ReportHelper
 from .seleniumhelper import SeleniumHelper
+from .testlifecyclehelper import TestLifecycleHelper
+from .waitscopehelper import WaitScopeHelper
 
-__all__ = ["SeleniumHelper", "ConfigHelper", "ReportHelper", "LoggingHelper", "AddonHelper"]
+__all__ = [
+    "SeleniumHelper",
+    "ConfigHelper",
+    "ReportHelper",
+    "LoggingHelper",
+    "AddonHelper",
+    "WaitScopeHelper",
+    "TestLifecycleHelper",
+]
@@ -53,6 +53,67 @@ class ConfigHelper:
         """
         return os.getenv("TP_DEV_TOKEN")
 
+    @staticmethod
+    def get_int_from_env(variable_name, default):
+        """Returns the value of an environment variable as an integer
+
+        Args:
+            variable_name (str): The name of the environment variable
+            default (int): The value to use when the variable is not defined or is not a valid integer
+
+        Returns:
+            int: the value of the environment variable, or the default value
+        """
+        value = os.getenv(variable_name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            logging.warning("The environment variable {} value must be an integer.".format(variable_name))
+            return default
+
+    @staticmethod
+    def get_float_from_env(variable_name, default):
+        """Returns the value of an environment variable as a float
+
+        Args:
+            variable_name (str): The name of the environment variable
+            default (float): The value to use when the variable is not defined or is not a valid number
+
+        Returns:
+            float: the value of the environment variable, or the default value
+        """
+        value = os.getenv(variable_name)
+        if value is None:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            logging.warning("The environment variable {} value must be a number.".format(variable_name))
+            return default
+
+    @staticmethod
+    def get_bool_from_env(variable_name, default):
+        """Returns the value of an environment variable as a boolean
+
+        Args:
+            variable_name (str): The name of the environment variable
+            default (bool): The value to use when the variable is not defined or is not a valid boolean
+
+        Returns:
+            bool: the value of the environment variable, or the default value
+        """
+        value = os.getenv(variable_name)
+        if value is None:
+            return default
+        if value.casefold() in ["true", "1", "yes", "on"]:
+            return True
+        if value.casefold() in ["false", "0", "no", "off"]:
+            return False
+        logging.warning("The environment variable {} value must be either 'true' or 'false'.".format(variable_name))
+        return default
+
     @staticmethod
     def get_sdk_version():
         """Returns the SDK version as defined in the definitions module
@@ -12,16 +12,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import inspect
 import logging
 import ntpath
 import os
+import sys
+from collections import namedtuple
 
 from src.testproject.enums import EnvironmentVariable, ReportNamingElement
+from src.testproject.helpers.testlifecyclehelper import TestLifecycleHelper
+
+# Function name and file name of a frame in the call stack
+StackFrame = namedtuple("StackFrame", ["function", "filename"])
 
 
 class ReportHelper:
-    """Provides helper functions used in reporting command, tests and steps"""
+    """Provides helper functions used in reporting command, tests and steps
+
+    Names inferred from the decorator or pytest environment variables are cached until one of these variables changes,
+    so that inferring the test name for every driver command is a dictionary lookup. While a test framework plugin
+    manages the test lifecycle, names are taken from the test it is running and nothing needs to be inferred.
+    """
+
+    # Environment variables the inferred names depend on, a change in any of them invalidates the cached names
+    CONTEXT_VARIABLES = (
+        EnvironmentVariable.TP_TEST_NAME.value,
+        EnvironmentVariable.TP_PROJECT_NAME.value,
+        EnvironmentVariable.TP_JOB_NAME.value,
+        "PYTEST_CURRENT_TEST",
+    )
+
+    # Values of the context environment variables the cached names were inferred from
+    __context = None
+    # Names inferred in the current context, by report naming element
+    __context_names = {}
 
     @classmethod
     def infer_test_name(cls):
@@ -30,23 +53,7 @@ class ReportHelper:
         Returns:
             str: The inferred test name (typically the test method name)
         """
-        # Did we set the test name using our decorator?
-        test_name_in_decorator = os.environ.get(EnvironmentVariable.TP_TEST_NAME.value)
-        if test_name_in_decorator is not None:
-            return test_name_in_decorator
-
-        current_test_info = os.environ.get("PYTEST_CURRENT_TEST")
-
-        if current_test_info is not None:
-            # we're using pytest
-            result = cls.infer_name_from_pytest_info_for(current_test_info, ReportNamingElement.Test)
-        else:
-            # Try finding the right entry in the call stack (for unittest or when no testing framework is used)
-            logging.debug("Attempting to infer test name using inspect.stack()")
-            result = cls.__find_name_in_call_stack_for(ReportNamingElement.Test)
-            logging.debug("Inferred test name '{}' from inspect.stack()".format(result))
-
-        return result if result is not None else "Unnamed Test"
+        return cls.__infer_name_for(ReportNamingElement.Test, EnvironmentVariable.TP_TEST_NAME, "Unnamed Test")
 
     @classmethod
     def infer_project_name(cls):
@@ -55,23 +62,7 @@ class ReportHelper:
         Returns:
             str: The inferred project name (typically the folder containing the test file)
         """
-        # Did we set the project name using our decorator?
-        project_name_in_decorator = os.environ.get(EnvironmentVariable.TP_PROJECT_NAME.value)
-        if project_name_in_decorator is not None:
-            return project_name_in_decorator
-
-        current_test_info = os.environ.get("PYTEST_CURRENT_TEST")
-
-        if current_test_info is not None:
-            # we're using pytest
-            result = cls.infer_name_from_pytest_info_for(current_test_info, ReportNamingElement.Project)
-        else:
-            # Try finding the right entry in the call stack (for unittest or when no testing framework is used)
-            logging.debug("Attempting to infer project name using inspect.stack()")
-            result = cls.__find_name_in_call_stack_for(ReportNamingElement.Project)
-            logging.debug("Inferred project name '{}' from inspect.stack()".format(result))
-
-        return result if result is not None else "Unnamed Project"
+        return cls.__infer_name_for(ReportNamingElement.Project, EnvironmentVariable.TP_PROJECT_NAME, "Unnamed Project")
 
     @classmethod
     def infer_job_name(cls):
@@ -80,23 +71,60 @@ class ReportHelper:
         Returns:
             str: The inferred job name (typically the test file name (without the .py extension)
         """
-        # Did we set the job name using our decorator?
-        job_name_in_decorator = os.environ.get(EnvironmentVariable.TP_JOB_NAME.value)
-        if job_name_in_decorator is not None:
-            return job_name_in_decorator
+        return cls.__infer_name_for(ReportNamingElement.Job, EnvironmentVariable.TP_JOB_NAME, "Unnamed Job")
+
+    @classmethod
+    def __infer_name_for(cls, element_to_find, decorator_variable, default_name):
+        """Infers a project, job or test name, using the cached name when the context did not change
+
+        Args:
+            element_to_find (ReportNamingElement): the report naming element that we're looking for
+            decorator_variable (EnvironmentVariable): the variable our decorator sets the name in
+            default_name (str): the name to use when it cannot be inferred
+
+        Returns:
+            str: the inferred report naming element value
+        """
+        managed_test = TestLifecycleHelper.current_test()
+        if managed_test is not None and os.environ.get(decorator_variable.value) is None:
+            # The test framework plugin told us which test is running
+            if element_to_find == ReportNamingElement.Project:
+                return managed_test.project
+            if element_to_find == ReportNamingElement.Job:
+                return managed_test.job
+            return managed_test.name
+
+        context = tuple(os.environ.get(variable) for variable in cls.CONTEXT_VARIABLES)
+        if context != cls.__context:
+            cls.__context = context
+            cls.__context_names = {}
+        else:
+            cached_name = cls.__context_names.get(element_to_find)
+            if cached_name is not None:
+                return cached_name
+
+        # Did we set the name using our decorator?
+        name_in_decorator = os.environ.get(decorator_variable.value)
+        if name_in_decorator is not None:
+            cls.__context_names[element_to_find] = name_in_decorator
+            return name_in_decorator
 
         current_test_info = os.environ.get("PYTEST_CURRENT_TEST")
 
         if current_test_info is not None:
             # we're using pytest
-            result = cls.infer_name_from_pytest_info_for(current_test_info, ReportNamingElement.Job)
-        else:
-            # Try finding the right entry in the call stack (for unittest or when no testing framework is used)
-            logging.debug("Attempting to infer job name using inspect.stack()")
-            result = cls.__find_name_in_call_stack_for(ReportNamingElement.Job)
-            logging.debug("Inferred job name '{}' from inspect.stack()".format(result))
+            result = cls.infer_name_from_pytest_info_for(current_test_info, element_to_find)
+            result = result if result is not None else default_name
+            cls.__context_names[element_to_find] = result
+            return result
 
-        return result if result is not None else "Unnamed Job"
+        # Try finding the right entry in the call stack (for unittest or when no testing framework is used).
+        # The call stack changes without the context variables changing, so the result is not cached.
+        logging.debug("Attempting to infer {} name using the call stack".format(element_to_find.name.lower()))
+        result = cls.__find_name_in_call_stack_for(element_to_find)
+        logging.debug("Inferred {} name '{}' from the call stack".format(element_to_find.name.lower(), result))
+
+        return result if result is not None else default_name
 
     @classmethod
     def infer_name_from_pytest_info_for(cls, pytest_info, element_to_find):
@@ -144,7 +172,7 @@ class ReportHelper:
                 # A driver can be initialized inside a test method, but also in a fixture method
                 # Therefore we want to look for all these methods when we try to infer project and job names
                 # (since project and job names are sent to the Agent upon driver creation)
-                for frame in inspect.stack().__reversed__():
+                for frame in cls.__call_stack():
                     if frame.function.startswith("test") or frame.function in [
                         "setUp",
                         "tearDown",
@@ -164,7 +192,7 @@ class ReportHelper:
             else:
                 # When inferring test names, we are only interested in those methods whose name
                 # actually starts with 'test', not in fixture methods
-                for frame in inspect.stack().__reversed__():
+                for frame in cls.__call_stack():
                     if frame.function.startswith("test"):
                         if element_to_find == ReportNamingElement.Test:
                             # return the current method name as the test name
@@ -175,7 +203,7 @@ class ReportHelper:
             # we're using neither pytest nor unittest, so return sensible values
             inside_module = False
 
-            for frame in inspect.stack().__reversed__():
+            for frame in cls.__call_stack():
                 if inside_module:
                     if element_to_find == ReportNamingElement.Test:
                         return frame.function
@@ -190,6 +218,23 @@ class ReportHelper:
                     # we're entering the module, the next frame contains the info we're looking for
                     inside_module = True
 
+    @staticmethod
+    def __call_stack():
+        """Returns the function and file names of the frames in the call stack, outermost frame first
+
+        Unlike inspect.stack(), this does not read the source code of every frame from disk.
+
+        Returns:
+            list: the StackFrame of every frame in the call stack
+        """
+        frames = []
+        frame = sys._getframe(1)
+        while frame is not None:
+            frames.append(StackFrame(frame.f_code.co_name, frame.f_code.co_filename))
+            frame = frame.f_back
+        frames.reverse()
+        return frames
+
     @classmethod
     def __detect_unittest(cls):
         """Utility method that traverses the call stack and checks if unittest was invoked
@@ -197,7 +242,7 @@ class ReportHelper:
         Returns:
             bool: True if unittest was found in the call stack, False otherwise
         """
-        for frame in inspect.stack().__reversed__():
+        for frame in cls.__call_stack():
             if (
                 frame.function == "__init__"
                 and str(frame.filename).find("unittest") > 0
@@ -216,7 +261,7 @@ class ReportHelper:
         if not cls.__detect_unittest():
             return False
         else:
-            for frame in inspect.stack().__reversed__():
+            for frame in cls.__call_stack():
                 if frame.function in ["tearDown", "tearDownClass"]:
                     return True
         return False
@@ -0,0 +1,170 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.testproject.enums import ScreenshotFormat
+from src.testproject.helpers.confighelper import ConfigHelper
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class ScreenshotHelper:
+    """Downscales and re-encodes screenshots on a pool of worker threads, off the test thread
+
+    Screenshots are processed when a format or a maximum dimension is set, either through the step settings or the
+    TP_SCREENSHOT_FORMAT and TP_SCREENSHOT_MAX_DIMENSION environment variables. Processing requires the Pillow package,
+    screenshots are reported as taken by the driver when it is not installed.
+    """
+
+    DEFAULT_QUALITY = 80
+    DEFAULT_WORKERS = 2
+    TP_FORMAT_VARIABLE_NAME = "TP_SCREENSHOT_FORMAT"
+    TP_MAX_DIMENSION_VARIABLE_NAME = "TP_SCREENSHOT_MAX_DIMENSION"
+    TP_QUALITY_VARIABLE_NAME = "TP_SCREENSHOT_QUALITY"
+    TP_WORKERS_VARIABLE_NAME = "TP_SCREENSHOT_WORKERS"
+
+    __executor = None
+    __lock = threading.Lock()
+    __warned = False
+
+    @classmethod
+    def options(cls, settings):
+        """Returns the processing options of screenshots taken with the given step settings
+
+        Options not set in the step settings are taken from the environment.
+
+        Args:
+            settings (StepSettings): Step settings in effect when the screenshot is taken
+
+        Returns:
+            tuple: the ScreenshotFormat (None to keep the format), maximum dimension (0 to keep the size) and quality
+        """
+        image_format = getattr(settings, "screenshot_format", None)
+        if image_format is None:
+            value = os.getenv(cls.TP_FORMAT_VARIABLE_NAME)
+            if value:
+                try:
+                    image_format = ScreenshotFormat(value.casefold())
+                except ValueError:
+                    logging.warning(
+                        "The environment variable {} value must be one of {}.".format(
+                            cls.TP_FORMAT_VARIABLE_NAME, ", ".join(member.value for member in ScreenshotFormat)
+                        )
+                    )
+        max_dimension = getattr(settings, "screenshot_max_dimension", None)
+        if max_dimension is None:
+            max_dimension = ConfigHelper.get_int_from_env(cls.TP_MAX_DIMENSION_VARIABLE_NAME, 0)
+        quality = getattr(settings, "screenshot_quality", None)
+        if quality is None:
+            quality = ConfigHelper.get_int_from_env(cls.TP_QUALITY_VARIABLE_NAME, cls.DEFAULT_QUALITY)
+        return image_format, max(max_dimension, 0), min(max(quality, 1), 100)
+
+    @classmethod
+    def process(cls, screenshot, settings):
+        """Hands a screenshot over to the worker threads, if it needs to be processed
+
+        Args:
+            screenshot (str): The base64 encoded PNG screenshot taken by the driver
+            settings (StepSettings): Step settings in effect when the screenshot was taken
+
+        Returns:
+            the screenshot as is if it does not need to be processed, a ProcessedScreenshot otherwise
+        """
+        if not screenshot:
+            return screenshot
+        image_format, max_dimension, quality = cls.options(settings)
+        if image_format is None and not max_dimension:
+            return screenshot
+        if Image is None:
+            if not cls.__warned:
+                cls.__warned = True
+                logging.warning("The Pillow package is not installed, screenshots are reported as taken by the driver.")
+            return screenshot
+        future = cls.__get_executor().submit(cls.convert, screenshot, image_format, max_dimension, quality)
+        return ProcessedScreenshot(future, screenshot)
+
+    @classmethod
+    def __get_executor(cls):
+        with cls.__lock:
+            if cls.__executor is None:
+                cls.__executor = ThreadPoolExecutor(
+                    max_workers=max(ConfigHelper.get_int_from_env(cls.TP_WORKERS_VARIABLE_NAME, cls.DEFAULT_WORKERS), 1)
+                )
+            return cls.__executor
+
+    @staticmethod
+    def convert(screenshot, image_format, max_dimension, quality):
+        """Downscales and re-encodes a screenshot
+
+        Args:
+            screenshot (str): The base64 encoded PNG screenshot
+            image_format (ScreenshotFormat): Format to encode the screenshot in, None to keep it as PNG
+            max_dimension (int): Maximum width and height in pixels, 0 to keep the size
+            quality (int): Quality of JPEG and WebP images, from 1 to 100
+
+        Returns:
+            str: the base64 encoded screenshot, as taken if processing did not make it smaller
+        """
+        image = Image.open(io.BytesIO(base64.b64decode(screenshot)))
+        resized = bool(max_dimension) and max(image.size) > max_dimension
+        if resized:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        output = io.BytesIO()
+        if image_format is ScreenshotFormat.Jpeg:
+            # JPEG has no alpha channel
+            image.convert("RGB").save(output, "JPEG", quality=quality, optimize=True)
+        elif image_format is ScreenshotFormat.WebP:
+            image.save(output, "WEBP", quality=quality)
+        else:
+            image.save(output, "PNG", optimize=True)
+        encoded = base64.b64encode(output.getvalue()).decode("ascii")
+        return encoded if resized or len(encoded) < len(screenshot) else screenshot
+
+
+class ProcessedScreenshot:
+    """Screenshot being processed by the worker threads, resolved to a base64 string when its report is serialized
+
+    Args:
+        future (concurrent.futures.Future): Processing of the screenshot
+        original (str): The base64 encoded screenshot as taken by the driver, reported if processing fails
+    """
+
+    # Maximum time in seconds the reporting thread waits for a screenshot to be processed
+    TIMEOUT = 30
+
+    def __init__(self, future, original):
+        self._future = future
+        self._original = original
+
+    def __str__(self):
+        try:
+            return self._future.result(timeout=self.TIMEOUT)
+        except Exception as e:
+            logging.warning("Failed processing a screenshot, it is reported as taken by the driver: {}".format(e))
+            return self._original
+
+    def __len__(self):
+        """Returns the length of the processed screenshot if it is ready, of the screenshot as taken otherwise"""
+        if self._future.done() and self._future.exception() is None:
+            return len(self._future.result())
+        return len(self._original)
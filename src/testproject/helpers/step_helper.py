@@ -26,14 +26,55 @@ class StepHelper:
         self.executor = executor
         self.w3c = w3c
         self.session_id = session_id
+        # Implicit wait currently applied to the session in milliseconds, None while the session default applies
+        self._applied_implicit_wait = None
+        # Implicit wait set by the user through a driver command, None if the user never set one
+        self._user_implicit_wait = None
+        # True if the implicit wait set for a step must be reverted before the next command
+        self._restore_pending = False
 
     def handle_timeout(self, timeout):
+        """Applies the step timeout as the driver implicit wait, only sending the command when the value changes.
+
+        Without a step timeout, the implicit wait that applied before a step timeout was set is restored if needed.
+        """
         if timeout > 0:
-            logging.debug("Setting driver implicit wait to {} milliseconds.".format(timeout))
-            if self.w3c:
-                self.executor.execute(Command.SET_TIMEOUTS, {"sessionId": self.session_id, "implicit": int(timeout)})
-            else:
-                self.executor.execute(Command.IMPLICIT_WAIT, {"sessionId": self.session_id, "ms": float(timeout)})
+            implicit_wait = int(timeout)
+        elif self._restore_pending:
+            implicit_wait = self._user_implicit_wait if self._user_implicit_wait is not None else 0
+        else:
+            return
+
+        self._restore_pending = False
+        if implicit_wait == self._applied_implicit_wait:
+            return
+
+        logging.debug("Setting driver implicit wait to {} milliseconds.".format(implicit_wait))
+        if self.w3c:
+            self.executor.execute(Command.SET_TIMEOUTS, {"sessionId": self.session_id, "implicit": implicit_wait})
+        else:
+            self.executor.execute(Command.IMPLICIT_WAIT, {"sessionId": self.session_id, "ms": float(implicit_wait)})
+        self._applied_implicit_wait = implicit_wait
+
+    def restore_timeout(self, timeout):
+        """Reverts the implicit wait set for a step once the step settings are reverted to ones with the given timeout.
+
+        The implicit wait is restored right before the next command, so no command is sent if none follows.
+        """
+        if timeout <= 0 and self._applied_implicit_wait is not None:
+            user_implicit_wait = self._user_implicit_wait if self._user_implicit_wait is not None else 0
+            self._restore_pending = self._applied_implicit_wait != user_implicit_wait
+
+    def track_implicit_wait(self, command, params):
+        """Keeps track of the implicit wait set by the user through a driver command."""
+        if command == Command.SET_TIMEOUTS and params and "implicit" in params:
+            implicit_wait = params["implicit"]
+        elif command == Command.IMPLICIT_WAIT and params and "ms" in params:
+            implicit_wait = params["ms"]
+        else:
+            return
+        self._user_implicit_wait = self._applied_implicit_wait = implicit_wait
+        self._restore_pending = False
 
     @staticmethod
     def handle_sleep(sleep_timing_type, sleep_time, command=None, step_executed=False):
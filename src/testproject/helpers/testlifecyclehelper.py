@@ -0,0 +1,124 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+
+class ManagedTest:
+    """Test whose start, end and outcome are reported by a test framework plugin
+
+    Args:
+        name (str): The test name
+        project (str): The project name
+        job (str): The job name
+
+    Attributes:
+        _name (str): The test name
+        _project (str): The project name
+        _job (str): The job name
+        _start (float): Monotonic time the test started at
+        _end (float): Monotonic time the test ended at, None while it is running
+        passed (bool): True if the test passed so far, False otherwise
+        skipped (bool): True if the test was skipped, in which case it is not reported
+        message (str): A message that goes with the test, typically the reason it failed
+        reported (bool): True once the test has been reported to the Agent
+    """
+
+    def __init__(self, name, project, job):
+        self._name = name
+        self._project = project
+        self._job = job
+        self._start = time.monotonic()
+        self._end = None
+        self.passed = True
+        self.skipped = False
+        self.message = None
+        self.reported = False
+
+    @property
+    def name(self):
+        """Getter for the test name"""
+        return self._name
+
+    @property
+    def project(self):
+        """Getter for the project name"""
+        return self._project
+
+    @property
+    def job(self):
+        """Getter for the job name"""
+        return self._job
+
+    @property
+    def duration(self):
+        """Getter for the time the test took (or has taken so far) in seconds"""
+        return (self._end if self._end is not None else time.monotonic()) - self._start
+
+    def fail(self, message):
+        """Marks the test as failed, keeping the message of the first failure"""
+        if self.passed:
+            self.passed = False
+            self.message = message
+
+    def end(self):
+        """Marks the test as ended"""
+        if self._end is None:
+            self._end = time.monotonic()
+
+
+class TestLifecycleHelper:
+    """Keeps track of the test currently run by a test framework plugin
+
+    While a plugin manages the test lifecycle, test names are taken from the running test rather than inferred from
+    the environment or the call stack, and tests are reported when the plugin ends them.
+    """
+
+    # Tells pytest this is not a test class
+    __test__ = False
+
+    __current_test = None
+
+    @classmethod
+    def start_test(cls, name, project, job):
+        """Starts a test managed by a test framework plugin
+
+        Args:
+            name (str): The test name
+            project (str): The project name
+            job (str): The job name
+
+        Returns:
+            ManagedTest: The test that was started
+        """
+        cls.__current_test = ManagedTest(name, project, job)
+        return cls.__current_test
+
+    @classmethod
+    def end_test(cls):
+        """Ends the current managed test
+
+        Returns:
+            ManagedTest: The test that ended, None if no test was running
+        """
+        test = cls.__current_test
+        cls.__current_test = None
+        if test is not None:
+            test.end()
+        return test
+
+    @classmethod
+    def current_test(cls):
+        """Returns the managed test currently running, None if test lifecycle is not managed by a plugin"""
+        return cls.__current_test
@@ -0,0 +1,86 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import threading
+from contextlib import contextmanager
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    # Python 3.6
+    contextvars = None
+
+
+class WaitScopeHelper:
+    """Keeps track of whether driver commands are executed by a WebDriverWait
+
+    Waits mark their scope explicitly, using wait_scope(). Commands executed by a WebDriverWait that does not mark its
+    scope (such as the Selenium WebDriverWait or a subclass of it) are detected by looking for the Selenium wait
+    module in a bounded number of the calling frames.
+    """
+
+    # Number of calling frames looked at when the wait scope was not marked explicitly
+    MAX_FALLBACK_FRAMES = 30
+    WAIT_MODULE_FILE_NAME = "wait.py"
+
+    if contextvars is not None:
+        __depth = contextvars.ContextVar("testproject_wait_scope_depth", default=0)
+    else:
+        __local = threading.local()
+
+    @staticmethod
+    @contextmanager
+    def wait_scope():
+        """Marks the driver commands executed inside the with block as executed by a WebDriverWait
+
+        Examples:
+            with WaitScopeHelper.wait_scope():
+                element = custom_wait(driver, condition)
+        """
+        if contextvars is not None:
+            token = WaitScopeHelper.__depth.set(WaitScopeHelper.__depth.get() + 1)
+            try:
+                yield
+            finally:
+                WaitScopeHelper.__depth.reset(token)
+        else:
+            WaitScopeHelper.__local.depth = getattr(WaitScopeHelper.__local, "depth", 0) + 1
+            try:
+                yield
+            finally:
+                WaitScopeHelper.__local.depth -= 1
+
+    @staticmethod
+    def in_wait_scope():
+        """Returns True if the calling code is executed by a WebDriverWait
+
+        Returns:
+            bool: True if inside a wait scope, or if the Selenium wait module is one of the calling frames
+        """
+        if contextvars is not None:
+            if WaitScopeHelper.__depth.get() > 0:
+                return True
+        elif getattr(WaitScopeHelper.__local, "depth", 0) > 0:
+            return True
+
+        # Walk the raw frames, which unlike inspect.stack() does not read source files nor build frame records
+        frame = sys._getframe(1)
+        for _ in range(WaitScopeHelper.MAX_FALLBACK_FRAMES):
+            if frame is None:
+                break
+            if frame.f_code.co_filename.endswith(WaitScopeHelper.WAIT_MODULE_FILE_NAME):
+                return True
+            frame = frame.f_back
+        return False
@@ -0,0 +1,154 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""pytest plugin reporting the tests run by pytest to the TestProject Agent
+
+The plugin is registered through the 'pytest11' entry point, so pytest loads it automatically once the SDK is
+installed. It tells the SDK which test is running, which replaces inferring test names from the environment or the
+call stack for every driver command, and reports each test with its actual outcome when it ends. A test ending with a
+test report closes the reports batch it belongs to, so its reports are flushed to the Agent at the test boundary.
+
+Tests are only managed by the plugin while a driver session is active, or for every test when pytest is run with
+'--testproject-report-tests' or the 'testproject_report_tests' ini option is set. Run pytest with
+'-p no:testproject' to disable the plugin.
+"""
+
+import logging
+import sys
+
+import pytest
+
+from src.testproject.enums import ReportNamingElement
+from src.testproject.sdk.exceptions import SdkException
+
+HELPERS_MODULE = "src.testproject.helpers"
+REPORT_TESTS_OPTION = "testproject_report_tests"
+
+
+def pytest_addoption(parser):
+    """Adds the option managing every test, rather than only the tests run while a driver session is active"""
+    parser.addoption(
+        "--testproject-report-tests",
+        action="store_true",
+        dest=REPORT_TESTS_OPTION,
+        help="report every test to the TestProject Agent, even the tests started without an active driver",
+    )
+    parser.addini(
+        REPORT_TESTS_OPTION,
+        type="bool",
+        default=False,
+        help="report every test to the TestProject Agent, even the tests started without an active driver",
+    )
+
+
+def _helpers():
+    """Returns the SDK helpers once the tests imported the SDK, None otherwise
+
+    The plugin is loaded by every pytest run once the SDK is installed, before any test module is imported. Importing
+    the helpers package on its own at that point runs into a circular import, so the plugin never imports it itself:
+    tests that did not import the SDK cannot use a driver, and there is nothing to report for them.
+    """
+    helpers = sys.modules.get(HELPERS_MODULE)
+    if helpers is None or not hasattr(helpers, "TestLifecycleHelper"):
+        return None
+    return helpers
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Starts the test before its fixtures are set up, so commands executed by fixtures are reported as part of it"""
+    if item.config.getoption(REPORT_TESTS_OPTION) or item.config.getini(REPORT_TESTS_OPTION):
+        _start_test(item)
+    else:
+        _start_test_with_driver(item)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_call(item):
+    """Starts the test once its fixtures are set up, when one of them started the driver session"""
+    _start_test_with_driver(item)
+
+
+def _start_test_with_driver(item):
+    """Starts the test if a driver session is active and the test was not started yet"""
+    helpers = _helpers()
+    if helpers is None or helpers.TestLifecycleHelper.current_test() is not None:
+        return
+    if _active_driver() is not None:
+        _start_test(item)
+
+
+def _start_test(item):
+    """Starts a test managed by the plugin, once the tests imported the SDK"""
+    helpers = _helpers()
+    if helpers is None:
+        return
+    helpers.TestLifecycleHelper.start_test(
+        name=item.name,
+        project=helpers.ReportHelper.infer_name_from_pytest_info_for(item.nodeid, ReportNamingElement.Project),
+        job=helpers.ReportHelper.infer_name_from_pytest_info_for(item.nodeid, ReportNamingElement.Job),
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Records the outcome of the setup, call and teardown phases of the test"""
+    outcome = yield
+    report = outcome.get_result()
+    helpers = _helpers()
+    test = helpers.TestLifecycleHelper.current_test() if helpers is not None else None
+    if test is None:
+        return
+
+    if report.skipped:
+        test.skipped = True
+    elif report.failed:
+        test.fail(_failure_message(call))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    """Reports the test once its fixtures have been torn down, unless the driver already reported it when quitting"""
+    yield
+    helpers = _helpers()
+    test = helpers.TestLifecycleHelper.current_test() if helpers is not None else None
+    if test is None:
+        return
+
+    try:
+        test.end()
+        driver = _active_driver()
+        if driver is not None and not driver.command_executor.disable_auto_test_reports:
+            driver.command_executor.report_test()
+    finally:
+        helpers.TestLifecycleHelper.end_test()
+
+
+def _active_driver():
+    """Returns the driver in use, None if the test did not use one"""
+    # Imported here, as importing the drivers is only needed once a test ends
+    from src.testproject.helpers.activesessionhelper import get_active_driver_instance
+
+    try:
+        return get_active_driver_instance()
+    except SdkException:
+        return None
+
+
+def _failure_message(call):
+    """Builds the test report message from the exception that failed a test phase"""
+    if call.excinfo is None:
+        return None
+    message = "{} {}".format(call.excinfo.typename, call.excinfo.value)
+    logging.debug("Test failed in {} phase: {}".format(call.when, message))
+    return message
@@ -24,25 +24,33 @@ class DriverCommandReport:
         command_params (dict): Parameters associated with the command
         result (dict): The result of the command that was executed
         passed (bool): Indication whether or not command execution was performed successfully
-        screenshot (str): Screenshot as base64 encoded string
+        screenshot (str): Screenshot as base64 encoded string, or a ProcessedScreenshot resolved when serialized
         message (str): The message to include in the result
+        repeat_count (int): Number of consecutive identical executions of the command this report stands for
+        time_span_ms (int): Time in milliseconds between the first and the last of these executions
 
     Attributes:
         _command (str): The name of the command that was executed
         _command_params (dict): Parameters associated with the command
         _result (dict): The result of the command that was executed
         _passed (bool): Indication whether or not command execution was performed successfully
-        _screenshot (str): Screenshot as base64 encoded string
+        _screenshot (str): Screenshot as base64 encoded string, or a ProcessedScreenshot resolved when serialized
         _message (str): The message to include in the result
+        _repeat_count (int): Number of consecutive identical executions of the command this report stands for
+        _time_span_ms (int): Time in milliseconds between the first and the last of these executions
     """
 
-    def __init__(self, command, command_params, result, passed, screenshot=None, message=None):
+    def __init__(
+        self, command, command_params, result, passed, screenshot=None, message=None, repeat_count=1, time_span_ms=0
+    ):
         self._command = command
         self._command_params = command_params
         self._result = result
         self._passed = passed
         self._screenshot = screenshot
         self._message = message
+        self._repeat_count = repeat_count
+        self._time_span_ms = time_span_ms
 
     @property
     def command(self):
@@ -84,19 +92,61 @@ class DriverCommandReport:
         """Setter for the message property"""
         self._message = value
 
+    @property
+    def repeat_count(self):
+        """Getter for the repeat_count property"""
+        return self._repeat_count
+
+    @repeat_count.setter
+    def repeat_count(self, value):
+        """Setter for the repeat_count property"""
+        self._repeat_count = value
+
+    @property
+    def time_span_ms(self):
+        """Getter for the time_span_ms property"""
+        return self._time_span_ms
+
+    @time_span_ms.setter
+    def time_span_ms(self, value):
+        """Setter for the time_span_ms property"""
+        self._time_span_ms = value
+
+    @property
+    def fingerprint(self):
+        """Getter for a hashable, canonical representation of the command, its parameters and its outcome
+
+        Reports with equal fingerprints describe identical executions of a command, regardless of the order of the
+        keys in their parameters and result. The screenshot is not part of the fingerprint.
+        """
+        return (
+            self._command,
+            _canonical(self._command_params),
+            _canonical(self._result),
+            self._passed,
+            self._message,
+        )
+
     def to_json(self):
         """Creates a JSON representation of the current DriverCommandReport instance
 
+        A report standing for several identical executions of the command mentions them in its message.
+
         Returns:
             dict: JSON representation of the current instance
         """
+        message = self.message
+        if self._repeat_count > 1:
+            repeats = "Repeated {} times in {} ms".format(self._repeat_count, self._time_span_ms)
+            message = "{} ({})".format(message, repeats) if message else repeats
+
         payload = {
             "commandName": self.command,
             "commandParameters": self.command_params,
             "result": self.result,
             "passed": self.passed,
-            "message": self.message,
-            "screenshot": self.screenshot,
+            "message": message,
+            "screenshot": str(self.screenshot) if self.screenshot is not None else None,
             "type": ReportItemType.Command.value,
         }
 
@@ -118,4 +168,21 @@ class DriverCommandReport:
 
     def __hash__(self):
         """Implement hash to allow objects to be used in sets and dicts"""
-        return hash((self.command, self.command_params, self.result, self.passed, self.screenshot, self.message))
+        return hash((self.fingerprint, self.screenshot))
+
+
+def _canonical(value):
+    """Returns a hashable representation of a JSON value, in which dictionary keys are sorted
+
+    Args:
+        value: JSON value (dict, list or scalar) to represent
+
+    Returns:
+        A value that is equal for equal JSON values and can be hashed
+    """
+    if isinstance(value, dict):
+        items = ((str(key), _canonical(item)) for key, item in value.items())
+        return dict, tuple(sorted(items, key=lambda pair: pair[0]))
+    if isinstance(value, (list, tuple)):
+        return list, tuple(_canonical(item) for item in value)
+    return value
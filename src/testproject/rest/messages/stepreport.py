@@ -25,7 +25,7 @@ class StepReport:
         description (str): The step description
         message (str): A message that goes with the step
         passed (bool): True if the step should be marked as passed, False otherwise
-        screenshot (str): A base64 encoded screenshot that is associated with the step
+        screenshot (str): A base64 encoded screenshot that is associated with the step, or a ProcessedScreenshot
         element (ElementSearchCriteria): The step's element search criteria.
         inputs (dict): Dictionary of step input parameters - name:value
         outputs (dict): Dictionary of step output parameters - name:value
@@ -34,7 +34,7 @@ class StepReport:
         _description (str): The step description
         _message (str): A message that goes with the step
         _passed (bool): True if the step should be marked as passed, False otherwise
-        _screenshot (str): A base64 encoded screenshot that is associated with the step
+        _screenshot (str): A base64 encoded screenshot that is associated with the step, or a ProcessedScreenshot
         _element (dict): The step's element search criteria in JSON representation.
         _input_params (dict): Dictionary of step input parameters - name:value
         _output_params (dict): Dictionary of step output parameters - name:value
@@ -57,7 +57,7 @@ class StepReport:
             "message": self._message,
             "passed": self._passed,
             "element": self._element,
-            "screenshot": self._screenshot,
+            "screenshot": str(self._screenshot) if self._screenshot is not None else None,
             "inputParameters": self._input_params,
             "outputParameters": self._output_params,
             "type": ReportItemType.Step.value,
@@ -40,6 +40,8 @@ class BaseDriver(RemoteWebDriver):
         disable_reports (bool): set to True to disable all reporting (no report will be created on TestProject)
         report_type (ReportType): Type of report to produce - cloud, local or both.
         socket_session_timeout (int): The connection timeout to the agent in milliseconds.
+        keep_alive (bool): True to reuse open connections to the Agent between driver commands, False otherwise
+        batch_settings (BatchSettings): Settings for sending reports to the Agent in batches.
 
     Attributes:
         _agent_client (AgentClient): client responsible for communicating with the TestProject agent
@@ -64,6 +66,8 @@ class BaseDriver(RemoteWebDriver):
         report_name,
         report_path,
         socket_session_timeout,
+        keep_alive,
+        batch_settings,
     ):
 
         if BaseDriver.__instance is not None:
@@ -107,6 +111,7 @@ class BaseDriver(RemoteWebDriver):
             agent_url=agent_url,
             report_settings=ReportSettings(self._project_name, self._job_name, report_type, report_name, report_path),
             socket_session_timeout=socket_session_timeout,
+            batch_settings=batch_settings,
         )
         self._agent_session = self._agent_client.agent_session
         self.w3c = True if self._agent_session.dialect == "W3C" else False
@@ -115,7 +120,9 @@ class BaseDriver(RemoteWebDriver):
         # - automatic logging capabilities
         # - customized reporting settings
         self.command_executor = CustomCommandExecutor(
-            agent_client=self._agent_client, remote_server_addr=self._agent_session.remote_address
+            agent_client=self._agent_client,
+            remote_server_addr=self._agent_session.remote_address,
+            keep_alive=keep_alive,
         )
 
         self.command_executor.disable_reports = disable_reports
@@ -189,6 +196,10 @@ class BaseDriver(RemoteWebDriver):
         except Exception:
             pass
 
+        connection_stats = self.command_executor.connection_stats
+        if connection_stats is not None:
+            logging.debug("Driver command connection stats: {}".format(connection_stats))
+
         # Stop the Agent client
         self.command_executor.agent_client.stop()
 
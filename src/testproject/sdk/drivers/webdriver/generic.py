@@ -39,6 +39,7 @@ class Generic:
         disable_reports (bool): set to True to disable all reporting (no report will be created on TestProject)
         report_type (ReportType): Type of report to produce - cloud, local or both.
         socket_session_timeout (int): The connection timeout to the agent in milliseconds.
+        batch_settings (BatchSettings): Settings for sending reports to the Agent in batches.
     """
 
     __instance = None
@@ -56,6 +57,7 @@ class Generic:
         report_name=None,
         report_path=None,
         socket_session_timeout=AgentClient.NEW_SESSION_SOCKET_TIMEOUT_MS,
+        batch_settings=None,
     ):
         if Generic.__instance is not None:
             raise SdkException("A driver session already exists")
@@ -104,6 +106,7 @@ class Generic:
             agent_url=agent_url,
             report_settings=report_settings,
             socket_session_timeout=socket_session_timeout,
+            batch_settings=batch_settings,
         )
 
         self._agent_session = self._agent_client.agent_session
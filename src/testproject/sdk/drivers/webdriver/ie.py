@@ -31,6 +31,8 @@ class Ie(BaseDriver):
         disable_reports (bool): set to True to disable all reporting (no report will be created on TestProject)
         report_type (ReportType): Type of report to produce - cloud, local or both.
         socket_session_timeout (int): The connection timeout to the agent in milliseconds.
+        keep_alive (bool): True to reuse open connections to the Agent between driver commands, False otherwise
+        batch_settings (BatchSettings): Settings for sending reports to the Agent in batches.
     """
 
     def __init__(
@@ -46,6 +48,8 @@ class Ie(BaseDriver):
         report_name=None,
         report_path=None,
         socket_session_timeout=AgentClient.NEW_SESSION_SOCKET_TIMEOUT_MS,
+        keep_alive=True,
+        batch_settings=None,
     ):
         # If no options or capabilities are specified at all, use default Options
         if ie_options is None and desired_capabilities is None:
@@ -65,4 +69,6 @@ class Ie(BaseDriver):
             report_name=report_name,
             report_path=report_path,
             socket_session_timeout=socket_session_timeout,
+            keep_alive=keep_alive,
+            batch_settings=batch_settings,
         )
@@ -38,6 +38,8 @@ class Remote(AppiumWebDriver):
         job_name (str): Job name to report
         disable_reports (bool): set to True to disable all reporting (no report will be created on TestProject)
         socket_session_timeout (int): The connection timeout to the agent in milliseconds.
+        keep_alive (bool): True to reuse open connections to the Agent between driver commands, False otherwise
+        batch_settings (BatchSettings): Settings for sending reports to the Agent in batches.
 
     Attributes:
         _desired_capabilities (dict): Automation session desired capabilities and options
@@ -62,6 +64,8 @@ class Remote(AppiumWebDriver):
         report_name=None,
         report_path=None,
         socket_session_timeout=AgentClient.NEW_SESSION_SOCKET_TIMEOUT_MS,
+        keep_alive=True,
+        batch_settings=None,
     ):
         if Remote.__instance is not None:
             raise SdkException("A driver session already exists")
@@ -97,6 +101,7 @@ class Remote(AppiumWebDriver):
             agent_url=agent_url,
             report_settings=report_settings,
             socket_session_timeout=socket_session_timeout,
+            batch_settings=batch_settings,
         )
         self._agent_session = self._agent_client.agent_session
         self.w3c = True if self._agent_session.dialect == "W3C" else False
@@ -106,7 +111,9 @@ class Remote(AppiumWebDriver):
         )
 
         self.command_executor = CustomAppiumCommandExecutor(
-            agent_client=self._agent_client, remote_server_addr=self._agent_session.remote_address
+            agent_client=self._agent_client,
+            remote_server_addr=self._agent_session.remote_address,
+            keep_alive=keep_alive,
         )
 
         self.command_executor.disable_reports = disable_reports
@@ -175,6 +182,10 @@ class Remote(AppiumWebDriver):
         except Exception:
             pass
 
+        connection_stats = self.command_executor.connection_stats
+        if connection_stats is not None:
+            logging.debug("Driver command connection stats: {}".format(connection_stats))
+
         # Stop the Agent client
         self.command_executor.agent_client.stop()
 
@@ -0,0 +1,106 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+
+
+class AdaptiveBatchSize:
+    """Adjusts the reports batch size to the measured Agent latency (additive increase, multiplicative decrease)
+
+    The batch size grows by a fixed step while batches are acknowledged within the target latency and reports are
+    waiting in the queue, and is cut by a factor when a batch is slow or fails to be sent.
+
+    Args:
+        initial_size (int): Batch size to start with
+        min_size (int): Smallest batch size allowed
+        max_size (int): Largest batch size allowed
+        target_latency_ms (int): Round trip time in milliseconds above which the batch size is decreased
+
+    Attributes:
+        _size (int): The current batch size
+        _latency_ms (float): Moving average of the batch round trip time in milliseconds
+        _error_rate (float): Moving average of the share of batches that failed to be sent
+    """
+
+    INCREASE_STEP = 1
+    DECREASE_FACTOR = 0.5
+    # Weight of the latest sample in the moving averages
+    SMOOTHING_FACTOR = 0.2
+
+    def __init__(self, initial_size, min_size, max_size, target_latency_ms):
+        self._min_size = max(min_size, 1)
+        self._max_size = max(max_size, self._min_size)
+        self._size = min(max(initial_size, self._min_size), self._max_size)
+        self._target_latency_ms = target_latency_ms
+        self._latency_ms = None
+        self._error_rate = 0.0
+        # Batches may be acknowledged by several sender workers at the same time
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """Getter for the current batch size"""
+        return self._size
+
+    @property
+    def latency_ms(self):
+        """Getter for the moving average of the batch round trip time in milliseconds"""
+        return self._latency_ms
+
+    @property
+    def error_rate(self):
+        """Getter for the moving average of the share of failed batches"""
+        return self._error_rate
+
+    def on_batch_sent(self, round_trip_ms, passed, backlog):
+        """Updates the batch size based on the outcome of sending a batch
+
+        Args:
+            round_trip_ms (float): Time in milliseconds it took to send the batch
+            passed (bool): True if the Agent accepted the batch, False otherwise
+            backlog (int): Number of reports waiting in the queue when the batch was acknowledged
+        """
+        with self._lock:
+            self._update(round_trip_ms, passed, backlog)
+
+    def _update(self, round_trip_ms, passed, backlog):
+        self._error_rate += self.SMOOTHING_FACTOR * ((0.0 if passed else 1.0) - self._error_rate)
+
+        if not passed:
+            self._decrease("batch failed to be sent")
+            return
+
+        self._latency_ms = (
+            round_trip_ms
+            if self._latency_ms is None
+            else self._latency_ms + self.SMOOTHING_FACTOR * (round_trip_ms - self._latency_ms)
+        )
+
+        if self._latency_ms > self._target_latency_ms:
+            self._decrease("average round trip time {:.0f} ms".format(self._latency_ms))
+        elif backlog >= self._size and self._size < self._max_size:
+            # The producer is ahead of the reporting thread and the Agent keeps up, send more at once
+            self._size = min(self._size + self.INCREASE_STEP, self._max_size)
+
+    def _decrease(self, reason):
+        """Cuts the batch size by the decrease factor
+
+        Args:
+            reason (str): Why the batch size is decreased, for logging purposes
+        """
+        new_size = max(int(self._size * self.DECREASE_FACTOR), self._min_size)
+        if new_size != self._size:
+            logging.debug("Decreasing reports batch size from {} to {} ({})".format(self._size, new_size, reason))
+        self._size = new_size
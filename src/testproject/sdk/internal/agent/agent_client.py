@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import logging
 import os
+import threading
 import uuid
 from distutils.util import strtobool
 from enum import Enum, unique
@@ -40,6 +42,7 @@ from src.testproject.rest.messages import (
     StepReport,
 )
 from src.testproject.rest.messages.agentstatusresponse import AgentStatusResponse
+from src.testproject.rest.messages.reportitemtype import ReportItemType
 from src.testproject.sdk.addons import ActionProxy
 from src.testproject.sdk.exceptions import (
     AgentConnectException,
@@ -49,8 +52,14 @@ from src.testproject.sdk.exceptions import (
 )
 from src.testproject.sdk.exceptions.addonnotinstalled import AddonNotInstalledException
 from src.testproject.sdk.internal.agent.agent_client_singleton import AgentClientSingleton
+from src.testproject.sdk.internal.agent.command_coalescer import CommandCoalescer
+from src.testproject.sdk.internal.agent.http_transport import HttpTransport
+from src.testproject.sdk.internal.agent.report_fan_out import ReportFanOut
+from src.testproject.sdk.internal.agent.report_file_sink import ReportFileSink
 from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+from src.testproject.sdk.internal.agent.report_spool import ReportSpool
 from src.testproject.sdk.internal.agent.reports_queue_batch import ReportsQueueBatch
+from src.testproject.sdk.internal.agent.reports_queue_file import ReportsQueueFile
 from src.testproject.sdk.internal.session import AgentSession
 from src.testproject.tcp import SocketManager
 
@@ -64,15 +73,18 @@ class AgentClient(object):
         capabilities (dict): Additional options to be applied to the driver instance
         report_settings (ReportSettings): Settings (project name, job name) to be included in the report
         socket_session_timeout (int): The connection timeout to the agent in milliseconds.
+        batch_settings (BatchSettings): Settings for sending reports to the Agent in batches.
 
     Attributes:
         _remote_address (str): The Agent endpoint
+        _report_urls (dict): Agent endpoints the reports are POSTed to, by endpoint
         _capabilities (dict): Additional options to be applied to the driver instance
         _agent_session (AgentSession): stores properties of the current agent session
         _agent_response (SessionResponse): Session initialization response.
         _token (str): The development token used to authenticate with the Agent
         _report_settings (ReportSettings): Settings (project name, job name) to be included in the report
         _queue (queue.Queue): queue holding reports to be sent to Agent in separate thread
+        _command_coalescer (CommandCoalescer): Collapses runs of identical command reports, None if turned off
     """
 
     # Minimum Agent version number that supports session reuse
@@ -84,18 +96,34 @@ class AgentClient(object):
     # Minimum Agent version that supports batch reporting.
     MIN_BATCH_REPORT_SUPPORTED_VERSION = "3.1.0"
 
+    # Minimum Agent version compressed batch reports are tried with, the queue stops compressing them if the Agent
+    # rejects them.
+    MIN_COMPRESSED_REPORT_SUPPORTED_VERSION = "3.2.0"
+
     # New Session HTTP connection request timeout in milliseconds.
     NEW_SESSION_SOCKET_TIMEOUT_MS = 120 * 1000
 
     # Class variable containing the current known Agent version
     __agent_version = None
 
-    def __init__(self, token, capabilities, agent_url, report_settings, socket_session_timeout):
+    # Class variable containing the pooled transport used for reporting, shared by all sessions
+    __reports_transport = None
+
+    # Class variable containing the pooled transport used for Agent API requests, shared by all sessions
+    __transport = None
+    __transport_lock = threading.Lock()
+
+    def __init__(self, token, capabilities, agent_url, report_settings, socket_session_timeout, batch_settings=None):
         self.agent_url = agent_url
         self._is_local_execution = True
         self._agent_session = None
         self._agent_response = None
         self._remote_address = agent_url if agent_url is not None else ConfigHelper.get_agent_service_address()
+        # Report endpoints are resolved once, rather than for every report
+        self._report_urls = {
+            endpoint: urljoin(self._remote_address, endpoint.value)
+            for endpoint in (Endpoint.ReportDriverCommand, Endpoint.ReportStep, Endpoint.ReportTest)
+        }
         self.__check_local_execution()
         self._report_settings = report_settings
         self._capabilities = capabilities
@@ -105,12 +133,56 @@ class AgentClient(object):
         self.__start_session()
         # Make sure local reports are supported
         self.__verify_local_reports_supported(report_settings.report_type)
-        # Create reports queue
-        if version.parse(self.__agent_version) >= version.parse(self.MIN_BATCH_REPORT_SUPPORTED_VERSION):
+        # Keep the reporting connections open across sessions
+        if AgentClient.__reports_transport is None:
+            AgentClient.__reports_transport = HttpTransport()
+        # Create reports queue, probing the Agent status while it keeps failing
+        status_url = urljoin(self._remote_address, Endpoint.GetStatus.value)
+        spool = ReportSpool.from_env()
+        # Reports left unsent by sessions that stopped before delivering them are sent first, by the reporting thread
+        replay = functools.partial(self.__replay_spool, spool.directory) if spool is not None else None
+        # Report files listed as a secondary sink are written alongside the reports sent to the Agent
+        file_sink = ReportFileSink.from_env() if ReportFanOut.FILE_SINK not in ReportFanOut.sink_names() else None
+        if file_sink is not None:
+            # Reports are written to report files, to be sent to an Agent later on
+            self._reports_queue = ReportsQueueFile(token, file_sink)
+        elif version.parse(self.__agent_version) >= version.parse(self.MIN_BATCH_REPORT_SUPPORTED_VERSION):
             url = urljoin(self._remote_address, Endpoint.ReportBatch.value)
-            self._reports_queue = ReportsQueueBatch(token=token, url=url)
+            self._reports_queue = ReportsQueueBatch(
+                token=token,
+                url=url,
+                transport=AgentClient.__reports_transport,
+                batch_settings=batch_settings,
+                status_url=status_url,
+                compression_supported=version.parse(self.__agent_version)
+                >= version.parse(self.MIN_COMPRESSED_REPORT_SUPPORTED_VERSION),
+                spool=spool,
+                replay=replay,
+            )
         else:
-            self._reports_queue = ReportsQueue(token)
+            self._reports_queue = ReportsQueue(
+                token,
+                transport=AgentClient.__reports_transport,
+                status_url=status_url,
+                spool=spool,
+                replay=replay,
+            )
+        self._agent_reports_queue = self._reports_queue
+        # Fan the reports out to the secondary sinks, if any
+        self._reports_queue = ReportFanOut.from_env(self._agent_reports_queue)
+        self._command_coalescer = CommandCoalescer.from_env(self.__submit_report)
+
+    @classmethod
+    def _get_transport(cls):
+        """Returns the transport used for Agent API requests, creating it on first use
+
+        Returns:
+            HttpTransport: transport shared by all sessions
+        """
+        with cls.__transport_lock:
+            if cls.__transport is None:
+                cls.__transport = HttpTransport()
+            return cls.__transport
 
     @property
     def agent_session(self):
@@ -122,6 +194,16 @@ class AgentClient(object):
         """Getter for the ReportSettings object"""
         return self._report_settings
 
+    @property
+    def reports_queue(self):
+        """Getter for the queue holding the reports until they are sent, fanning them out to the report sinks if any"""
+        return self._reports_queue
+
+    @property
+    def agent_reports_queue(self):
+        """Getter for the queue sending the reports to the Agent"""
+        return self._agent_reports_queue
+
     def __verify_local_reports_supported(self, report_type):
         """Verify that target Agent supports local reports, otherwise throw an exception.
 
@@ -248,7 +330,10 @@ class AgentClient(object):
             logging.info("Updating job name to: {}".format(job_name))
             try:
                 response = self.send_request(
-                    "PUT", urljoin(self._remote_address, Endpoint.DevelopmentSession.value), {"jobName": job_name}
+                    "PUT",
+                    urljoin(self._remote_address, Endpoint.DevelopmentSession.value),
+                    {"jobName": job_name},
+                    timeout=Endpoint.DevelopmentSession.timeout,
                 )
                 if not response.passed:
                     logging.error("Failed to update job name")
@@ -268,19 +353,17 @@ class AgentClient(object):
         Returns:
             OperationResult: contains result of the sent request
         """
-        with requests.Session() as session:
-            if params:
-                session.params = params
-            if method == "GET":
-                response = session.get(path, headers={"Authorization": self._token})
-            elif method == "POST":
-                response = session.post(path, headers={"Authorization": self._token}, json=body, timeout=timeout)
-            elif method == "DELETE":
-                response = session.delete(path, headers={"Authorization": self._token})
-            elif method == "PUT":
-                response = session.put(path, headers={"Authorization": self._token}, json=body)
-            else:
-                raise SdkException("Unsupported HTTP method {} in send_request()".format(method))
+        if method not in ["GET", "POST", "DELETE", "PUT"]:
+            raise SdkException("Unsupported HTTP method {} in send_request()".format(method))
+
+        response = self._get_transport().request(
+            method,
+            path,
+            self._token,
+            json=body if method in ["POST", "PUT"] else None,
+            params=params if params else None,
+            timeout=timeout / 1000.0 if timeout is not None else None,
+        )
 
         response_json = {}
         # For some successful calls, the response body will be empty
@@ -314,7 +397,10 @@ class AgentClient(object):
         """
 
         response = self.send_request(
-            "POST", urljoin(urljoin(self._remote_address, Endpoint.ActionExecution.value), codeblock_guid), body
+            "POST",
+            urljoin(urljoin(self._remote_address, Endpoint.ActionExecution.value), codeblock_guid),
+            body,
+            timeout=Endpoint.ActionExecution.timeout,
         )
 
         if not response.passed:
@@ -339,11 +425,12 @@ class AgentClient(object):
             AgentStatusResponse: contains the response to the sent Agent status request
         """
 
-        with requests.Session() as session:
-            response = session.get(
-                urljoin(ConfigHelper.get_agent_service_address(), Endpoint.GetStatus.value),
-                headers={"Authorization": token},
-            )
+        response = AgentClient._get_transport().request(
+            "GET",
+            urljoin(ConfigHelper.get_agent_service_address(), Endpoint.GetStatus.value),
+            token,
+            timeout=Endpoint.GetStatus.timeout / 1000.0,
+        )
 
         try:
             response.raise_for_status()
@@ -363,17 +450,65 @@ class AgentClient(object):
 
         return AgentStatusResponse(agent_version)
 
+    def __replay_spool(self, directory, submit):
+        """Submits the reports left unsent by sessions that stopped before delivering them, on the reporting thread
+
+        Args:
+            directory (str): Directory holding the spools of all processes
+            submit (callable): Function called with the endpoint URL and JSON payload of every report replayed
+        """
+        # Replayed reports were already handed to the secondary sinks of the session that submitted them
+        ReportSpool.replay(
+            directory,
+            lambda reports: submit(
+                [
+                    (urljoin(self._remote_address, endpoint) if endpoint else None, report)
+                    for endpoint, report in reports
+                ]
+            ),
+            Endpoint.ReportTest.value,
+        )
+
+    def __submit_report(self, report, url):
+        """Submits a report to the reports queue
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object
+            url (str): Agent endpoint the payload should be POSTed to
+        """
+        self._reports_queue.submit_report(report=report, url=url, block=False)
+
+    def __report(self, report, endpoint):
+        """Sends a report to the Agent, through the command coalescer if it is turned on
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object
+            endpoint (Endpoint): Agent endpoint the report is POSTed to when not sent in a batch
+        """
+        if self._command_coalescer is not None:
+            self._command_coalescer.submit(report, self._report_urls[endpoint])
+        else:
+            self.__submit_report(report, self._report_urls[endpoint])
+
+    def report_json(self, report_as_json):
+        """Sends a report already converted to JSON to the Agent, such as a report read from a report file
+
+        Args:
+            report_as_json (dict): JSON payload representing the report
+        """
+        if self._command_coalescer is not None:
+            # Keep the report after the command report held back
+            self._command_coalescer.flush()
+        endpoint = REPORT_ENDPOINTS.get(report_as_json.get("type"), Endpoint.ReportDriverCommand)
+        self._reports_queue.submit(report_as_json=report_as_json, url=self._report_urls[endpoint], block=False)
+
     def report_driver_command(self, driver_command_report):
         """Sends command report to the Agent
 
         Args:
             driver_command_report: object containing the driver command to be reported
         """
-        self._reports_queue.submit(
-            report_as_json=driver_command_report.to_json(),
-            url=urljoin(self._remote_address, Endpoint.ReportDriverCommand.value),
-            block=False,
-        )
+        self.__report(driver_command_report, Endpoint.ReportDriverCommand)
 
     def report_step(self, step_report):
         """Sends step report to the Agent
@@ -382,11 +517,7 @@ class AgentClient(object):
             step_report (StepReport): object containing the step to be reported
         """
 
-        self._reports_queue.submit(
-            report_as_json=step_report.to_json(),
-            url=urljoin(self._remote_address, Endpoint.ReportStep.value),
-            block=False,
-        )
+        self.__report(step_report, Endpoint.ReportStep)
 
     def report_test(self, test_report):
         """Sends test report to the Agent
@@ -395,11 +526,7 @@ class AgentClient(object):
             test_report (CustomTestReport): object containing the test to be reported
         """
 
-        self._reports_queue.submit(
-            report_as_json=test_report.to_json(),
-            url=urljoin(self._remote_address, Endpoint.ReportTest.value),
-            block=False,
-        )
+        self.__report(test_report, Endpoint.ReportTest)
 
     def execute_proxy(self, action):
         """Sends a custom action to the Agent
@@ -415,6 +542,7 @@ class AgentClient(object):
             urljoin(self._remote_address, Endpoint.AddonExecution.value),
             self._create_action_proxy_payload(action),
             {"skipReporting": "true"},  # Delegate reporting from Agent to SDK.
+            timeout=Endpoint.AddonExecution.timeout,
         )
 
         if operation_result.status_code == HTTPStatus.NOT_FOUND:
@@ -495,6 +623,8 @@ class AgentClient(object):
             self._is_local_execution = True
 
     def stop(self):
+        if self._command_coalescer is not None:
+            self._command_coalescer.flush()
         self._reports_queue.stop()
         if self._agent_response and self._agent_response.local_report and self._is_local_execution:
             logging.info("Execution Report: {}".format(self._agent_response.local_report))
@@ -510,3 +640,29 @@ class Endpoint(Enum):
     ReportBatch = "/api/development/report/batch"
     AddonExecution = "/api/addons/executions"
     GetStatus = "/api/status"
+
+    @property
+    def timeout(self):
+        """Getter for the timeout in milliseconds of requests sent to this endpoint"""
+        return ENDPOINT_TIMEOUTS_MS[self]
+
+
+# Agent endpoint of each type of report, when reports are not sent in batches.
+REPORT_ENDPOINTS = {
+    ReportItemType.Command.value: Endpoint.ReportDriverCommand,
+    ReportItemType.Step.value: Endpoint.ReportStep,
+    ReportItemType.Test.value: Endpoint.ReportTest,
+}
+
+# Request timeouts per Agent endpoint in milliseconds.
+# Codeblock and addon executions run user code on the Agent, so they are given more time to complete.
+ENDPOINT_TIMEOUTS_MS = {
+    Endpoint.DevelopmentSession: 30 * 1000,
+    Endpoint.ActionExecution: 10 * 60 * 1000,
+    Endpoint.ReportDriverCommand: 60 * 1000,
+    Endpoint.ReportStep: 60 * 1000,
+    Endpoint.ReportTest: 60 * 1000,
+    Endpoint.ReportBatch: 60 * 1000,
+    Endpoint.AddonExecution: 10 * 60 * 1000,
+    Endpoint.GetStatus: 10 * 1000,
+}
@@ -0,0 +1,107 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import atexit
+import logging
+import os
+import signal
+import threading
+import time
+
+from src.testproject.helpers import ConfigHelper
+
+
+class BackgroundFlush:
+    """Keeps track of the reports queues that were stopped without waiting for their reports to be sent
+
+    Such queues keep sending their reports in the background. Before the process exits, normally or because it
+    received SIGTERM, the reports they still hold are given a bounded amount of time to be sent.
+    """
+
+    EXIT_FLUSH_TIMEOUT_MS = 10 * 1000
+    TP_EXIT_FLUSH_TIMEOUT_VARIABLE_NAME = "TP_REPORTS_EXIT_FLUSH_TIMEOUT_MS"
+
+    __queues = []
+    __unordered = []
+    __lock = threading.Lock()
+    __installed = False
+
+    @classmethod
+    def register(cls, reports_queue, ordered=True):
+        """Registers a stopped reports queue that is still sending its reports
+
+        Args:
+            reports_queue (ReportsQueue): The stopped queue
+            ordered (bool): True if queues created later must wait for this one to send its reports first, False for
+                queues that are only flushed before the process exits, such as secondary report sinks
+        """
+        with cls.__lock:
+            (cls.__queues if ordered else cls.__unordered).append(reports_queue)
+            if not cls.__installed:
+                cls.__install()
+                cls.__installed = True
+
+    @classmethod
+    def pending(cls):
+        """Returns the stopped reports queues that are still sending their reports
+
+        Returns:
+            list: the queues still sending reports, in the order they were stopped
+        """
+        with cls.__lock:
+            cls.__queues = [reports_queue for reports_queue in cls.__queues if reports_queue.draining]
+            return list(cls.__queues)
+
+    @classmethod
+    def flush(cls, timeout=None):
+        """Waits for the stopped reports queues to send their reports
+
+        Args:
+            timeout (float): Maximum time to wait in seconds, taken from the environment if not provided
+
+        Returns:
+            bool: True if all reports were sent, False if the timeout passed first
+        """
+        if timeout is None:
+            timeout = (
+                ConfigHelper.get_int_from_env(cls.TP_EXIT_FLUSH_TIMEOUT_VARIABLE_NAME, cls.EXIT_FLUSH_TIMEOUT_MS)
+                / 1000.0
+            )
+        deadline = time.monotonic() + timeout
+        for reports_queue in cls.pending() + cls.__pending_unordered():
+            reports_queue.wait_stopped(max(deadline - time.monotonic(), 0))
+        return not cls.pending() and not cls.__pending_unordered()
+
+    @classmethod
+    def __pending_unordered(cls):
+        """Returns the stopped queues that are still sending their reports and no other queue waits for"""
+        with cls.__lock:
+            cls.__unordered = [reports_queue for reports_queue in cls.__unordered if reports_queue.draining]
+            return list(cls.__unordered)
+
+    @classmethod
+    def __install(cls):
+        """Flushes the stopped queues when the process exits, or when it is terminated by SIGTERM"""
+        atexit.register(cls.flush)
+        # Signal handlers can only be set from the main thread, and a handler set by the application is kept
+        if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, cls.__on_sigterm)
+
+    @classmethod
+    def __on_sigterm(cls, signum, frame):
+        """Flushes the stopped queues, then terminates the process as it would have been without the handler"""
+        logging.info("Terminating, sending the reports left in the queue...")
+        cls.flush()
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
@@ -0,0 +1,204 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import threading
+import time
+
+from src.testproject.helpers import ConfigHelper
+
+
+class CircuitBreaker:
+    """Pauses sending reports to an Agent that keeps failing, until it recovers
+
+    The circuit opens after a number of consecutive failed attempts. While it is open, senders wait instead of
+    sending reports, and the Agent status is probed with a growing interval. The circuit closes as soon as a probe
+    succeeds. Without a probe, a single attempt is let through once the probe interval passed, and the circuit opens
+    again if it fails.
+
+    Senders stop waiting once the Agent has been failing for longer than the maximum open duration: they give up on
+    their reports right away from then on, so that an unreachable Agent never holds the reporting thread, and the
+    tests waiting for room in the reports queue, indefinitely. The Agent is still probed, and the reports sent after
+    it recovered are delivered again.
+
+    Args:
+        probe (callable): Function returning True if the Agent is responding, None to probe with a real report
+        failure_threshold (int): Number of consecutive failed attempts opening the circuit
+        probe_interval (float): Time in seconds to wait before the first probe
+        max_probe_interval (float): Maximum time in seconds between two probes
+        max_open_duration (float): Time in seconds after which senders give up instead of waiting, 0 to wait until
+            the Agent recovers
+
+    Attributes:
+        _consecutive_failures (int): Number of failed attempts since the last successful one
+        _open (bool): True while reports are not sent to the Agent
+        _probing (bool): True while a sender is probing the Agent
+        _next_probe (float): Monotonic time at which the Agent should be probed next
+        _opened_at (float): Monotonic time the Agent started failing at, None while it is responding
+        _gave_up (bool): True once senders give up on their reports, until the Agent recovers
+        _condition (threading.Condition): Condition notified when the circuit closes
+    """
+
+    DEFAULT_FAILURE_THRESHOLD = 5
+    DEFAULT_PROBE_INTERVAL_MS = 1000
+    DEFAULT_MAX_PROBE_INTERVAL_MS = 30 * 1000
+    DEFAULT_MAX_OPEN_DURATION_MS = 60 * 1000
+
+    TP_FAILURE_THRESHOLD_VARIABLE_NAME = "TP_REPORTS_CIRCUIT_FAILURE_THRESHOLD"
+    TP_PROBE_INTERVAL_VARIABLE_NAME = "TP_REPORTS_CIRCUIT_PROBE_INTERVAL_MS"
+    TP_MAX_OPEN_DURATION_VARIABLE_NAME = "TP_REPORTS_CIRCUIT_MAX_OPEN_MS"
+
+    def __init__(
+        self, probe=None, failure_threshold=None, probe_interval=None, max_probe_interval=None, max_open_duration=None
+    ):
+        self._probe = probe
+        self._failure_threshold = max(
+            (
+                failure_threshold
+                if failure_threshold is not None
+                else ConfigHelper.get_int_from_env(
+                    self.TP_FAILURE_THRESHOLD_VARIABLE_NAME, self.DEFAULT_FAILURE_THRESHOLD
+                )
+            ),
+            1,
+        )
+        self._initial_probe_interval = (
+            probe_interval
+            if probe_interval is not None
+            else ConfigHelper.get_int_from_env(self.TP_PROBE_INTERVAL_VARIABLE_NAME, self.DEFAULT_PROBE_INTERVAL_MS)
+            / 1000.0
+        )
+        self._max_probe_interval = (
+            max_probe_interval if max_probe_interval is not None else self.DEFAULT_MAX_PROBE_INTERVAL_MS / 1000.0
+        )
+        self._max_open_duration = (
+            max_open_duration
+            if max_open_duration is not None
+            else ConfigHelper.get_int_from_env(
+                self.TP_MAX_OPEN_DURATION_VARIABLE_NAME, self.DEFAULT_MAX_OPEN_DURATION_MS
+            )
+            / 1000.0
+        )
+        self._probe_interval = self._initial_probe_interval
+        self._consecutive_failures = 0
+        self._open = False
+        self._probing = False
+        self._next_probe = 0.0
+        self._opened_at = None
+        self._gave_up = False
+        self._condition = threading.Condition()
+
+    @property
+    def is_open(self):
+        """Getter for whether reports are currently held back"""
+        return self._open
+
+    def wait_until_closed(self):
+        """Blocks while the circuit is open, probing the Agent when the probe interval passed
+
+        Returns:
+            bool: True once the circuit is closed, False if the Agent has been failing for longer than the maximum
+                open duration, in which case the report should be given up on
+        """
+        with self._condition:
+            while self._open:
+                give_up_in = self.__give_up_in()
+                if self._probing:
+                    if give_up_in == 0:
+                        return self.__give_up()
+                    self._condition.wait(give_up_in)
+                    continue
+                remaining = self._next_probe - time.monotonic()
+                if remaining > 0:
+                    if give_up_in == 0:
+                        return self.__give_up()
+                    self._condition.wait(remaining if give_up_in is None else min(remaining, give_up_in))
+                    continue
+                if self._probe is None:
+                    # Let a single attempt through, a failure opens the circuit again
+                    self._close(half_open=True)
+                    break
+                self._probing = True
+                self._condition.release()
+                try:
+                    recovered = self.__run_probe()
+                finally:
+                    self._condition.acquire()
+                    self._probing = False
+                if recovered:
+                    self._close()
+                else:
+                    self.__schedule_probe()
+                self._condition.notify_all()
+            return True
+
+    def record_success(self):
+        """Records an attempt accepted by the Agent"""
+        with self._condition:
+            self._consecutive_failures = 0
+            self._probe_interval = self._initial_probe_interval
+            self._opened_at = None
+            self._gave_up = False
+
+    def record_failure(self):
+        """Records a failed attempt, opening the circuit when the failure threshold is reached"""
+        with self._condition:
+            self._consecutive_failures += 1
+            if not self._open and self._consecutive_failures >= self._failure_threshold:
+                logging.warning(
+                    "The Agent failed {} consecutive times, pausing reporting until it recovers".format(
+                        self._consecutive_failures
+                    )
+                )
+                self._open = True
+                if self._opened_at is None:
+                    # A failed half-open attempt does not restart the time the Agent has been failing for
+                    self._opened_at = time.monotonic()
+                self.__schedule_probe()
+
+    def _close(self, half_open=False):
+        if not half_open:
+            logging.info("The Agent is responding again, resuming reporting")
+            self._consecutive_failures = 0
+            self._probe_interval = self._initial_probe_interval
+            self._opened_at = None
+            self._gave_up = False
+        else:
+            self._consecutive_failures = self._failure_threshold - 1
+        self._open = False
+
+    def __give_up_in(self):
+        """Returns the time in seconds until senders give up on their reports, None if they never do"""
+        if self._max_open_duration <= 0 or self._opened_at is None:
+            return None
+        return max(self._opened_at + self._max_open_duration - time.monotonic(), 0)
+
+    def __give_up(self):
+        if not self._gave_up:
+            logging.warning(
+                "The Agent has been failing for more than {:.0f} seconds, "
+                "reports are given up on until it recovers".format(self._max_open_duration)
+            )
+            self._gave_up = True
+        return False
+
+    def __schedule_probe(self):
+        self._next_probe = time.monotonic() + self._probe_interval
+        self._probe_interval = min(self._probe_interval * 2, self._max_probe_interval)
+
+    def __run_probe(self):
+        try:
+            return bool(self._probe())
+        except Exception as e:
+            logging.debug("Agent status probe failed: {}".format(e))
+            return False
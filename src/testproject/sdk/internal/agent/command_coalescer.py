@@ -0,0 +1,128 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+import time
+
+from src.testproject.rest.messages.drivercommandreport import DriverCommandReport
+
+
+class CommandCoalescer:
+    """Collapses runs of identical driver command reports into a single report
+
+    Polling loops that do not use WebDriverWait, such as calling find_elements() until an element shows up, execute
+    the same command with the same outcome over and over. Such a run is reported once, with the number of times the
+    command was executed and the time between the first and the last execution.
+
+    A command report is held back until a report that is not identical to it is submitted, or the coalescer is
+    flushed. Reports holding a screenshot are never coalesced, and reports of other types are passed on right away,
+    after the report held back.
+
+    Args:
+        submit (callable): Called with a report and the Agent endpoint to POST it to, for every report passed on
+        commands (set): Names of the commands whose reports are coalesced, None to coalesce all commands
+
+    Attributes:
+        _submit (callable): Called with a report and the Agent endpoint to POST it to, for every report passed on
+        _commands (set): Names of the commands whose reports are coalesced, None to coalesce all commands
+        _held (DriverCommandReport): Report held back until the run of identical reports it stands for ends
+        _held_url (str): Agent endpoint the report held back is POSTed to
+        _held_fingerprint (tuple): Fingerprint of the report held back
+        _held_since (float): Monotonic time the first report of the run was submitted at
+        _lock (threading.Lock): Keeps reports submitted by several threads in order
+    """
+
+    ALL_COMMANDS = "*"
+    NO_COMMANDS = "none"
+    TP_COALESCE_COMMANDS_VARIABLE_NAME = "TP_REPORTS_COALESCE_COMMANDS"
+
+    def __init__(self, submit, commands=None):
+        self._submit = submit
+        self._commands = commands
+        self._held = None
+        self._held_url = None
+        self._held_fingerprint = None
+        self._held_since = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, submit):
+        """Creates a coalescer for the commands listed in the TP_REPORTS_COALESCE_COMMANDS environment variable
+
+        The variable holds a comma separated list of command names (as defined by Selenium and Appium), '*' for
+        all commands, or 'none' to turn coalescing off, which is the default.
+
+        Args:
+            submit (callable): Called with a report and the Agent endpoint to POST it to, for every report passed on
+
+        Returns:
+            CommandCoalescer: the coalescer, None if coalescing is turned off
+        """
+        value = os.getenv(cls.TP_COALESCE_COMMANDS_VARIABLE_NAME, cls.NO_COMMANDS).strip()
+        if value == cls.ALL_COMMANDS:
+            return cls(submit)
+        commands = {command.strip() for command in value.split(",") if command.strip()}
+        if not commands or value.casefold() == cls.NO_COMMANDS:
+            return None
+        return cls(submit, commands)
+
+    @property
+    def commands(self):
+        """Getter for the names of the commands whose reports are coalesced, None if all commands are"""
+        return self._commands
+
+    def submit(self, report, url):
+        """Submits a report, holding it back if it may be followed by identical command reports
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object
+            url (str): Agent endpoint the payload should be POSTed to
+        """
+        with self._lock:
+            if not self._coalesced(report):
+                self._release()
+                self._submit(report, url)
+                return
+            fingerprint = report.fingerprint
+            if self._held is not None and fingerprint == self._held_fingerprint:
+                self._held.repeat_count += 1
+                self._held.time_span_ms = int((time.monotonic() - self._held_since) * 1000)
+                return
+            self._release()
+            self._held = report
+            self._held_url = url
+            self._held_fingerprint = fingerprint
+            self._held_since = time.monotonic()
+
+    def flush(self):
+        """Passes on the report held back, if any"""
+        with self._lock:
+            self._release()
+
+    def _coalesced(self, report):
+        """Returns True if the report may be coalesced with identical reports"""
+        return (
+            isinstance(report, DriverCommandReport)
+            and not report.screenshot
+            and (self._commands is None or report.command in self._commands)
+        )
+
+    def _release(self):
+        """Passes on the report held back, if any, the caller holds the lock"""
+        if self._held is None:
+            return
+        report, url = self._held, self._held_url
+        self._held = self._held_url = self._held_fingerprint = self._held_since = None
+        self._submit(report, url)
@@ -0,0 +1,144 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from json import dumps
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.testproject.helpers import ConfigHelper
+
+
+class HttpTransport:
+    """Long-lived HTTP transport sending requests to the Agent over pooled keep-alive connections
+
+    Args:
+        pool_size (int): Maximum number of connections kept open to the Agent
+        connect_timeout (float): Time in seconds to wait for a connection to the Agent to be established
+        read_timeout (float): Time in seconds to wait for the Agent to respond
+
+    Attributes:
+        _pool_size (int): Maximum number of connections kept open to the Agent
+        _timeout (tuple): Default (connect, read) timeout applied to every request
+        _session (requests.Session): Session holding the pool of open connections
+    """
+
+    DEFAULT_POOL_SIZE = 10
+    DEFAULT_CONNECT_TIMEOUT = 10
+    DEFAULT_READ_TIMEOUT = 60
+
+    TP_POOL_SIZE_VARIABLE_NAME = "TP_REPORTS_POOL_SIZE"
+    TP_CONNECT_TIMEOUT_VARIABLE_NAME = "TP_REPORTS_CONNECT_TIMEOUT"
+    TP_READ_TIMEOUT_VARIABLE_NAME = "TP_REPORTS_READ_TIMEOUT"
+
+    def __init__(self, pool_size=None, connect_timeout=None, read_timeout=None):
+        self._pool_size = (
+            pool_size
+            if pool_size is not None
+            else ConfigHelper.get_int_from_env(self.TP_POOL_SIZE_VARIABLE_NAME, self.DEFAULT_POOL_SIZE)
+        )
+        self._timeout = (
+            (
+                connect_timeout
+                if connect_timeout is not None
+                else ConfigHelper.get_float_from_env(
+                    self.TP_CONNECT_TIMEOUT_VARIABLE_NAME, self.DEFAULT_CONNECT_TIMEOUT
+                )
+            ),
+            (
+                read_timeout
+                if read_timeout is not None
+                else ConfigHelper.get_float_from_env(self.TP_READ_TIMEOUT_VARIABLE_NAME, self.DEFAULT_READ_TIMEOUT)
+            ),
+        )
+        self._session = self._create_session()
+
+    @property
+    def pool_size(self):
+        """Getter for the maximum number of pooled connections"""
+        return self._pool_size
+
+    @property
+    def timeout(self):
+        """Getter for the default (connect, read) timeout"""
+        return self._timeout
+
+    def _create_session(self):
+        """Creates a session whose connection pool is sized according to the transport settings
+
+        Returns:
+            requests.Session: session with a pooled adapter mounted for both HTTP and HTTPS
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def post(self, url, token, json=None, timeout=None, compression=None, data=None, content_encoding=None):
+        """Sends a POST request to the Agent
+
+        Args:
+            url (str): The Agent endpoint to send the request to
+            token (str): Token used to authenticate with the Agent
+            json (object): JSON serializable request body
+            timeout (Union[float, tuple]): Overrides the default timeout for this request
+            compression (PayloadCompression): Compression applied to the request body, None to send it as is
+            data (bytes): Request body already serialized to JSON, used instead of json
+            content_encoding (str): Content encoding data was already compressed with, None if it was not
+
+        Returns:
+            requests.Response: the response returned by the Agent
+        """
+        if data is None:
+            if compression is None:
+                return self.request("POST", url, token, json=json, timeout=timeout)
+            data = dumps(json).encode("utf-8")
+        encoding = content_encoding
+        if compression is not None:
+            data, encoding = compression.encode(data)
+        headers = {"Content-Type": "application/json"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return self.request("POST", url, token, data=data, headers=headers, timeout=timeout)
+
+    def request(self, method, url, token, json=None, params=None, timeout=None, data=None, headers=None):
+        """Sends an HTTP request to the Agent, reusing an open connection when available
+
+        Args:
+            method (str): HTTP method (GET, POST, ...)
+            url (str): The Agent endpoint to send the request to
+            token (str): Token used to authenticate with the Agent
+            json (object): JSON serializable request body
+            params (dict): Request query parameters
+            timeout (Union[float, tuple]): Overrides the default timeout for this request
+            data (bytes): Already serialized request body, used instead of json
+            headers (dict): Additional request headers
+
+        Returns:
+            requests.Response: the response returned by the Agent
+        """
+        return self._session.request(
+            method,
+            url,
+            headers=dict(headers or {}, Authorization=token),
+            json=json,
+            data=data,
+            params=params,
+            timeout=timeout if timeout is not None else self._timeout,
+        )
+
+    def close(self):
+        """Closes all pooled connections"""
+        self._session.close()
@@ -0,0 +1,108 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonSerializer:
+    """Serializes reports to JSON bytes
+
+    The orjson encoder is used when it is installed, as it encodes large payloads (screenshots, script results)
+    several times faster than the standard json module, which is used otherwise. The encoder can also be chosen using
+    the TP_REPORTS_JSON_ENCODER environment variable.
+
+    Args:
+        encoder (str): Encoder to use, either 'orjson' or 'json', taken from the environment if not provided
+
+    Attributes:
+        _encoder (str): Encoder in use
+    """
+
+    JSON = "json"
+    ORJSON = "orjson"
+    TP_JSON_ENCODER_VARIABLE_NAME = "TP_REPORTS_JSON_ENCODER"
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    def __init__(self, encoder=None):
+        encoder = encoder if encoder is not None else os.getenv(self.TP_JSON_ENCODER_VARIABLE_NAME)
+        if encoder is None:
+            encoder = self.ORJSON if orjson is not None else self.JSON
+        encoder = encoder.casefold()
+        if encoder not in (self.JSON, self.ORJSON):
+            logging.warning(
+                "The environment variable {} value must be one of {}, {}.".format(
+                    self.TP_JSON_ENCODER_VARIABLE_NAME, self.JSON, self.ORJSON
+                )
+            )
+            encoder = self.ORJSON if orjson is not None else self.JSON
+        elif encoder == self.ORJSON and orjson is None:
+            logging.warning("The orjson package is not installed, reports will be encoded using the json module.")
+            encoder = self.JSON
+        self._encoder = encoder
+
+    @classmethod
+    def instance(cls):
+        """Returns the serializer shared by all reports queues, creating it on first use
+
+        Returns:
+            JsonSerializer: serializer configured from the environment
+        """
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = cls()
+            return cls.__instance
+
+    @property
+    def encoder(self):
+        """Getter for the encoder in use"""
+        return self._encoder
+
+    def dumps(self, obj):
+        """Serializes an object to JSON
+
+        Args:
+            obj (object): JSON serializable object
+
+        Returns:
+            bytes: UTF-8 encoded JSON representation of the object
+        """
+        if self._encoder == self.ORJSON:
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # Values orjson does not support, such as integers larger than 64 bits, are left to the json module
+                pass
+        return json.dumps(obj).encode("utf-8")
+
+    @staticmethod
+    def loads(data):
+        """Deserializes JSON bytes
+
+        Args:
+            data (bytes): UTF-8 encoded JSON
+
+        Returns:
+            object: the deserialized object
+        """
+        return orjson.loads(data) if orjson is not None else json.loads(data.decode("utf-8"))
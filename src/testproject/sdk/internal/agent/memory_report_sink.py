@@ -0,0 +1,45 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from src.testproject.sdk.internal.agent.report_sink import ReportSink
+
+
+class MemoryReportSink(ReportSink):
+    """Report sink collecting the reports in memory, typically to make assertions on them in tests
+
+    Attributes:
+        _reports (list): JSON payloads of the reports collected, in the order they were submitted
+        _lock (threading.Lock): Lock guarding the reports collected
+    """
+
+    def __init__(self):
+        self._reports = []
+        self._lock = threading.Lock()
+
+    @property
+    def reports(self):
+        """Getter for the JSON payloads of the reports collected, in the order they were submitted"""
+        with self._lock:
+            return list(self._reports)
+
+    def submit(self, report_as_json, url, block):
+        with self._lock:
+            self._reports.append(report_as_json)
+
+    def clear(self):
+        """Forgets the reports collected so far"""
+        with self._lock:
+            self._reports.clear()
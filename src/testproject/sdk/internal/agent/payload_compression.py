@@ -0,0 +1,130 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gzip
+import logging
+import os
+import zlib
+
+from src.testproject.helpers import ConfigHelper
+
+
+class PayloadCompression:
+    """Compresses request bodies sent to the Agent
+
+    Bodies smaller than the threshold are sent as they are, since compressing them costs more than it saves. Once the
+    Agent rejected a compressed body, compression is turned off and bodies are sent as they are.
+
+    Args:
+        encoding (str): Content encoding to compress the bodies with, either gzip or deflate
+        threshold_bytes (int): Size in bytes below which bodies are not compressed
+        level (int): Compression level, from 1 (fastest) to 9 (smallest)
+
+    Attributes:
+        _encoding (str): Content encoding to compress the bodies with
+        _threshold_bytes (int): Size in bytes below which bodies are not compressed
+        _level (int): Compression level
+        _rejected (bool): True once the Agent rejected a compressed body
+    """
+
+    GZIP = "gzip"
+    DEFLATE = "deflate"
+    SUPPORTED_ENCODINGS = (GZIP, DEFLATE)
+    DEFAULT_THRESHOLD_BYTES = 1024
+    DEFAULT_LEVEL = 6
+    # Statuses returned by Agents that do not accept compressed bodies
+    REJECTED_STATUS_CODES = (400, 415)
+
+    def __init__(self, encoding, threshold_bytes=None, level=None):
+        if encoding not in self.SUPPORTED_ENCODINGS:
+            raise ValueError(
+                "Unsupported content encoding '{}', must be one of {}".format(
+                    encoding, ", ".join(self.SUPPORTED_ENCODINGS)
+                )
+            )
+        self._encoding = encoding
+        self._threshold_bytes = threshold_bytes if threshold_bytes is not None else self.DEFAULT_THRESHOLD_BYTES
+        self._level = level if level is not None else self.DEFAULT_LEVEL
+        self._rejected = False
+
+    @property
+    def encoding(self):
+        """Getter for the content encoding the bodies are compressed with"""
+        return self._encoding
+
+    @property
+    def threshold_bytes(self):
+        """Getter for the size in bytes below which bodies are not compressed"""
+        return self._threshold_bytes
+
+    @property
+    def rejected(self):
+        """Getter for the flag telling whether the Agent rejected a compressed body"""
+        return self._rejected
+
+    def reject(self):
+        """Turns compression off, after the Agent rejected a compressed body"""
+        if not self._rejected:
+            logging.warning("The Agent does not accept compressed reports, reports will be sent uncompressed")
+        self._rejected = True
+
+    def encode(self, body):
+        """Compresses a request body if it is large enough
+
+        Args:
+            body (bytes): The serialized request body
+
+        Returns:
+            tuple: the body to send, and its content encoding or None if it was not compressed
+        """
+        if self._rejected or len(body) < self._threshold_bytes:
+            return body, None
+        if self._encoding == self.GZIP:
+            compressed = gzip.compress(body, compresslevel=self._level)
+        else:
+            compressed = zlib.compress(body, self._level)
+        logging.debug(
+            "Compressed report payload from {} to {} bytes using {}".format(len(body), len(compressed), self._encoding)
+        )
+        return compressed, self._encoding
+
+    @classmethod
+    def from_settings(cls, encoding, threshold_bytes, variable_name, threshold_variable_name):
+        """Creates the compression from explicit settings, falling back to environment variables
+
+        Args:
+            encoding (str): Content encoding, None to take it from the environment
+            threshold_bytes (int): Size in bytes below which bodies are not compressed, None to take it from the
+                environment
+            variable_name (str): Environment variable holding the content encoding
+            threshold_variable_name (str): Environment variable holding the threshold
+
+        Returns:
+            PayloadCompression: the compression to apply, None if compression is disabled or the encoding is invalid
+        """
+        encoding = encoding if encoding is not None else os.getenv(variable_name)
+        if encoding is None or encoding.casefold() in ("", "none", "identity"):
+            return None
+        if encoding.casefold() not in cls.SUPPORTED_ENCODINGS:
+            logging.warning(
+                "Unsupported reports compression '{}', must be one of {}. Reports will not be compressed.".format(
+                    encoding, ", ".join(cls.SUPPORTED_ENCODINGS)
+                )
+            )
+            return None
+        threshold_bytes = (
+            threshold_bytes
+            if threshold_bytes is not None
+            else ConfigHelper.get_int_from_env(threshold_variable_name, cls.DEFAULT_THRESHOLD_BYTES)
+        )
+        return cls(encoding.casefold(), threshold_bytes)
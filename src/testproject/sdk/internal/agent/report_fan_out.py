@@ -0,0 +1,335 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+import queue
+import threading
+import time
+
+from src.testproject.helpers import ConfigHelper
+from src.testproject.sdk.internal.agent.background_flush import BackgroundFlush
+from src.testproject.sdk.internal.agent.report_file_sink import ReportFileSink
+from src.testproject.sdk.internal.agent.report_metrics_sink import ReportMetricsSink
+from src.testproject.sdk.internal.agent.report_sink import ReportSink
+from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+
+
+class IsolatedReportSink(ReportSink):
+    """Runs a report sink on its own thread, behind a bounded buffer, so that it never slows down the submitter
+
+    Reports submitted while the buffer is full, either by number of reports or by their estimated size in bytes, are
+    dropped. Errors raised by the sink are logged and counted, they never reach the submitter nor stop the sink from
+    handling the next reports.
+
+    Args:
+        sink (ReportSink): The sink reports are handed over to
+        buffer_size (int): Maximum number of reports waiting to be handled by the sink, taken from the environment if
+            not provided
+        max_bytes (int): Maximum estimated size in bytes of the reports waiting to be handled by the sink, taken from
+            the environment if not provided, 0 for no limit
+
+    Attributes:
+        _sink (ReportSink): The sink reports are handed over to
+        _buffer_size (int): Maximum number of reports waiting to be handled by the sink
+        _max_bytes (int): Maximum estimated size in bytes of the reports waiting to be handled by the sink
+        _buffered_bytes (int): Estimated size in bytes of the reports waiting to be handled by the sink
+        _lock (threading.Lock): Keeps the buffered size consistent between the submitter and the sink thread
+        _buffer (queue.Queue): Reports waiting to be handled by the sink, with their estimated size
+        _dropped (int): Number of reports dropped because the buffer was full
+        _failed (int): Number of reports the sink failed to handle
+        _thread (threading.Thread): Thread handing the reports over to the sink
+    """
+
+    DEFAULT_BUFFER_SIZE = 10000
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    TP_SINK_BUFFER_SIZE_VARIABLE_NAME = "TP_REPORTS_SINK_BUFFER_SIZE"
+    TP_SINK_MAX_BYTES_VARIABLE_NAME = "TP_REPORTS_SINK_BUFFER_MAX_BYTES"
+
+    def __init__(self, sink, buffer_size=None, max_bytes=None):
+        self._sink = sink
+        self._buffer_size = (
+            buffer_size
+            if buffer_size is not None
+            else ConfigHelper.get_int_from_env(self.TP_SINK_BUFFER_SIZE_VARIABLE_NAME, self.DEFAULT_BUFFER_SIZE)
+        )
+        self._max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else ConfigHelper.get_int_from_env(self.TP_SINK_MAX_BYTES_VARIABLE_NAME, self.DEFAULT_MAX_BYTES)
+        )
+        self._buffered_bytes = 0
+        self._lock = threading.Lock()
+        # The buffer is bounded by _offer() rather than by the queue, so that stop() can always add the sentinel
+        self._buffer = queue.Queue()
+        self._dropped = 0
+        self._failed = 0
+        self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+        self._thread.start()
+
+    @property
+    def sink(self):
+        """Getter for the sink reports are handed over to"""
+        return self._sink
+
+    @property
+    def name(self):
+        """Getter for the name of the sink, used in log messages"""
+        return type(self._sink).__name__
+
+    @property
+    def dropped(self):
+        """Getter for the number of reports dropped because the buffer was full"""
+        return self._dropped
+
+    @property
+    def failed(self):
+        """Getter for the number of reports the sink failed to handle"""
+        return self._failed
+
+    @property
+    def buffered_bytes(self):
+        """Getter for the estimated size in bytes of the reports waiting to be handled by the sink"""
+        return self._buffered_bytes
+
+    @property
+    def draining(self):
+        return self._thread.is_alive()
+
+    def submit(self, report_as_json, url, block):
+        size = ReportsQueue._estimated_value_size(report_as_json) if self._max_bytes > 0 else 0
+        self._offer((False, report_as_json, url, size))
+
+    def submit_report(self, report, url, block):
+        size = ReportsQueue._estimated_size(report) if self._max_bytes > 0 else 0
+        self._offer((True, report, url, size))
+
+    def _offer(self, item):
+        """Buffers a report for the sink, or drops it if the buffer is full"""
+        size = item[3]
+        with self._lock:
+            fits = self._buffer.qsize() < self._buffer_size and (
+                self._max_bytes <= 0 or self._buffered_bytes + size <= self._max_bytes
+            )
+            if fits:
+                self._buffered_bytes += size
+        if fits:
+            self._buffer.put(item)
+            return
+        self._dropped += 1
+        if self._dropped == 1:
+            logging.warning("Report sink {} is falling behind, reports are dropped".format(self.name))
+
+    def stop(self, block=None):
+        """Stops the sink once the reports buffered so far are handled
+
+        Args:
+            block (bool): True to wait until the reports are handled or the stop timeout passes, False or None to
+                return right away
+        """
+        self._buffer.put(None)
+        if block:
+            self.wait_stopped(ReportFanOut.SINK_STOP_TIMEOUT)
+
+    def wait_stopped(self, timeout):
+        """Waits until the sink handled all reports buffered and was stopped, or the timeout passes
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            bool: True if the sink was stopped, False otherwise
+        """
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logging.warning("Report sink {} did not handle {} reports in time".format(self.name, self._buffer.qsize()))
+            return False
+        return True
+
+    def _worker(self):
+        """Hands the buffered reports over to the sink, then stops it"""
+        while True:
+            item = self._buffer.get()
+            if item is None:
+                break
+            is_object, report, url, size = item
+            with self._lock:
+                self._buffered_bytes -= size
+            try:
+                if is_object:
+                    self._sink.submit_report(report=report, url=url, block=True)
+                else:
+                    self._sink.submit(report_as_json=report, url=url, block=True)
+            except Exception as e:
+                self._failed += 1
+                if self._failed == 1:
+                    logging.warning("Report sink {} failed to handle a report: {}".format(self.name, e))
+        try:
+            self._sink.stop(block=True)
+        except Exception as e:
+            logging.warning("Report sink {} failed to stop: {}".format(self.name, e))
+        if self._dropped or self._failed:
+            logging.warning(
+                "Report sink {} dropped {} reports and failed to handle {} reports".format(
+                    self.name, self._dropped, self._failed
+                )
+            )
+
+
+class ReportFanOut(ReportSink):
+    """Sends the reports of a session to a primary sink, and to secondary sinks in parallel
+
+    The primary sink, usually the reports queue sending reports to the Agent, is handed the reports by the submitting
+    thread, as it would without secondary sinks. Every secondary sink runs on its own thread behind its own bounded
+    buffer (see IsolatedReportSink), so a slow or failing secondary sink never slows down the primary sink nor the test.
+
+    Report objects are converted to JSON once, by the submitting thread, and every sink is handed the same JSON payload,
+    so that values generated when a report is converted, such as step identifiers, match in all sinks.
+
+    Secondary sinks are the ones listed by the TP_REPORTS_SINKS environment variable, 'file' to write the reports to
+    report files and 'metrics' to log the number of reports by type, and the ones created by the factories registered
+    with register().
+
+    Args:
+        primary (ReportSink): Sink the reports are handed to by the submitting thread
+        sinks (list): Secondary sinks
+
+    Attributes:
+        _primary (ReportSink): Sink the reports are handed to by the submitting thread
+        _sinks (list): Secondary sinks, each wrapped in an IsolatedReportSink
+    """
+
+    FILE_SINK = "file"
+    METRICS_SINK = "metrics"
+    TP_SINKS_VARIABLE_NAME = "TP_REPORTS_SINKS"
+
+    # Time in seconds given to the secondary sinks to handle their reports once the primary sink was stopped
+    SINK_STOP_TIMEOUT = 10
+
+    __factories = []
+    __lock = threading.Lock()
+
+    def __init__(self, primary, sinks):
+        self._primary = primary
+        self._sinks = [IsolatedReportSink(sink) for sink in sinks]
+
+    @classmethod
+    def register(cls, factory):
+        """Registers a factory creating a secondary sink for every session started from now on
+
+        Args:
+            factory (callable): Called without arguments when a session starts, returns a ReportSink
+        """
+        with cls.__lock:
+            cls.__factories.append(factory)
+
+    @classmethod
+    def unregister(cls, factory):
+        """Stops creating secondary sinks with a factory registered earlier
+
+        Args:
+            factory (callable): The factory passed to register()
+        """
+        with cls.__lock:
+            if factory in cls.__factories:
+                cls.__factories.remove(factory)
+
+    @classmethod
+    def sink_names(cls):
+        """Returns the names of the secondary sinks listed by the TP_REPORTS_SINKS environment variable"""
+        value = os.getenv(cls.TP_SINKS_VARIABLE_NAME, "")
+        return {name.strip().casefold() for name in value.split(",") if name.strip()}
+
+    @classmethod
+    def from_env(cls, primary):
+        """Adds the secondary sinks listed in the environment and created by the registered factories to a sink
+
+        Args:
+            primary (ReportSink): Sink the reports are handed to by the submitting thread
+
+        Returns:
+            ReportSink: a fan-out to the primary and the secondary sinks, the primary sink if there is no secondary sink
+        """
+        sinks = []
+        for name in sorted(cls.sink_names()):
+            if name == cls.FILE_SINK:
+                file_sink = ReportFileSink.from_env()
+                if file_sink is None:
+                    logging.warning(
+                        "Report sink '{}' requires the {} environment variable to be set.".format(
+                            name, ReportFileSink.TP_FILE_DIR_VARIABLE_NAME
+                        )
+                    )
+                    continue
+                sinks.append(file_sink)
+            elif name == cls.METRICS_SINK:
+                sinks.append(ReportMetricsSink())
+            else:
+                logging.warning(
+                    "Unknown report sink '{}' in the environment variable {}, must be one of {}.".format(
+                        name, cls.TP_SINKS_VARIABLE_NAME, ", ".join((cls.FILE_SINK, cls.METRICS_SINK))
+                    )
+                )
+        with cls.__lock:
+            factories = list(cls.__factories)
+        for factory in factories:
+            try:
+                sinks.append(factory())
+            except Exception as e:
+                logging.warning("Failed creating a report sink: {}".format(e))
+        return cls(primary, sinks) if sinks else primary
+
+    @property
+    def primary(self):
+        """Getter for the sink the reports are handed to by the submitting thread"""
+        return self._primary
+
+    @property
+    def sinks(self):
+        """Getter for the secondary sinks, each wrapped in an IsolatedReportSink"""
+        return list(self._sinks)
+
+    @property
+    def draining(self):
+        return self._primary.draining or any(sink.draining for sink in self._sinks)
+
+    def submit(self, report_as_json, url, block):
+        self._primary.submit(report_as_json=report_as_json, url=url, block=block)
+        for sink in self._sinks:
+            sink.submit(report_as_json=report_as_json, url=url, block=False)
+
+    def submit_report(self, report, url, block):
+        self.submit(report_as_json=report.to_json(), url=url, block=block)
+
+    def stop(self, block=None):
+        """Stops the primary sink, then the secondary sinks once they handled their reports
+
+        Args:
+            block (bool): True to wait until the reports are handled or the stop timeouts pass, False to return right
+                away and keep handling the reports in the background, taken from the environment if not provided
+        """
+        if block is None:
+            block = not ConfigHelper.get_bool_from_env(ReportsQueue.TP_NONBLOCKING_STOP_VARIABLE_NAME, False)
+        # Secondary sinks are told to stop first, so that they keep handling their reports while the primary stops
+        for sink in self._sinks:
+            sink.stop(block=False)
+        self._primary.stop(block=block)
+        if not block:
+            for sink in self._sinks:
+                # Secondary sinks are flushed before the process exits, the next sessions do not wait for them
+                BackgroundFlush.register(sink, ordered=False)
+            return
+        deadline = time.monotonic() + self.SINK_STOP_TIMEOUT
+        for sink in self._sinks:
+            sink.wait_stopped(max(deadline - time.monotonic(), 0))
@@ -0,0 +1,238 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import logging
+import os
+import threading
+import time
+import uuid
+
+from src.testproject.helpers import ConfigHelper
+from src.testproject.sdk.internal.agent.file_lock import try_lock
+from src.testproject.sdk.internal.agent.json_serializer import JsonSerializer
+from src.testproject.sdk.internal.agent.report_sink import ReportSink
+
+
+class ReportFileSink(ReportSink):
+    """Writes reports to rotating NDJSON files instead of sending them to the Agent
+
+    Every line of a report file holds the JSON payload of a single report, as it would have been sent to the Agent.
+    A file is written with a '.part' suffix, which is removed once the file is complete, when it reached its maximum
+    size or the sink is closed. The file being written is locked, so that the files a process left incomplete when it
+    stopped can be told apart. Complete and left files can be sent to an Agent later on, using the
+    testproject-upload-report-files command.
+
+    Args:
+        directory (str): Directory the report files are written to
+        max_file_bytes (int): Size in bytes of the reports after which a new file is started
+        compression (str): 'gzip' to compress the files, None to write them as they are
+
+    Attributes:
+        _directory (str): Directory the report files are written to
+        _max_file_bytes (int): Size in bytes of the reports after which a new file is started
+        _compression (str): 'gzip' if the files are compressed, None otherwise
+        _prefix (str): Name shared by the files of this sink, unique across processes
+        _lock (threading.Lock): Lock serializing writes to the current file
+        _file: File reports are currently written to
+        _locked_file (file): Underlying file reports are currently written to, locked until it is complete
+        _file_index (int): Number of the file reports are currently written to
+        _file_bytes (int): Size in bytes of the reports written to the current file
+        _files (list): Paths of the complete files written by this sink
+    """
+
+    GZIP = "gzip"
+    DEFAULT_MAX_FILE_BYTES = 64 * 1024 * 1024
+    FILE_EXTENSION = ".ndjson"
+    PART_SUFFIX = ".part"
+    # Files being written are only locked once created, so files that were just created are never taken for left ones
+    PART_FILE_GRACE_SECONDS = 5
+
+    TP_FILE_DIR_VARIABLE_NAME = "TP_REPORTS_FILE_DIR"
+    TP_FILE_MAX_BYTES_VARIABLE_NAME = "TP_REPORTS_FILE_MAX_BYTES"
+    TP_FILE_COMPRESSION_VARIABLE_NAME = "TP_REPORTS_FILE_COMPRESSION"
+
+    def __init__(self, directory, max_file_bytes=None, compression=None):
+        if compression not in (None, self.GZIP):
+            raise ValueError("Unsupported report file compression '{}', must be {}".format(compression, self.GZIP))
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._max_file_bytes = (
+            max_file_bytes
+            if max_file_bytes is not None
+            else ConfigHelper.get_int_from_env(self.TP_FILE_MAX_BYTES_VARIABLE_NAME, self.DEFAULT_MAX_FILE_BYTES)
+        )
+        self._compression = compression
+        self._prefix = "reports-{}-{}".format(os.getpid(), uuid.uuid4().hex)
+        self._lock = threading.Lock()
+        self._file = None
+        self._locked_file = None
+        self._file_index = -1
+        self._file_bytes = 0
+        self._files = []
+
+    @classmethod
+    def from_env(cls):
+        """Creates a sink writing to the directory defined by the TP_REPORTS_FILE_DIR environment variable
+
+        Returns:
+            ReportFileSink: the sink, None if the environment variable is not defined
+        """
+        directory = os.getenv(cls.TP_FILE_DIR_VARIABLE_NAME)
+        if not directory:
+            return None
+        compression = os.getenv(cls.TP_FILE_COMPRESSION_VARIABLE_NAME)
+        if compression and compression.casefold() != cls.GZIP:
+            logging.warning(
+                "The environment variable {} value must be {}, report files will not be compressed.".format(
+                    cls.TP_FILE_COMPRESSION_VARIABLE_NAME, cls.GZIP
+                )
+            )
+            compression = None
+        return cls(directory, compression=compression.casefold() if compression else None)
+
+    @property
+    def directory(self):
+        """Getter for the directory the report files are written to"""
+        return self._directory
+
+    @property
+    def files(self):
+        """Getter for the paths of the complete files written by this sink"""
+        return list(self._files)
+
+    def write(self, report):
+        """Appends a report to the current file, starting a new file if it is full
+
+        Args:
+            report (bytes): Report serialized to JSON
+        """
+        with self._lock:
+            if self._file is None or self._file_bytes >= self._max_file_bytes:
+                self.__start_file()
+            self._file.write(report)
+            self._file.write(b"\n")
+            self._file_bytes += len(report) + 1
+
+    def submit(self, report_as_json, url, block):
+        self.write(JsonSerializer.instance().dumps(report_as_json))
+
+    def stop(self, block=None):
+        self.close()
+
+    def flush(self):
+        """Flushes the reports written so far to the current file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Completes the current file"""
+        with self._lock:
+            self.__complete_file()
+
+    def __start_file(self):
+        self.__complete_file()
+        self._file_index += 1
+        path = self.__path(self._file_index) + self.PART_SUFFIX
+        self._locked_file = open(path, "wb")
+        try_lock(self._locked_file)
+        self._file = (
+            gzip.GzipFile(fileobj=self._locked_file, mode="wb") if self._compression == self.GZIP else self._locked_file
+        )
+        self._file_bytes = 0
+
+    def __complete_file(self):
+        if self._file is None:
+            return
+        self._file.close()
+        # Closing a compressed file leaves the underlying file open
+        self._locked_file.close()
+        self._file = None
+        self._locked_file = None
+        path = self.__path(self._file_index)
+        os.replace(path + self.PART_SUFFIX, path)
+        self._files.append(path)
+
+    def __path(self, index):
+        extension = self.FILE_EXTENSION + (".gz" if self._compression == self.GZIP else "")
+        return os.path.join(self._directory, "{}-{:06d}{}".format(self._prefix, index, extension))
+
+    @classmethod
+    def complete_files(cls, directory):
+        """Returns the complete report files of a directory, oldest first
+
+        Files left with a '.part' suffix by a process that stopped before completing them are returned as well, as
+        their writer is gone. They are told apart from the files still being written by their lock.
+
+        Args:
+            directory (str): Directory holding report files
+
+        Returns:
+            list: paths of the complete report files
+        """
+        if not os.path.isdir(directory):
+            return []
+        sinks = {}
+        for name in os.listdir(directory):
+            report_name = name[: -len(cls.PART_SUFFIX)] if name.endswith(cls.PART_SUFFIX) else name
+            if report_name != name and not cls.__is_left(os.path.join(directory, name)):
+                continue
+            if report_name.endswith(cls.FILE_EXTENSION) or report_name.endswith(cls.FILE_EXTENSION + ".gz"):
+                # Files of the same sink share a prefix and are numbered in the order they were written
+                sinks.setdefault(name.rsplit("-", 1)[0], []).append(os.path.join(directory, name))
+        # Files of a sink are kept together, so the reports of a test are never mixed with those of another process
+        paths = []
+        for files in sorted(sinks.values(), key=lambda files: min(os.path.getmtime(path) for path in files)):
+            paths.extend(sorted(files))
+        return paths
+
+    @classmethod
+    def __is_left(cls, path):
+        """Returns True if the writer of a '.part' file is gone, the file is not locked and was not just created"""
+        try:
+            if time.time() - os.path.getmtime(path) < cls.PART_FILE_GRACE_SECONDS:
+                return False
+            with open(path, "rb") as part_file:
+                return try_lock(part_file)
+        except OSError:
+            # The file was completed or removed meanwhile
+            return False
+
+    @classmethod
+    def read(cls, path):
+        """Yields the reports of a report file one by one, without loading the whole file in memory
+
+        The last report of a file left incomplete by a process that stopped is skipped if it was only partially
+        written.
+
+        Args:
+            path (str): Path of the report file
+
+        Yields:
+            bytes: Report serialized to JSON
+        """
+        compressed = path.endswith(".gz") or path.endswith(".gz" + cls.PART_SUFFIX)
+        with gzip.open(path, "rb") if compressed else open(path, "rb") as report_file:
+            try:
+                for line in report_file:
+                    if not line.endswith(b"\n"):
+                        # Every report is followed by a new line, this one was cut short
+                        break
+                    line = line.strip()
+                    if line:
+                        yield line
+            except EOFError:
+                # Compressed file left incomplete, the reports read so far are all there is
+                pass
@@ -0,0 +1,108 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from src.testproject.sdk.internal.agent.json_serializer import JsonSerializer
+from src.testproject.sdk.internal.agent.report_file_sink import ReportFileSink
+from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+
+
+def main(args=None):
+    """Sends the reports written to report files to the Agent, then deletes the files
+
+    The reports are sent through a Generic driver session, and added to the report of its project and job. Files
+    still being written (with a '.part' suffix) are left alone, but those left incomplete by a process that stopped are
+    sent up to their last full report. Files are sent one at a time, and each file is deleted as soon as the Agent
+    accepted all of its reports, so that a failed upload only sends the files left again.
+
+    Args:
+        args (list): Command line arguments, taken from sys.argv if not provided
+
+    Returns:
+        int: the process exit code
+    """
+    parser = argparse.ArgumentParser(description="Send the TestProject reports written to report files to the Agent.")
+    parser.add_argument(
+        "--reports-dir",
+        default=os.getenv(ReportFileSink.TP_FILE_DIR_VARIABLE_NAME),
+        help="directory holding the report files (defaults to TP_REPORTS_FILE_DIR)",
+    )
+    parser.add_argument("--token", help="developer token (defaults to TP_DEV_TOKEN)")
+    parser.add_argument("--agent-url", help="Agent address (defaults to TP_AGENT_URL)")
+    parser.add_argument("--project-name", help="project to add the reports to")
+    parser.add_argument("--job-name", help="job to add the reports to")
+    parser.add_argument("--keep", action="store_true", help="keep the report files once they were sent")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="maximum time in seconds to wait for the Agent to accept the reports (defaults to no limit)",
+    )
+    arguments = parser.parse_args(args)
+
+    if not arguments.reports_dir:
+        parser.error("the reports directory must be set using --reports-dir or TP_REPORTS_FILE_DIR")
+    paths = ReportFileSink.complete_files(arguments.reports_dir)
+    if not paths:
+        logging.info("No report files found in {}, there is nothing to send".format(arguments.reports_dir))
+        return 0
+
+    # Reports are sent to the Agent rather than written to report files again, and quitting waits until they are
+    os.environ.pop(ReportFileSink.TP_FILE_DIR_VARIABLE_NAME, None)
+    os.environ[ReportsQueue.TP_NONBLOCKING_STOP_VARIABLE_NAME] = "false"
+    from src.testproject.sdk.drivers.webdriver.generic import Generic
+
+    driver = Generic(
+        token=arguments.token,
+        agent_url=arguments.agent_url,
+        project_name=arguments.project_name,
+        job_name=arguments.job_name,
+    )
+    agent_client = driver.command_executor.agent_client
+    reports_queue = agent_client.agent_reports_queue
+    deadline = time.monotonic() + arguments.timeout if arguments.timeout is not None else None
+    sent = 0
+    uploaded = 0
+    for path in paths:
+        failed = reports_queue.failed_reports
+        # Reports are read one at a time, the reports queue memory budget holds the file back while the Agent catches up
+        for report in ReportFileSink.read(path):
+            agent_client.report_json(JsonSerializer.loads(report))
+            sent += 1
+        # The file is only deleted once the Agent accepted all of its reports, rather than when the session ends
+        timeout = max(deadline - time.monotonic(), 0) if deadline is not None else None
+        if not reports_queue.wait_sent(timeout) or reports_queue.failed_reports > failed:
+            break
+        uploaded += 1
+        if not arguments.keep:
+            os.remove(path)
+    driver.quit()
+
+    if uploaded < len(paths):
+        logging.error(
+            "Not all reports were sent to the Agent, {} report files are kept in {}".format(
+                len(paths) - uploaded, arguments.reports_dir
+            )
+        )
+        return 1
+    logging.info("Sent {} reports from {} report files".format(sent, len(paths)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import heapq
+import itertools
+import math
+import queue
+import threading
+import time
+from enum import IntEnum
+
+from src.testproject.rest.messages.customtestreport import CustomTestReport
+from src.testproject.rest.messages.drivercommandreport import DriverCommandReport
+from src.testproject.rest.messages.reportitemtype import ReportItemType
+
+
+class ReportLane(IntEnum):
+    """Priority of a report in the reports queue, from the highest to the lowest"""
+
+    Test = 0
+    Step = 1
+    FailedCommand = 2
+    PassedCommand = 3
+
+    @classmethod
+    def of_report(cls, report):
+        """Returns the lane of a report object
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object
+
+        Returns:
+            ReportLane: the lane of the report
+        """
+        if isinstance(report, CustomTestReport):
+            return cls.Test
+        if isinstance(report, DriverCommandReport):
+            return cls.PassedCommand if report.passed else cls.FailedCommand
+        return cls.Step
+
+    @classmethod
+    def of_json(cls, report_as_json):
+        """Returns the lane of a report, reports of unknown types are given the priority of steps
+
+        Args:
+            report_as_json (dict): JSON payload representing the report
+
+        Returns:
+            ReportLane: the lane of the report
+        """
+        report_type = report_as_json.get("type") if isinstance(report_as_json, dict) else None
+        if report_type == ReportItemType.Test.value:
+            return cls.Test
+        if report_type == ReportItemType.Command.value:
+            return cls.PassedCommand if report_as_json.get("passed") else cls.FailedCommand
+        return cls.Step
+
+    @property
+    def droppable(self):
+        """True if reports of this lane may be dropped to make room for reports of a higher lane"""
+        return self in (ReportLane.FailedCommand, ReportLane.PassedCommand)
+
+
+class ReportLanes:
+    """Queue handing reports over to the reporting thread in the order they were submitted, grouped by priority lane
+
+    Reports are always taken in submission order, since the Agent builds the timeline of a test from the order reports
+    arrive in and attributes them to the test being reported when they arrive. Lanes are used to shed load: reports
+    of the lower lanes can be evicted from the queue, oldest first, to make room for other reports or to speed up
+    stopping the queue.
+
+    Attributes:
+        _heap (list): Items waiting to be taken, ordered by sequence, the empty item put on stop() last
+        _lanes (dict): Items waiting to be taken in each lane, oldest first, used to evict them
+        _size (int): Number of items waiting to be taken
+        _counter (itertools.count): Breaks ties between items of equal priority
+        _not_empty (threading.Condition): Condition notified every time an item is put in the queue
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._lanes = {lane: collections.deque() for lane in ReportLane}
+        self._size = 0
+        self._counter = itertools.count()
+        self._not_empty = threading.Condition()
+
+    def put(self, item, block=True):
+        """Puts an item in the queue, which is never full
+
+        Args:
+            item (QueueItem): The item to put in the queue, an item without sequence number is taken last
+            block (bool): Ignored, the queue has no maximum size
+        """
+        with self._not_empty:
+            heapq.heappush(self._heap, (self._priority(item), next(self._counter), item))
+            if item.sequence is not None:
+                self._lanes[item.lane].append(item)
+            self._size += 1
+            self._not_empty.notify()
+
+    def get(self, timeout=None):
+        """Takes the oldest item off the queue
+
+        Args:
+            timeout (float): Maximum time to wait for an item in seconds, None to wait until one is available
+
+        Returns:
+            QueueItem: the oldest item
+
+        Raises:
+            queue.Empty: if no item was available within the timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._not_empty:
+            while True:
+                while self._size == 0:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+                _, _, item = heapq.heappop(self._heap)
+                if item.evicted:
+                    # Evicted items were already removed from their lane and the size
+                    continue
+                if item.sequence is not None:
+                    self._lanes[item.lane].popleft()
+                self._size -= 1
+                return item
+
+    def evict(self, lane):
+        """Evicts the oldest item of a lane from the queue
+
+        Args:
+            lane (ReportLane): The lane to evict an item from
+
+        Returns:
+            QueueItem: the evicted item, None if the lane is empty
+        """
+        with self._not_empty:
+            if not self._lanes[lane]:
+                return None
+            item = self._lanes[lane].popleft()
+            item.evicted = True
+            self._size -= 1
+            return item
+
+    def qsize(self):
+        """Returns the number of items waiting to be taken"""
+        with self._not_empty:
+            return self._size
+
+    def lane_size(self, lane):
+        """Returns the number of items of a lane waiting to be taken"""
+        with self._not_empty:
+            return len(self._lanes[lane])
+
+    @staticmethod
+    def _priority(item):
+        """Returns the key items are taken by, lowest first"""
+        if item.sequence is None:
+            # Empty item put in the queue on stop(), taken once all reports were taken
+            return math.inf
+        return item.sequence
@@ -0,0 +1,76 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import threading
+
+from src.testproject.rest.messages.reportitemtype import ReportItemType
+from src.testproject.sdk.internal.agent.report_sink import ReportSink
+
+
+class ReportMetricsSink(ReportSink):
+    """Report sink counting the reports of a session by type and outcome, logged when the session ends
+
+    Attributes:
+        _counts (collections.Counter): Number of reports by type and outcome
+        _commands (collections.Counter): Number of driver command reports by command name
+        _lock (threading.Lock): Lock guarding the counters
+    """
+
+    def __init__(self):
+        self._counts = collections.Counter()
+        self._commands = collections.Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def counts(self):
+        """Getter for the number of reports by (type, passed) pair"""
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def commands(self):
+        """Getter for the number of driver command reports by command name"""
+        with self._lock:
+            return dict(self._commands)
+
+    def submit(self, report_as_json, url, block):
+        report_type = report_as_json.get("type")
+        with self._lock:
+            self._counts[(report_type, bool(report_as_json.get("passed", True)))] += 1
+            if report_type == ReportItemType.Command.value:
+                self._commands[report_as_json.get("commandName")] += 1
+
+    def stop(self, block=None):
+        counts = self.counts
+        logging.info(
+            "Reported {} tests ({} failed), {} steps ({} failed) and {} driver commands ({} failed)".format(
+                *(
+                    count
+                    for report_type in (ReportItemType.Test, ReportItemType.Step, ReportItemType.Command)
+                    for count in (
+                        counts.get((report_type.value, True), 0) + counts.get((report_type.value, False), 0),
+                        counts.get((report_type.value, False), 0),
+                    )
+                )
+            )
+        )
+        most_common = self._commands.most_common(5)
+        if most_common:
+            logging.info(
+                "Most reported driver commands: {}".format(
+                    ", ".join("{} ({})".format(command, count) for command, count in most_common)
+                )
+            )
@@ -0,0 +1,166 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import threading
+import time
+
+
+class ReportSender:
+    """Runs the tasks sending reports to the Agent on a pool of worker threads
+
+    Tasks are submitted in report order by a single thread, each with the key of the test its reports belong to. Tasks
+    sharing a key are run one at a time, in the order they were submitted, since the Agent builds the timeline of a
+    test from the order its reports arrive in. Tasks with different keys are run concurrently, up to the number of
+    workers. A fence task (one that sends a test report) is only started once every task submitted before it has
+    completed, and no task submitted after it is started before it has completed. This guarantees that all command
+    and step reports of a test reach the Agent in order and before the test report, and that none of the reports of
+    the next test reach the Agent before it.
+
+    As the reports of a session belong to one test at a time, they are sent one at a time; the workers let the
+    submitting thread prepare the next reports while the previous ones are being sent.
+
+    With a single worker, tasks are run one by one on the submitting thread, in the order they were submitted.
+
+    Args:
+        workers (int): Number of tasks that can be run at the same time
+
+    Attributes:
+        _workers (int): Number of tasks that can be run at the same time
+        _in_flight (int): Number of tasks submitted that have not completed yet
+        _condition (threading.Condition): Condition notified every time a task is submitted or completes
+        _pending (collections.deque): Keys and tasks waiting to be picked up by a worker thread, in submission order
+        _running_keys (set): Keys of the tasks being run by the worker threads
+        _stopping (bool): True once the worker threads should stop after running the pending tasks
+        _threads (list): Worker threads, none with a single worker
+    """
+
+    def __init__(self, workers):
+        self._workers = max(workers, 1)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._pending = collections.deque()
+        self._running_keys = set()
+        self._stopping = False
+        self._threads = []
+        if self._workers > 1:
+            for _ in range(self._workers):
+                thread = threading.Thread(target=self._worker, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    @property
+    def workers(self):
+        """Getter for the number of tasks that can be run at the same time"""
+        return self._workers
+
+    @property
+    def in_flight(self):
+        """Getter for the number of tasks submitted that have not completed yet"""
+        return self._in_flight
+
+    def submit(self, task, fence=False, key=None):
+        """Runs a task, or hands it to a worker thread as soon as one is available
+
+        Args:
+            task (callable): Function sending reports to the Agent
+            fence (bool): True if the task must not run concurrently with tasks submitted before or after it
+            key (object): Key of the test the reports belong to, tasks sharing a key are run one at a time in order,
+                None for a task that can run concurrently with any other task
+        """
+        if self._workers == 1:
+            self._run(task)
+            return
+
+        with self._condition:
+            if fence:
+                # Wait until everything submitted before the fence has been sent
+                self._condition.wait_for(lambda: self._in_flight == 0)
+            else:
+                self._condition.wait_for(lambda: self._in_flight < self._workers)
+            self._in_flight += 1
+            if not fence:
+                self._pending.append((key, task))
+                self._condition.notify_all()
+
+        if fence:
+            # Run the fence on the submitting thread, so nothing submitted after it can start before it completes
+            self._run(task)
+            self._task_done(None)
+
+    def wait(self, timeout=None):
+        """Waits until all submitted tasks have completed
+
+        Args:
+            timeout (float): Maximum time to wait in seconds, None to wait until all tasks have completed
+
+        Returns:
+            bool: True if all tasks have completed, False if the timeout passed first
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def shutdown(self):
+        """Stops the worker threads once the tasks submitted so far have completed"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _worker(self):
+        """Worker method running the tasks handed over by submit(), until shutdown() is called"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._runnable() is not None or (self._stopping and not self._pending))
+                index = self._runnable()
+                if index is None:
+                    return
+                key, task = self._pending[index]
+                del self._pending[index]
+                if key is not None:
+                    self._running_keys.add(key)
+            self._run(task)
+            self._task_done(key)
+
+    def _runnable(self):
+        """Returns the index of the first pending task whose key is not being run by another worker, None if none is
+
+        The caller holds the condition.
+        """
+        # A task never overtakes an earlier task with the same key
+        blocked = set(self._running_keys)
+        for index, (key, _) in enumerate(self._pending):
+            if key is None or key not in blocked:
+                return index
+            blocked.add(key)
+        return None
+
+    def _task_done(self, key):
+        with self._condition:
+            self._running_keys.discard(key)
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @staticmethod
+    def _run(task):
+        """Runs a task, making sure a failing task does not stop the reporting thread"""
+        start = time.monotonic()
+        try:
+            task()
+        except Exception as e:
+            logging.error("Unexpected error occurred while sending reports to the Agent: {}".format(e))
+        logging.debug("Sending reports took {:.0f} ms".format((time.monotonic() - start) * 1000))
@@ -0,0 +1,55 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class ReportSink:
+    """Destination of the reports of a session, such as the Agent, report files or an in-memory collector
+
+    Report objects are submitted as they are and are not modified once submitted, a sink converts them to JSON when
+    it needs to. A sink that is given more than one thread must make sure its methods can be called concurrently.
+    """
+
+    def submit(self, report_as_json, url, block):
+        """Submits a report already converted to JSON
+
+        Args:
+            report_as_json (dict): JSON payload representing the report
+            url (str): Agent endpoint the payload should be POSTed to
+            block (bool): True to wait for a free slot if the sink is full
+        """
+        raise NotImplementedError
+
+    def submit_report(self, report, url, block):
+        """Submits a report object
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object, not modified once submitted
+            url (str): Agent endpoint the payload should be POSTed to
+            block (bool): True to wait for a free slot if the sink is full
+        """
+        self.submit(report.to_json(), url, block)
+
+    def stop(self, block=None):
+        """Stops the sink once the reports submitted so far are handled
+
+        Args:
+            block (bool): True to wait until the reports are handled, False to return right away, None for the
+                default behaviour of the sink
+        """
+        pass
+
+    @property
+    def draining(self):
+        """Getter for the flag telling whether the sink is still handling reports after it was stopped"""
+        return False
@@ -0,0 +1,66 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import threading
+
+
+class ReportSpillFile:
+    """Temporary file holding the reports that did not fit in the reports queue memory budget
+
+    Reports are appended to the file as they are submitted and read back by the reporting thread. The file is
+    deleted when it is closed.
+
+    Attributes:
+        _file: Temporary file the reports are written to
+        _lock (threading.Lock): Lock serializing access to the file position
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="testproject-reports-")
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        """Appends a report to the file
+
+        Args:
+            data (bytes): Report serialized to JSON
+
+        Returns:
+            tuple: offset and length in bytes of the report in the file
+        """
+        with self._lock:
+            self._file.seek(0, 2)
+            offset = self._file.tell()
+            self._file.write(data)
+        return offset, len(data)
+
+    def read(self, offset, length):
+        """Reads a report back from the file
+
+        Args:
+            offset (int): Position of the report in the file
+            length (int): Length in bytes of the report
+
+        Returns:
+            bytes: Report serialized to JSON
+        """
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def close(self):
+        """Closes and deletes the file"""
+        with self._lock:
+            self._file.close()
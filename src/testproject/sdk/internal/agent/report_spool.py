@@ -0,0 +1,289 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+from src.testproject.helpers import ConfigHelper
+from src.testproject.rest.messages.reportitemtype import ReportItemType
+from src.testproject.sdk.internal.agent.file_lock import try_lock
+
+
+class ReportSpool:
+    """Append-only, on-disk log of the reports submitted during a session, kept until the Agent acknowledged them
+
+    Every submitted report is appended to the current segment file before it is queued. When a report (or the
+    batch holding it) is acknowledged by the Agent, its sequence numbers are appended to the acknowledgement file of
+    its segment, and a segment is deleted as soon as all of its reports were acknowledged.
+
+    Each spool lives in its own directory, locked for as long as the spool is open. A directory that can be locked
+    belongs to a process that stopped before all of its reports were sent, and is replayed by the next session.
+
+    Args:
+        directory (str): Directory holding the spools of all processes
+        segment_bytes (int): Size in bytes after which a new segment file is started
+        fsync (str): When data is forced to disk: after every report (always), when a segment is closed (segment)
+            or when the operating system decides to (never)
+
+    Attributes:
+        _path (str): Directory of this spool
+        _segment_bytes (int): Size in bytes after which a new segment file is started
+        _fsync (str): When data is forced to disk
+        _pending (dict): Sequence numbers not acknowledged yet, by segment index
+        _segment (file): Segment file reports are currently appended to
+    """
+
+    DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+    FSYNC_ALWAYS = "always"
+    FSYNC_SEGMENT = "segment"
+    FSYNC_NEVER = "never"
+    FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_SEGMENT, FSYNC_NEVER)
+
+    TP_SPOOL_DIR_VARIABLE_NAME = "TP_REPORTS_SPOOL_DIR"
+    TP_SPOOL_SEGMENT_BYTES_VARIABLE_NAME = "TP_REPORTS_SPOOL_SEGMENT_BYTES"
+    TP_SPOOL_FSYNC_VARIABLE_NAME = "TP_REPORTS_SPOOL_FSYNC"
+
+    LOCK_FILE_NAME = "lock"
+    SEGMENT_FILE_FORMAT = "segment-{:06d}.jsonl"
+    ACK_FILE_FORMAT = "segment-{:06d}.ack"
+
+    INTERRUPTED_TEST_NAME = "Interrupted test"
+
+    def __init__(self, directory, segment_bytes=None, fsync=None):
+        self._path = os.path.join(directory, "{}-{}".format(os.getpid(), uuid.uuid4().hex))
+        os.makedirs(self._path)
+        self._segment_bytes = (
+            segment_bytes
+            if segment_bytes is not None
+            else ConfigHelper.get_int_from_env(self.TP_SPOOL_SEGMENT_BYTES_VARIABLE_NAME, self.DEFAULT_SEGMENT_BYTES)
+        )
+        self._fsync = fsync if fsync is not None else os.getenv(self.TP_SPOOL_FSYNC_VARIABLE_NAME, self.FSYNC_SEGMENT)
+        if self._fsync not in self.FSYNC_POLICIES:
+            logging.warning(
+                "The environment variable {} value must be one of {}.".format(
+                    self.TP_SPOOL_FSYNC_VARIABLE_NAME, ", ".join(self.FSYNC_POLICIES)
+                )
+            )
+            self._fsync = self.FSYNC_SEGMENT
+        self._lock = threading.Lock()
+        self._lock_file = open(os.path.join(self._path, self.LOCK_FILE_NAME), "w")
+        try_lock(self._lock_file)
+        self._pending = {}
+        self._ack_files = {}
+        self._segment = None
+        self._segment_index = -1
+        self._segment_size = 0
+
+    @classmethod
+    def from_env(cls):
+        """Creates a spool in the directory defined by the TP_REPORTS_SPOOL_DIR environment variable
+
+        Returns:
+            ReportSpool: the spool, None if the environment variable is not defined
+        """
+        directory = os.getenv(cls.TP_SPOOL_DIR_VARIABLE_NAME)
+        if not directory:
+            return None
+        return cls(directory)
+
+    @property
+    def path(self):
+        """Getter for the directory of this spool"""
+        return self._path
+
+    @property
+    def directory(self):
+        """Getter for the directory holding the spools of all processes"""
+        return os.path.dirname(self._path)
+
+    def append(self, sequence, endpoint, report):
+        """Appends a report to the spool
+
+        Args:
+            sequence (int): Sequence number of the report in the session
+            endpoint (str): Agent endpoint path the report is posted to when not sent in a batch
+            report (bytes): Report serialized to JSON
+        """
+        # The report is written as it was serialized for sending, rather than serialized again
+        line = b"".join(
+            [
+                json.dumps({"sequence": sequence, "endpoint": endpoint}).encode("utf-8")[:-1],
+                b', "report": ',
+                report,
+                b"}\n",
+            ]
+        )
+        with self._lock:
+            if self._segment is None or self._segment_size >= self._segment_bytes:
+                self.__start_segment()
+            self._segment.write(line)
+            # Flushing makes the report survive the process, fsync makes it survive the operating system
+            self._segment.flush()
+            if self._fsync == self.FSYNC_ALWAYS:
+                os.fsync(self._segment.fileno())
+            self._segment_size += len(line)
+            self._pending[self._segment_index].add(sequence)
+
+    def acknowledge(self, first_sequence, last_sequence):
+        """Records that the Agent accepted the reports with the given sequence numbers
+
+        Args:
+            first_sequence (int): Sequence number of the first report acknowledged
+            last_sequence (int): Sequence number of the last report acknowledged
+        """
+        acknowledged = range(first_sequence, last_sequence + 1)
+        with self._lock:
+            for index, pending in list(self._pending.items()):
+                if pending.isdisjoint(acknowledged):
+                    continue
+                pending.difference_update(acknowledged)
+                if not pending and index != self._segment_index:
+                    self.__delete_segment(index)
+                    continue
+                ack_file = self._ack_files[index]
+                ack_file.write("{} {}\n".format(first_sequence, last_sequence).encode("utf-8"))
+                ack_file.flush()
+
+    def close(self):
+        """Closes the spool, deleting it if all of its reports were acknowledged"""
+        with self._lock:
+            if self._segment is not None:
+                if self._fsync != self.FSYNC_NEVER:
+                    os.fsync(self._segment.fileno())
+                self._segment.close()
+            for ack_file in self._ack_files.values():
+                ack_file.close()
+            unacknowledged = sum(len(pending) for pending in self._pending.values())
+            self._lock_file.close()
+            if unacknowledged == 0:
+                shutil.rmtree(self._path, ignore_errors=True)
+            else:
+                logging.warning(
+                    "{} reports were not acknowledged by the Agent, they are kept in {} and will be sent by the next"
+                    " session".format(unacknowledged, self._path)
+                )
+
+    def __start_segment(self):
+        if self._segment is not None:
+            if self._fsync != self.FSYNC_NEVER:
+                os.fsync(self._segment.fileno())
+            self._segment.close()
+            if not self._pending[self._segment_index]:
+                self.__delete_segment(self._segment_index)
+        self._segment_index += 1
+        self._segment = open(os.path.join(self._path, self.SEGMENT_FILE_FORMAT.format(self._segment_index)), "ab")
+        self._ack_files[self._segment_index] = open(
+            os.path.join(self._path, self.ACK_FILE_FORMAT.format(self._segment_index)), "ab"
+        )
+        self._segment_size = 0
+        self._pending[self._segment_index] = set()
+
+    def __delete_segment(self, index):
+        del self._pending[index]
+        self._ack_files.pop(index).close()
+        for file_format in (self.SEGMENT_FILE_FORMAT, self.ACK_FILE_FORMAT):
+            os.remove(os.path.join(self._path, file_format.format(index)))
+
+    @classmethod
+    def replay(cls, directory, submit, test_endpoint):
+        """Submits the reports left unacknowledged by processes that stopped, then deletes their spools
+
+        A test that was still running when its process stopped is closed by a failed test report, so that its
+        reports are not attributed to the first test of the replaying session. The spools are only deleted once
+        submit returned, so the reports are not lost if the replaying process stops before it spooled them again.
+
+        Args:
+            directory (str): Directory holding the spools of all processes
+            submit (callable): Function called once with the endpoint path and the report of every report to replay,
+                as a list of pairs in the order the reports were submitted
+            test_endpoint (str): Agent endpoint path of test reports
+
+        Returns:
+            int: number of reports replayed
+        """
+        if not os.path.isdir(directory):
+            return 0
+        reports = []
+        replayed = []
+        spools = [os.path.join(directory, name) for name in os.listdir(directory)]
+        for path in sorted(filter(os.path.isdir, spools), key=os.path.getmtime):
+            try:
+                lock_file = open(os.path.join(path, cls.LOCK_FILE_NAME), "a")
+            except OSError:
+                continue
+            if not try_lock(lock_file):
+                # The process owning the spool is still running
+                lock_file.close()
+                continue
+            # The spool stays locked until it is deleted, so it is not replayed by another process meanwhile
+            replayed.append((path, lock_file))
+            spool_reports = cls.__read_unacknowledged(path)
+            reports.extend(spool_reports)
+            if spool_reports and spool_reports[-1][1].get("type") != ReportItemType.Test.value:
+                reports.append(
+                    (
+                        test_endpoint,
+                        {
+                            "name": cls.INTERRUPTED_TEST_NAME,
+                            "passed": False,
+                            "message": "The test was interrupted before its reports were sent to the Agent",
+                            "type": ReportItemType.Test.value,
+                        },
+                    )
+                )
+        try:
+            if reports:
+                submit(reports)
+        finally:
+            for _, lock_file in replayed:
+                lock_file.close()
+        for path, _ in replayed:
+            shutil.rmtree(path, ignore_errors=True)
+        if reports:
+            logging.info("Replayed {} reports left unsent by previous sessions".format(len(reports)))
+        return len(reports)
+
+    @classmethod
+    def __read_unacknowledged(cls, path):
+        """Returns the endpoint and payload of the reports of a spool that were not acknowledged, in order
+
+        Reports are ordered by sequence number rather than by their position in the spool, as the reports replayed
+        by a session are numbered before its own reports, but spooled after the ones submitted meanwhile.
+        """
+        records = []
+        # Zero padded segment numbers keep the file names in segment order
+        for segment_name in sorted(name for name in os.listdir(path) if name.endswith(".jsonl")):
+            acknowledged = []
+            ack_path = os.path.join(path, os.path.splitext(segment_name)[0] + ".ack")
+            if os.path.exists(ack_path):
+                with open(ack_path, "rb") as ack_file:
+                    for line in ack_file:
+                        bounds = line.split()
+                        if len(bounds) == 2:
+                            acknowledged.append((int(bounds[0]), int(bounds[1])))
+            with open(os.path.join(path, segment_name), "rb") as segment:
+                for line in segment:
+                    try:
+                        record = json.loads(line.decode("utf-8"))
+                    except ValueError:
+                        # Last record was only partially written when the process stopped
+                        break
+                    if any(first <= record["sequence"] <= last for first, last in acknowledged):
+                        continue
+                    records.append(record)
+        records.sort(key=lambda record: record["sequence"])
+        return [(record["endpoint"], record["report"]) for record in records]
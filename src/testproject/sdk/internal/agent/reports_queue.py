@@ -12,36 +12,441 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
 import logging
+import os
 import queue
 import threading
+import time
 from typing import Optional
+from urllib.parse import urlparse
 
 import requests
 from requests import HTTPError
 
+from src.testproject.enums import QueueOverflowPolicy
+from src.testproject.helpers import ConfigHelper
+from src.testproject.helpers.screenshot_helper import ProcessedScreenshot
+from src.testproject.rest.messages.customtestreport import CustomTestReport
+from src.testproject.rest.messages.reportitemtype import ReportItemType
+from src.testproject.sdk.internal.agent.background_flush import BackgroundFlush
+from src.testproject.sdk.internal.agent.circuit_breaker import CircuitBreaker
+from src.testproject.sdk.internal.agent.http_transport import HttpTransport
+from src.testproject.sdk.internal.agent.json_serializer import JsonSerializer
+from src.testproject.sdk.internal.agent.payload_compression import PayloadCompression
+from src.testproject.sdk.internal.agent.report_lanes import ReportLane, ReportLanes
+from src.testproject.sdk.internal.agent.report_sender import ReportSender
+from src.testproject.sdk.internal.agent.report_sink import ReportSink
+from src.testproject.sdk.internal.agent.report_spill_file import ReportSpillFile
+from src.testproject.sdk.internal.agent.retry_policy import RetryPolicy
 from src.testproject.tcp import SocketManager
 
 
-class ReportsQueue:
+class ReportsQueue(ReportSink):
+    """Queue holding reports to be sent to the Agent by a background reporting thread
+
+    Every report is stamped with its position in the session and the number of the test it belongs to. The reporting
+    thread hands the reports over to a pool of sender workers, test reports act as fences so that reports are never
+    attributed by the Agent to another test than the one they were submitted for.
+
+    The serialized size of the reports waiting in the queue is kept within a memory budget. A report that does not
+    fit in the budget is handled according to the overflow policy: the producer is blocked until the reporting thread
+    made room, the screenshot is removed from the report, a passed command report is dropped, or the report is
+    written to a temporary file until it is sent. A report that still does not fit blocks the producer.
+
+    Report objects submitted by the test thread are only converted to JSON by the reporting thread, so submitting a
+    report costs the test thread little more than putting it in the queue. Their size is estimated from their
+    screenshot, text fields, command parameters and result, which make up most of it, until they are serialized.
+
+    Every report is serialized to JSON exactly once, the resulting bytes are reused when the report is spooled,
+    retried or added to a batch.
+
+    Reports waiting in the queue are taken in the order they were submitted, and grouped by priority lanes used to
+    shed load: tests, steps, failed driver commands and passed driver commands. When the queue is stopped and the
+    reports are not sent within half of the stop timeout, the passed driver command reports still waiting are dropped,
+    so the remaining time is spent on the reports that matter most.
+
+    A queue can also be stopped without waiting for its reports to be sent. It then keeps sending them in the
+    background, until the process exits, and the reports of a queue created later are only sent once it is done.
+
+    Args:
+        token (str): Token used to authenticate with the Agent
+        transport (HttpTransport): Pooled transport used to send the reports, a new one is created if not provided
+        workers (int): Number of reports (or batches) sent at the same time, taken from the environment if not provided
+        max_bytes (int): Memory budget of the queue in bytes, 0 for no limit, taken from the environment if not provided
+        overflow_policy (QueueOverflowPolicy): What is done with reports that do not fit in the memory budget,
+            taken from the environment if not provided
+        status_url (str): Agent status endpoint probed while the Agent keeps failing, None to probe with reports
+        spool (ReportSpool): On-disk log every report goes through until the Agent acknowledged it, None to keep
+            reports in memory only
+        replay (callable): Called by the reporting thread before it sends the reports of the session, with the
+            function the reports left unsent by previous sessions are submitted with, None if there is nothing to replay
+
+    Attributes:
+        _token (str): Token used to authenticate with the Agent
+        _transport (HttpTransport): Pooled transport used to send the reports
+        _queue (ReportLanes): Queue holding the reports that have not been sent yet, grouped by priority lane
+        _sender (ReportSender): Pool of workers sending the reports
+        _sequence (itertools.count): Sequence number of the next report in the session
+        _test_sequence (int): Sequence number of the test currently being reported in the session
+        _queued_bytes (int): Serialized size in bytes of the reports held in memory by the queue
+        _budget (threading.Condition): Condition notified every time reports leave the queue
+        _retry_policy (RetryPolicy): Decides whether and when a failed report is sent again
+        _circuit_breaker (CircuitBreaker): Pauses reporting while the Agent keeps failing
+        _spool (ReportSpool): On-disk log every report goes through until the Agent acknowledged it
+        _replay (Optional[callable]): Submits the reports left unsent by previous sessions, until the reporting thread
+            called it
+        _predecessors (list): Queues stopped earlier that were still sending reports when this queue was created
+        _unsent_reports (int): Number of reports queued that were neither sent, nor given up on, nor dropped
+        _failed_reports (int): Number of reports the Agent did not accept, once all attempts were made
+        _sent (threading.Condition): Condition notified every time reports were sent or given up on
+    """
+
     REPORTS_QUEUE_TIMEOUT = 10
+    REPORT_SENDER_WORKERS = 1
+    REPORTS_QUEUE_MAX_BYTES = 256 * 1024 * 1024
+    # Estimated serialized size of a report object without its screenshot, text fields, parameters and result
+    REPORT_OBJECT_BASE_BYTES = 512
+    TP_SENDER_WORKERS_VARIABLE_NAME = "TP_REPORTS_SENDER_WORKERS"
+    TP_QUEUE_MAX_BYTES_VARIABLE_NAME = "TP_REPORTS_QUEUE_MAX_BYTES"
+    TP_QUEUE_OVERFLOW_POLICY_VARIABLE_NAME = "TP_REPORTS_QUEUE_OVERFLOW_POLICY"
+    TP_NONBLOCKING_STOP_VARIABLE_NAME = "TP_REPORTS_NONBLOCKING_QUIT"
+    STATUS_PROBE_TIMEOUT = 5
+    # Compression applied to the reports sent, set by queues sending to Agents that support it
+    _compression = None
 
-    def __init__(self, token):
+    def __init__(
+        self,
+        token,
+        transport=None,
+        workers=None,
+        max_bytes=None,
+        overflow_policy=None,
+        status_url=None,
+        spool=None,
+        replay=None,
+    ):
         self._token = token
+        self._spool = spool
+        self._replay = replay
+        self._transport = transport if transport is not None else HttpTransport()
+        self._retry_policy = RetryPolicy()
+        self._status_url = status_url
+        self._circuit_breaker = CircuitBreaker(probe=self._probe_agent if status_url is not None else None)
+        self._sender = ReportSender(
+            workers
+            if workers is not None
+            else ConfigHelper.get_int_from_env(self.TP_SENDER_WORKERS_VARIABLE_NAME, self.REPORT_SENDER_WORKERS)
+        )
+        self._sequence = itertools.count()
+        self._test_sequence = 0
+        self._submit_lock = threading.Lock()
+        self._max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else ConfigHelper.get_int_from_env(self.TP_QUEUE_MAX_BYTES_VARIABLE_NAME, self.REPORTS_QUEUE_MAX_BYTES)
+        )
+        self._overflow_policy = (
+            overflow_policy if overflow_policy is not None else self.__get_overflow_policy_from_env()
+        )
+        self._queued_bytes = 0
+        self._budget = threading.Condition()
+        self._spill_file = None
+        self._dropped_reports = 0
+        self._unsent_reports = 0
+        self._failed_reports = 0
+        self._sent = threading.Condition()
+        self._stripped_screenshots = 0
         self._close_socket = False
+        # Reports of this queue are sent once the queues stopped before it are done
+        self._predecessors = BackgroundFlush.pending()
         # Running after all is initialized successfully
         self._running = True
         # After session started and is running, start the reporting thread
-        self._queue = queue.Queue()
+        self._queue = ReportLanes()
         self._reporting_thread = threading.Thread(target=self._report_worker, daemon=True)
         self._reporting_thread.start()
 
+    @property
+    def workers(self):
+        """Getter for the number of reports (or batches) sent at the same time"""
+        return self._sender.workers
+
+    @property
+    def max_bytes(self):
+        """Getter for the memory budget of the queue in bytes, 0 if there is no limit"""
+        return self._max_bytes
+
+    @property
+    def overflow_policy(self):
+        """Getter for what is done with reports that do not fit in the memory budget"""
+        return self._overflow_policy
+
+    @property
+    def spool(self):
+        """Getter for the on-disk log reports go through, None if reports are kept in memory only"""
+        return self._spool
+
+    @property
+    def draining(self):
+        """Getter for the flag telling whether the reporting thread is still running"""
+        return self._reporting_thread.is_alive()
+
+    @property
+    def failed_reports(self):
+        """Getter for the number of reports the Agent did not accept, once all attempts to send them were made"""
+        return self._failed_reports
+
+    def wait_sent(self, timeout=None):
+        """Waits until all reports submitted so far were sent, given up on or dropped, without stopping the queue
+
+        The reports left unsent by previous sessions are waited for as well, once they were replayed.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds, None to wait as long as it takes
+
+        Returns:
+            bool: True if no report is left to send, False if the timeout passed first
+        """
+        with self._sent:
+            return self._sent.wait_for(lambda: self._replay is None and self._unsent_reports == 0, timeout)
+
+    @property
+    def queued_bytes(self):
+        """Getter for the serialized size in bytes of the reports held in memory by the queue"""
+        return self._queued_bytes
+
+    @classmethod
+    def __get_overflow_policy_from_env(cls):
+        value = os.getenv(cls.TP_QUEUE_OVERFLOW_POLICY_VARIABLE_NAME)
+        if value is None:
+            return QueueOverflowPolicy.Block
+        try:
+            return QueueOverflowPolicy(value.casefold())
+        except ValueError:
+            logging.warning(
+                "The environment variable {} value must be one of {}.".format(
+                    cls.TP_QUEUE_OVERFLOW_POLICY_VARIABLE_NAME,
+                    ", ".join(policy.value for policy in QueueOverflowPolicy),
+                )
+            )
+            return QueueOverflowPolicy.Block
+
     def submit(self, report_as_json, url, block):
-        queue_item = QueueItem(report_as_json=report_as_json, url=url, token=self._token)
+        """Submits a report to be sent to the Agent
+
+        Args:
+            report_as_json (dict): JSON payload representing the report
+            url (str): Agent endpoint the payload should be POSTed to
+            block (bool): True to wait for a free slot if the queue is full
+        """
+        with self._submit_lock:
+            self._enqueue(self._admit(report_as_json, url), block)
+
+    def submit_report(self, report, url, block):
+        """Submits a report object, which is converted to JSON by the reporting thread
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object, not modified once submitted
+            url (str): Agent endpoint the payload should be POSTed to
+            block (bool): True to wait for a free slot if the queue is full
+        """
+        with self._submit_lock:
+            self._enqueue(self._admit_report(report, url), block)
+
+    def _enqueue(self, queue_item, block):
+        """Puts an admitted item in the queue
+
+        The caller holds the submit lock, so that sequence numbers follow the order of the items in the queue when
+        reports are submitted by several threads.
+        """
+        if queue_item is None:
+            return
+        if queue_item.is_test_report:
+            # Reports submitted from now on belong to the next test
+            self._test_sequence += 1
+        # The report is on disk before it is queued, so it survives the process until the Agent acknowledged it
+        self._spool_item(queue_item)
+        if queue_item.sequence is not None:
+            with self._sent:
+                self._unsent_reports += 1
         self._queue.put(queue_item, block=block)
 
-    def stop(self):
-        """Send all remaining report items in the queue to TestProject"""
+    def _admit_report(self, report, url):
+        """Makes room for a report object in the memory budget based on its estimated size
+
+        A report object that does not fit is converted to JSON right away, so the overflow policy can be applied to it.
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object
+            url (str): Agent endpoint the payload should be POSTed to
+
+        Returns:
+            QueueItem: the item to put in the queue, None if the report was dropped
+        """
+        size = self._estimated_size(report) if self._max_bytes > 0 else 0
+        with self._budget:
+            if self._fits(size):
+                self._queued_bytes += size
+                return PendingQueueItem(
+                    report=report,
+                    url=url,
+                    token=self._token,
+                    sequence=next(self._sequence),
+                    test_sequence=self._test_sequence,
+                    size=size,
+                    lane=ReportLane.of_report(report),
+                )
+        return self._admit(report.to_json(), url)
+
+    def _admit(self, report_as_json, url):
+        """Makes room for a report in the memory budget, applying the overflow policy if it does not fit
+
+        Args:
+            report_as_json (dict): JSON payload representing the report
+            url (str): Agent endpoint the payload should be POSTed to
+
+        Returns:
+            QueueItem: the item to put in the queue, None if the report was dropped
+        """
+        body = JsonSerializer.instance().dumps(report_as_json) if self._max_bytes > 0 else None
+        size = len(body) if body is not None else 0
+        lane = ReportLane.of_json(report_as_json)
+        with self._budget:
+            if not self._fits(size):
+                if self._overflow_policy is QueueOverflowPolicy.DropLowerPriority:
+                    self._evict_below(lane, size)
+                    if not self._fits(size) and lane is ReportLane.PassedCommand:
+                        self._dropped_reports += 1
+                        return None
+                if self._overflow_policy is QueueOverflowPolicy.SpillToDisk:
+                    if self._spill_file is None:
+                        self._spill_file = ReportSpillFile()
+                    offset, length = self._spill_file.write(body)
+                    return SpilledQueueItem(
+                        spill_file=self._spill_file,
+                        offset=offset,
+                        length=length,
+                        url=url,
+                        token=self._token,
+                        sequence=next(self._sequence),
+                        test_sequence=self._test_sequence,
+                        is_test_report=lane is ReportLane.Test,
+                        lane=lane,
+                    )
+                if self._overflow_policy is QueueOverflowPolicy.DropPassedCommands and (
+                    report_as_json.get("type") == ReportItemType.Command.value and report_as_json.get("passed")
+                ):
+                    self._dropped_reports += 1
+                    return None
+                if self._overflow_policy is QueueOverflowPolicy.DropScreenshots and report_as_json.get("screenshot"):
+                    report_as_json = dict(report_as_json, screenshot=None)
+                    body = JsonSerializer.instance().dumps(report_as_json)
+                    size = len(body)
+                    self._stripped_screenshots += 1
+                # Block the producer until the reporting thread made room for the report
+                while not self._fits(size) and self._reporting_thread.is_alive():
+                    self._budget.wait(timeout=1)
+            self._queued_bytes += size
+        return QueueItem(
+            report_as_json=report_as_json,
+            url=url,
+            token=self._token,
+            sequence=next(self._sequence),
+            test_sequence=self._test_sequence,
+            size=size,
+            body=body,
+            lane=lane,
+        )
+
+    def _evict_below(self, lane, size):
+        """Drops reports waiting in the queue from the lanes below a lane, lowest lane and oldest report first, until
+        a report of the given size fits in the memory budget. The caller holds the budget lock.
+
+        Args:
+            lane (ReportLane): Lane of the report that needs room
+            size (int): Serialized size of the report in bytes
+        """
+        for lower_lane in sorted((other for other in ReportLane if other > lane and other.droppable), reverse=True):
+            while not self._fits(size):
+                item = self._queue.evict(lower_lane)
+                if item is None:
+                    break
+                self._queued_bytes -= item.size
+                self._dropped_reports += 1
+                self._forget_item(item)
+
+    def _fits(self, size):
+        """Returns True if a report of the given size fits in the memory budget, an oversized report fits alone"""
+        return self._max_bytes <= 0 or self._queued_bytes == 0 or self._queued_bytes + size <= self._max_bytes
+
+    def _release(self, item):
+        """Gives the memory held by an item taken off the queue back to the budget"""
+        if item.size:
+            with self._budget:
+                self._queued_bytes -= item.size
+                self._budget.notify_all()
+
+    @classmethod
+    def _estimated_size(cls, report):
+        """Estimates the size in bytes of a report object once serialized, without serializing it
+
+        Args:
+            report: DriverCommandReport, StepReport or CustomTestReport object
+
+        Returns:
+            int: estimated size of the serialized report in bytes
+        """
+        size = cls.REPORT_OBJECT_BASE_BYTES
+        for field in ("screenshot", "message", "result", "command_params", "description"):
+            value = getattr(report, field, None)
+            if isinstance(value, (str, ProcessedScreenshot)):
+                size += len(value)
+            elif isinstance(value, (dict, list, tuple)):
+                # Script results and lists of elements can be as large as screenshots
+                size += cls._estimated_value_size(value)
+        return size
+
+    @staticmethod
+    def _estimated_value_size(value):
+        """Estimates the size in bytes of a JSON value once serialized, from the length of its strings and the
+        number of its items
+
+        Args:
+            value: dict, list or scalar value
+
+        Returns:
+            int: estimated size of the serialized value in bytes
+        """
+        size = 0
+        pending = [value]
+        while pending:
+            value = pending.pop()
+            if isinstance(value, dict):
+                # Braces, then quotes, colon, comma and space around every key
+                size += 2 + 6 * len(value)
+                for key, item in value.items():
+                    size += len(key) if isinstance(key, str) else 8
+                    pending.append(item)
+            elif isinstance(value, (list, tuple)):
+                size += 2 + 2 * len(value)
+                pending.extend(value)
+            elif isinstance(value, str):
+                size += len(value) + 2
+            else:
+                size += 8
+        return size
+
+    def stop(self, block=None):
+        """Send all remaining report items in the queue to TestProject
+
+        Args:
+            block (bool): True to wait until the reports are sent or the stop timeout passes, False to return right away
+                and keep sending the reports in the background, taken from the environment if not provided
+        """
+        if block is None:
+            block = not ConfigHelper.get_bool_from_env(self.TP_NONBLOCKING_STOP_VARIABLE_NAME, False)
+
         # Send a stop signal to the thread worker
         self._running = False
 
@@ -49,27 +454,193 @@ class ReportsQueue:
         # the 'running' condition is evaluated one last time
         self._queue.put(QueueItem(report_as_json=None, url=None, token=self._token), block=False)
 
-        # Wait until all items have been reported or timeout passes
-        self._reporting_thread.join(timeout=self.REPORTS_QUEUE_TIMEOUT)
+        if block:
+            self.wait_stopped(self.REPORTS_QUEUE_TIMEOUT)
+        else:
+            # The reports left are sent in the background, and given some more time before the process exits
+            BackgroundFlush.register(self)
+
+    def wait_stopped(self, timeout):
+        """Waits until all reports of a stopped queue were sent, or the timeout passes
+
+        Passed driver command reports still waiting once half of the timeout passed are dropped.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            bool: True if all reports were sent, False otherwise
+        """
+        self._reporting_thread.join(timeout=timeout / 2)
+        if self._reporting_thread.is_alive():
+            dropped = self._drop_lane(ReportLane.PassedCommand)
+            if dropped:
+                logging.warning(
+                    "Reports are taking long to be sent, {} passed driver command reports were dropped".format(dropped)
+                )
+            self._reporting_thread.join(timeout=timeout / 2)
         if self._reporting_thread.is_alive():
             # Thread is still alive, so there are unreported items
-            logging.warning("There are {} unreported items in the queue".format(self._queue.qsize()))
+            logging.warning(
+                "There are {} unreported items in the queue{}".format(
+                    self._queue.qsize() + self._sender.in_flight,
+                    ", they will be sent by the next session" if self._spool is not None else "",
+                )
+            )
+            return False
+        return True
+
+    def _drop_lane(self, lane):
+        """Drops all reports of a lane waiting in the queue
+
+        Args:
+            lane (ReportLane): The lane to drop the reports of
+
+        Returns:
+            int: number of reports dropped
+        """
+        dropped = 0
+        with self._budget:
+            item = self._queue.evict(lane)
+            while item is not None:
+                self._queued_bytes -= item.size
+                dropped += 1
+                self._forget_item(item)
+                item = self._queue.evict(lane)
+            self._budget.notify_all()
+        return dropped
 
     def _report_worker(self):
         """Worker method that is polling the queue for items to report"""
+        for predecessor in self._predecessors:
+            # Keep the reports of consecutive sessions in order
+            predecessor.wait_stopped(self.REPORTS_QUEUE_TIMEOUT)
+        self._predecessors = None
+        if self._replay is not None:
+            # Replaying is left to this thread, as reading the spools of previous sessions may take a while
+            try:
+                self._replay(self._submit_replayed)
+            finally:
+                with self._sent:
+                    self._replay = None
+                    self._sent.notify_all()
         while self._running or self._queue.qsize() > 0:
-            item = self._queue.get()
+            try:
+                item = self._queue.get(timeout=self._poll_timeout())
+            except queue.Empty:
+                self._handle_idle()
+                continue
             if isinstance(item, QueueItem):
+                self._release(item)
                 self._handle_report(item)
             else:
                 logging.warning("Unknown object of type {} found on queue, ignoring it..".format(type(item)))
-            self._queue.task_done()
+        # Make sure nothing is held back once the queue has been drained, and wait for the senders to finish
+        self._flush()
+        self._sender.wait()
+        self._sender.shutdown()
+        if self._spill_file is not None:
+            self._spill_file.close()
+        if self._spool is not None:
+            self._spool.close()
+        if self._dropped_reports or self._stripped_screenshots:
+            logging.warning(
+                "The reports queue exceeded its memory budget of {} bytes, {} command reports were dropped "
+                "and {} screenshots were removed from reports".format(
+                    self._max_bytes, self._dropped_reports, self._stripped_screenshots
+                )
+            )
         # Close socket only after agent_client is no longer running and all reports in the queue have been sent.
         if self._close_socket:
             SocketManager.instance().close_socket()
 
+    def _submit_replayed(self, reports):
+        """Hands the reports left unsent by previous sessions over to the senders, ahead of the reports of the session
+
+        The replayed reports are numbered before the reports of the session, with tests of their own, and written
+        to its spool so that they survive it too. They are not counted against the memory budget of the queue.
+
+        Args:
+            reports (list): Endpoint URL and JSON payload of every report replayed, in order, the last one a test report
+        """
+        sequence = -len(reports)
+        test_sequence = -sum(1 for _, report in reports if ReportLane.of_json(report) is ReportLane.Test)
+        items = []
+        for url, report in reports:
+            item = QueueItem(
+                report_as_json=report, url=url, token=self._token, sequence=sequence, test_sequence=test_sequence
+            )
+            sequence += 1
+            if item.is_test_report:
+                test_sequence += 1
+            self._spool_item(item)
+            items.append(item)
+        with self._sent:
+            self._unsent_reports += len(items)
+        for item in items:
+            self._handle_report(item)
+
+    def _spool_item(self, item):
+        """Writes a report to the spool before it is queued, so it survives the process until the Agent acknowledged it
+
+        Report objects are serialized right away when a spool is used, by the thread submitting them.
+        """
+        if self._spool is not None and item.sequence is not None:
+            self._spool.append(item.sequence, urlparse(item.url).path if item.url else None, item.body)
+
+    def _forget_item(self, item):
+        """Removes a report dropped from the queue from the spool, so it is not sent by the next session either"""
+        if self._spool is not None and item.sequence is not None:
+            self._spool.acknowledge(item.sequence, item.last_sequence)
+        self._count_sent(item)
+
+    def _poll_timeout(self):
+        """Returns the time in seconds to wait for a new item before _handle_idle() is called, None to wait forever"""
+        return None
+
+    def _handle_idle(self):
+        """Called when no new item arrived on the queue within the poll timeout"""
+        pass
+
     def _handle_report(self, item):
-        item.send()
+        self._sender.submit(lambda: self._send(item), fence=item.is_test_report, key=item.test_sequence)
+
+    def _send(self, item):
+        """Sends an item to the Agent, applying the retry policy and the circuit breaker
+
+        Returns:
+            bool: True if the Agent accepted the item, False otherwise
+        """
+        passed = item.send(self._transport, self._retry_policy, self._circuit_breaker, self._compression)
+        if passed and self._spool is not None and item.sequence is not None:
+            self._spool.acknowledge(item.sequence, item.last_sequence)
+        self._count_sent(item, passed)
+        return passed
+
+    def _count_sent(self, item, passed=True):
+        """Counts the reports of an item as no longer waiting to be sent
+
+        Args:
+            item (QueueItem): Item sent, given up on (passed is False) or dropped from the queue
+            passed (bool): False if the Agent did not accept the reports of the item
+        """
+        if item.sequence is None:
+            return
+        # Items hold a single report, or a batch of reports with consecutive sequence numbers
+        count = item.last_sequence - item.sequence + 1
+        with self._sent:
+            self._unsent_reports -= count
+            if not passed:
+                self._failed_reports += count
+            self._sent.notify_all()
+
+    def _probe_agent(self):
+        """Returns True if the Agent responds to a status request"""
+        return self._transport.request("GET", self._status_url, self._token, timeout=self.STATUS_PROBE_TIMEOUT).ok
+
+    def _flush(self):
+        """Sends any reports held back by the worker"""
+        pass
 
 
 class QueueItem:
@@ -79,44 +650,233 @@ class QueueItem:
         report_as_json (dict): JSON payload representing the item to be reported
         url (str): Agent endpoint the payload should be POSTed to
         token (str): Token used to authenticate with the Agent
+        sequence (int): Position of the (first) report in the session
+        test_sequence (int): Number of the test in the session the report belongs to
+        last_sequence (int): Position of the last report in the session when the item holds a batch of reports
+        size (int): Serialized size of the report in bytes, counted against the queue memory budget
+        body (bytes): Report already serialized to JSON, serialized on first use if not provided
+        test_report (bool): True if the item ends a test, found out from the report if not provided
+        lane (ReportLane): Priority lane of the report, found out from the report if not provided
 
     Attributes:
         _report_as_json (Optional[dict]): JSON payload representing the item to be reported
         _url (Optional[str]): Agent endpoint the payload should be POSTed to
         _token (str): Token used to authenticate with the Agent
+        _sequence (Optional[int]): Position of the (first) report in the session
+        _test_sequence (Optional[int]): Number of the test in the session the report belongs to
+        _size (int): Serialized size of the report in bytes, counted against the queue memory budget
+        _body (Optional[bytes]): Report serialized to JSON, once it has been serialized
+        _test_report (Optional[bool]): True if the item ends a test, None to find out from the report
+        _lane (Optional[ReportLane]): Priority lane of the report, None to find out from the report
+        evicted (bool): True if the item was dropped from the queue before being sent
     """
 
-    def __init__(self, report_as_json, url, token):
+    def __init__(
+        self,
+        report_as_json,
+        url,
+        token,
+        sequence=None,
+        test_sequence=None,
+        size=0,
+        last_sequence=None,
+        body=None,
+        test_report=None,
+        lane=None,
+    ):
         self._report_as_json = report_as_json
         self._url = url
         self._token = token
+        self._sequence = sequence
+        self._last_sequence = last_sequence if last_sequence is not None else sequence
+        self._test_sequence = test_sequence
+        self._size = size
+        self._body = body
+        self._test_report = test_report
+        self._lane = lane
+        self.evicted = False
 
-    def send(self):
-        """Send a report item to the Agent"""
-        max_report_failure_attempts = 4
+    def send(self, transport, retry_policy=None, circuit_breaker=None, compression=None):
+        """Send a report item to the Agent
 
-        if self._report_as_json is None and self._url is None:
+        Args:
+            transport (HttpTransport): Pooled transport used to send the report
+            retry_policy (RetryPolicy): Decides whether and when a failed attempt is repeated
+            circuit_breaker (CircuitBreaker): Holds the attempts back while the Agent keeps failing
+            compression (PayloadCompression): Compression applied to the report body, None to send it as is
+
+        Returns:
+            bool: True if the Agent accepted the report, False if all attempts to send it failed
+        """
+        retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        if self._url is None and self._body is None and self.report_as_json is None:
             # Skip empty queue items put in the queue on stop()
-            return
+            return True
+
+        # The report is serialized and compressed once, however many attempts it takes to send it
+        body = self.body
+        encoding = None
+        if compression is not None:
+            body, encoding = compression.encode(body)
 
-        for i in range(max_report_failure_attempts):
-            with requests.Session() as session:
-                response = session.post(self._url, headers={"Authorization": self._token}, json=self._report_as_json)
-                try:
-                    response.raise_for_status()
-                    return
-                except HTTPError:
-                    remaining_attempts = max_report_failure_attempts - i - 1
-                    logging.warning(
-                        "Agent responded with an unexpected status {}, response from Agent: {}".format(
-                            response.status_code, response.text
-                        )
+        attempt = 0
+        while attempt < retry_policy.max_attempts:
+            remaining_attempts = retry_policy.max_attempts - attempt - 1
+            attempt += 1
+            if circuit_breaker is not None and not circuit_breaker.wait_until_closed():
+                # The Agent has been failing for too long, the report is not worth holding the reporting thread
+                return False
+            response = None
+            try:
+                response = transport.post(self._url, self._token, data=body, content_encoding=encoding)
+                response.raise_for_status()
+                if circuit_breaker is not None:
+                    circuit_breaker.record_success()
+                return True
+            except HTTPError:
+                logging.warning(
+                    "Agent responded with an unexpected status {}, response from Agent: {}".format(
+                        response.status_code, response.text
                     )
-                    logging.info(
-                        "Failed to send a report to the Agent, {} attempts remaining...".format(remaining_attempts)
+                )
+                if encoding is not None and response.status_code in PayloadCompression.REJECTED_STATUS_CODES:
+                    # The Agent does not accept compressed reports, send this one again as it is, and the next ones
+                    compression.reject()
+                    body, encoding = self.body, None
+                    attempt -= 1
+                    continue
+                if not retry_policy.is_retryable(response):
+                    # The Agent rejected the report itself, sending it again would not help
+                    break
+            except requests.exceptions.RequestException as e:
+                logging.warning("Failed to connect to the Agent: {}".format(e))
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure()
+            if remaining_attempts > 0:
+                delay = retry_policy.delay(attempt - 1, response)
+                logging.info(
+                    "Failed to send a report to the Agent, retrying in {:.1f} seconds, {} attempts remaining...".format(
+                        delay, remaining_attempts
                     )
-        logging.error("All {} attempts to send report have failed.".format(max_report_failure_attempts))
+                )
+                time.sleep(delay)
+        logging.error(
+            "All {} attempts to send report #{} of test #{} have failed.".format(
+                attempt, self._sequence, self._test_sequence
+            )
+        )
+        return False
+
+    @property
+    def report_as_json(self):
+        return self._report_as_json
+
+    @property
+    def body(self):
+        """Getter for the report serialized to JSON, serializing it on first use"""
+        if self._body is None:
+            self._body = JsonSerializer.instance().dumps(self.report_as_json)
+        return self._body
+
+    @property
+    def url(self):
+        return self._url
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    @property
+    def test_sequence(self):
+        return self._test_sequence
+
+    @property
+    def last_sequence(self):
+        return self._last_sequence
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def lane(self):
+        """Getter for the priority lane of the report, found out from the report on first use"""
+        if self._lane is None:
+            self._lane = ReportLane.of_json(self.report_as_json)
+        return self._lane
+
+    @property
+    def is_test_report(self):
+        """True if the item reports the end of a test"""
+        if self._test_report is not None:
+            return self._test_report
+        reports = self.report_as_json if isinstance(self.report_as_json, list) else [self.report_as_json]
+        return bool(reports) and isinstance(reports[-1], dict) and reports[-1].get("type") == ReportItemType.Test.value
+
+
+class SpilledQueueItem(QueueItem):
+    """Item whose report was written to the spill file instead of being held in memory
+
+    The report is read back from the file when the reporting thread needs it.
+
+    Args:
+        spill_file (ReportSpillFile): File the report was written to
+        offset (int): Position of the report in the file
+        length (int): Length in bytes of the report in the file
+        is_test_report (bool): True if the report ends a test
+    """
+
+    def __init__(self, spill_file, offset, length, url, token, sequence, test_sequence, is_test_report, lane=None):
+        super().__init__(
+            report_as_json=None,
+            url=url,
+            token=token,
+            sequence=sequence,
+            test_sequence=test_sequence,
+            test_report=is_test_report,
+            lane=lane,
+        )
+        self._spill_file = spill_file
+        self._offset = offset
+        self._length = length
+
+    @property
+    def report_as_json(self):
+        if self._report_as_json is None:
+            self._report_as_json = JsonSerializer.loads(self.body)
+        return self._report_as_json
+
+    @property
+    def body(self):
+        if self._body is None:
+            self._body = self._spill_file.read(self._offset, self._length)
+        return self._body
+
+
+class PendingQueueItem(QueueItem):
+    """Item holding a report object, converted to JSON by the reporting thread the first time it is needed
+
+    Args:
+        report: DriverCommandReport, StepReport or CustomTestReport object
+    """
+
+    def __init__(self, report, url, token, sequence, test_sequence, size, lane=None):
+        super().__init__(
+            report_as_json=None,
+            url=url,
+            token=token,
+            sequence=sequence,
+            test_sequence=test_sequence,
+            size=size,
+            test_report=isinstance(report, CustomTestReport),
+            lane=lane if lane is not None else ReportLane.of_report(report),
+        )
+        self._report = report
 
     @property
     def report_as_json(self):
+        if self._report_as_json is None:
+            self._report_as_json = self._report.to_json()
+            self._report = None
         return self._report_as_json
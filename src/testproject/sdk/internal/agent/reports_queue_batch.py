@@ -13,54 +13,230 @@
 # limitations under the License.
 import collections
 import logging
-import os
+import time
 
+from src.testproject.helpers import ConfigHelper
+from src.testproject.sdk.internal.agent.adaptive_batch_size import AdaptiveBatchSize
+from src.testproject.sdk.internal.agent.payload_compression import PayloadCompression
 from src.testproject.sdk.internal.agent.reports_queue import QueueItem, ReportsQueue
 
 
 class ReportsQueueBatch(ReportsQueue):
+    """Reports queue sending the reports to the Agent in batches
+
+    A batch is sent as soon as one of the following is true:
+        - it holds the maximum number of reports
+        - adding the next report would make its payload exceed the maximum size
+        - the linger time passed since the first report was added to it
+        - it ends with a test report, so tests are reported as soon as they end
+        - the queue is being stopped
+
+    Batches larger than the compression threshold are compressed when compression is enabled and the Agent supports
+    it, which pays off when the Agent is reached over a slow network. A batch the Agent rejects compressed is sent
+    again uncompressed, and no batch is compressed from then on.
+
+    In adaptive mode the maximum number of reports is adjusted after every batch, based on how fast the Agent
+    acknowledges batches and how many reports are waiting in the queue.
+
+    Args:
+        token (str): Token used to authenticate with the Agent
+        url (str): Agent endpoint the batches should be POSTed to
+        transport (HttpTransport): Pooled transport used to send the batches
+        batch_settings (BatchSettings): Batching limits overriding the ones defined by environment variables
+        workers (int): Number of batches sent at the same time, taken from the environment if not provided
+        status_url (str): Agent status endpoint probed while the Agent keeps failing
+        compression_supported (bool): True if the Agent accepts compressed batches
+        spool (ReportSpool): On-disk log every report goes through until the Agent acknowledged it
+        replay (callable): Called by the reporting thread before it sends the reports of the session, with the
+            function the reports left unsent by previous sessions are submitted with
+    """
+
     MAX_REPORT_BATCH_SIZE = 10
+    MAX_REPORT_BATCH_BYTES = 5 * 1024 * 1024
+    REPORT_BATCH_LINGER_MS = 50
+    MAX_ADAPTIVE_BATCH_SIZE = 500
+    REPORT_BATCH_TARGET_LATENCY_MS = 500
     TP_MAX_BATCH_SIZE_VARIABLE_NAME = "TP_MAX_REPORTS_BATCH_SIZE"
+    TP_MAX_BATCH_BYTES_VARIABLE_NAME = "TP_MAX_REPORTS_BATCH_BYTES"
+    TP_BATCH_LINGER_VARIABLE_NAME = "TP_REPORTS_BATCH_LINGER_MS"
+    TP_ADAPTIVE_BATCH_VARIABLE_NAME = "TP_REPORTS_ADAPTIVE_BATCH"
+    TP_TARGET_LATENCY_VARIABLE_NAME = "TP_REPORTS_TARGET_LATENCY_MS"
+    TP_COMPRESSION_VARIABLE_NAME = "TP_REPORTS_COMPRESSION"
+    TP_COMPRESSION_THRESHOLD_VARIABLE_NAME = "TP_REPORTS_COMPRESSION_THRESHOLD_BYTES"
 
-    def __init__(self, token, url):
-        super().__init__(token)
+    def __init__(
+        self,
+        token,
+        url,
+        transport=None,
+        batch_settings=None,
+        workers=None,
+        status_url=None,
+        compression_supported=False,
+        spool=None,
+        replay=None,
+    ):
+        # Batch state must be ready before the reporting thread is started by the parent class
         self._url = url
         self.__batch_list = collections.deque()
-        """Get maximum reports batch size from environment variable."""
-        """If the environment variable is not defined - set maximum reports batch size to 10 as default"""
-        try:
-            env_var_value = os.environ[self.TP_MAX_BATCH_SIZE_VARIABLE_NAME]
-            if env_var_value is not None:
-                self.__max_batch_size = int(env_var_value)
-            else:
-                self.__max_batch_size = self.MAX_REPORT_BATCH_SIZE
-        except KeyError:
-            logging.warning("The environment variable {} is not defined.".format(self.TP_MAX_BATCH_SIZE_VARIABLE_NAME))
-            self.__max_batch_size = self.MAX_REPORT_BATCH_SIZE
-        except ValueError:
-            logging.warning(
-                "The environment variable {} value must be an integer.".format(self.TP_MAX_BATCH_SIZE_VARIABLE_NAME)
+        self.__batch_first_item = None
+        self.__batch_last_sequence = None
+        self.__batch_ends_test = False
+        self.__batch_bytes = 0
+        self.__batch_deadline = None
+        """Get batching limits from the batch settings, then from environment variables, then use the defaults"""
+        self.__max_batch_size = self.__get_limit(
+            batch_settings and batch_settings.max_batch_size,
+            self.TP_MAX_BATCH_SIZE_VARIABLE_NAME,
+            self.MAX_REPORT_BATCH_SIZE,
+        )
+        self.__max_batch_bytes = self.__get_limit(
+            batch_settings and batch_settings.max_batch_bytes,
+            self.TP_MAX_BATCH_BYTES_VARIABLE_NAME,
+            self.MAX_REPORT_BATCH_BYTES,
+        )
+        self.__linger_ms = self.__get_limit(
+            batch_settings and batch_settings.linger_ms,
+            self.TP_BATCH_LINGER_VARIABLE_NAME,
+            self.REPORT_BATCH_LINGER_MS,
+        )
+        adaptive = (
+            batch_settings.adaptive
+            if batch_settings is not None and batch_settings.adaptive is not None
+            else ConfigHelper.get_bool_from_env(self.TP_ADAPTIVE_BATCH_VARIABLE_NAME, False)
+        )
+        self.__adaptive_batch_size = (
+            AdaptiveBatchSize(
+                initial_size=self.__max_batch_size,
+                min_size=1,
+                max_size=max(self.MAX_ADAPTIVE_BATCH_SIZE, self.__max_batch_size),
+                target_latency_ms=self.__get_limit(
+                    batch_settings and batch_settings.target_latency_ms,
+                    self.TP_TARGET_LATENCY_VARIABLE_NAME,
+                    self.REPORT_BATCH_TARGET_LATENCY_MS,
+                ),
+            )
+            if adaptive
+            else None
+        )
+        self._compression = PayloadCompression.from_settings(
+            batch_settings and batch_settings.compression,
+            batch_settings and batch_settings.compression_threshold_bytes,
+            self.TP_COMPRESSION_VARIABLE_NAME,
+            self.TP_COMPRESSION_THRESHOLD_VARIABLE_NAME,
+        )
+        if self._compression is not None and not compression_supported:
+            logging.warning("The Agent does not support compressed reports, reports will not be compressed.")
+            self._compression = None
+        logging.info(
+            "Reports are sent in {}batches of up to {} reports or {} bytes, lingering for {} ms.".format(
+                "adaptive " if adaptive else "", self.__max_batch_size, self.__max_batch_bytes, self.__linger_ms
             )
-            self.__max_batch_size = self.MAX_REPORT_BATCH_SIZE
-        except Exception:
-            self.__max_batch_size = self.MAX_REPORT_BATCH_SIZE
-        logging.info("The maximum reports batch size is defined as {}.".format(self.__max_batch_size))
+        )
+        super().__init__(token, transport, workers, status_url=status_url, spool=spool, replay=replay)
 
-    def _handle_report(self, item):
-        self.__batch_list.append(item.report_as_json)
+    @staticmethod
+    def __get_limit(value, variable_name, default):
+        """Returns the given value, or the value of the environment variable if none was given"""
+        return value if value is not None else ConfigHelper.get_int_from_env(variable_name, default)
+
+    @property
+    def max_batch_size(self):
+        """Getter for the current maximum number of reports in a batch"""
+        if self.__adaptive_batch_size is not None:
+            return self.__adaptive_batch_size.size
+        return self.__max_batch_size
+
+    @property
+    def adaptive_batch_size(self):
+        """Getter for the adaptive batch size controller, None if the batch size is static"""
+        return self.__adaptive_batch_size
+
+    @property
+    def compression(self):
+        """Getter for the compression applied to batches, None if batches are not compressed"""
+        return self._compression
+
+    @property
+    def max_batch_bytes(self):
+        """Getter for the maximum size of a batch payload in bytes"""
+        return self.__max_batch_bytes
+
+    @property
+    def linger_ms(self):
+        """Getter for the time to wait for a batch to fill up in milliseconds"""
+        return self.__linger_ms
 
-        if self.__batch_list.__len__() == 0:
+    def _poll_timeout(self):
+        if not self.__batch_list or self.__batch_deadline is None:
+            return None
+        return max(self.__batch_deadline - time.monotonic(), 0)
+
+    def _handle_idle(self):
+        # The linger time passed without the batch filling up, send it as it is
+        self._flush()
+
+    def _handle_report(self, item):
+        if item.sequence is None:
+            # Empty item put in the queue on stop()
+            self._flush()
             return
 
-        """Send the reports batch, if one of the following conditions is true:"""
-        """The batch list size reached allowed maximum."""
-        """The queue is empty and the reports batch list is not."""
-        if self.__batch_list.__len__() == self.__max_batch_size or (
-            self.__batch_list.__len__() > 0 and self._queue.qsize() == 0
+        # Batches are assembled from the reports already serialized to JSON
+        body = item.body
+        report_bytes = len(body)
+
+        # Keep the batch under the maximum payload size, a single oversized report is sent on its own
+        if self.__batch_list and self.__batch_bytes + report_bytes > self.__max_batch_bytes:
+            self._flush()
+
+        if not self.__batch_list:
+            self.__batch_first_item = item
+            if self.__linger_ms > 0:
+                self.__batch_deadline = time.monotonic() + self.__linger_ms / 1000.0
+
+        self.__batch_list.append(body)
+        self.__batch_last_sequence = item.sequence
+        self.__batch_bytes += report_bytes
+        self.__batch_ends_test = item.is_test_report
+
+        if (
+            len(self.__batch_list) >= self.max_batch_size
+            or self.__batch_ends_test
+            or (self.__linger_ms <= 0 and self._queue.qsize() == 0)
         ):
-            """Convert reports linked list to a plain list before it's sent to the Agent"""
-            batch_json = list(self.__batch_list)
-            """Build QueueItem with reports batch json and send it to the agent"""
-            batch_item = QueueItem(url=self._url, report_as_json=batch_json, token=self._token)
-            batch_item.send()
-            self.__batch_list.clear()
+            self._flush()
+
+    def _flush(self):
+        if not self.__batch_list:
+            return
+        """Join the serialized reports into a JSON array, without serializing them again"""
+        batch_body = b"[" + b",".join(self.__batch_list) + b"]"
+        self.__batch_list.clear()
+        self.__batch_bytes = 0
+        self.__batch_deadline = None
+        """Build QueueItem with reports batch json and hand it over to the senders"""
+        batch_item = QueueItem(
+            url=self._url,
+            report_as_json=None,
+            token=self._token,
+            sequence=self.__batch_first_item.sequence,
+            test_sequence=self.__batch_first_item.test_sequence,
+            last_sequence=self.__batch_last_sequence,
+            body=batch_body,
+            test_report=self.__batch_ends_test,
+        )
+        self.__batch_first_item = None
+        # A batch never holds reports of two tests, as a test report always ends the batch it was added to
+        self._sender.submit(
+            lambda: self.__send_batch(batch_item), fence=batch_item.is_test_report, key=batch_item.test_sequence
+        )
+
+    def __send_batch(self, batch_item):
+        """Sends a batch to the Agent, feeding the round trip time to the adaptive batch size"""
+        start = time.monotonic()
+        passed = self._send(batch_item)
+        if self.__adaptive_batch_size is not None:
+            self.__adaptive_batch_size.on_batch_sent(
+                round_trip_ms=(time.monotonic() - start) * 1000, passed=passed, backlog=self._queue.qsize()
+            )
@@ -0,0 +1,56 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+
+
+class ReportsQueueFile(ReportsQueue):
+    """Reports queue writing the reports to report files instead of sending them to the Agent
+
+    Reports go through the same memory budget, priority lanes and serialization as when they are sent to the Agent,
+    the reporting thread then appends them to the report files rather than posting them.
+
+    Args:
+        token (str): Token used to authenticate with the Agent
+        sink (ReportFileSink): Rotating report files the reports are written to
+    """
+
+    def __init__(self, token, sink):
+        # The sink must be ready before the reporting thread is started by the parent class
+        self._sink = sink
+        logging.info("Reports are written to {} instead of being sent to the Agent.".format(sink.directory))
+        super().__init__(token)
+
+    @property
+    def sink(self):
+        """Getter for the report files the reports are written to"""
+        return self._sink
+
+    # Reports written to the current file are flushed when no report was submitted for this long, in seconds
+    FLUSH_INTERVAL = 1
+
+    def _poll_timeout(self):
+        return self.FLUSH_INTERVAL
+
+    def _handle_report(self, item):
+        if item.sequence is None:
+            # Empty item put in the queue on stop(), complete the last report file
+            self._sink.close()
+            return
+        self._sink.write(item.body)
+
+    def _handle_idle(self):
+        self._sink.flush()
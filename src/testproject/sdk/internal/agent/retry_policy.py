@@ -0,0 +1,124 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import email.utils
+import random
+import time
+
+from src.testproject.helpers import ConfigHelper
+
+
+class RetryPolicy:
+    """Decides whether and when a failed report is sent again
+
+    Attempts are spaced using exponential backoff with full jitter: the delay before attempt n is a random value
+    between 0 and base_delay * 2^n, capped at max_delay. When the Agent responds with 429 (Too Many Requests) or
+    503 (Service Unavailable) and a Retry-After header, the delay it asks for is used instead.
+
+    Args:
+        max_attempts (int): Maximum number of attempts to send a report
+        base_delay (float): Backoff delay in seconds before the second attempt
+        max_delay (float): Maximum backoff delay in seconds, also capping Retry-After delays
+
+    Attributes:
+        _max_attempts (int): Maximum number of attempts to send a report
+        _base_delay (float): Backoff delay in seconds before the second attempt
+        _max_delay (float): Maximum backoff delay in seconds
+    """
+
+    DEFAULT_MAX_ATTEMPTS = 4
+    DEFAULT_BASE_DELAY_MS = 200
+    DEFAULT_MAX_DELAY_MS = 30 * 1000
+    # Statuses worth retrying, any other client error means the report itself was rejected
+    RETRYABLE_STATUS_CODES = (408, 429)
+    RETRY_AFTER_STATUS_CODES = (429, 503)
+
+    TP_MAX_ATTEMPTS_VARIABLE_NAME = "TP_REPORTS_MAX_ATTEMPTS"
+    TP_BASE_DELAY_VARIABLE_NAME = "TP_REPORTS_RETRY_BASE_DELAY_MS"
+    TP_MAX_DELAY_VARIABLE_NAME = "TP_REPORTS_RETRY_MAX_DELAY_MS"
+
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None):
+        self._max_attempts = max(
+            (
+                max_attempts
+                if max_attempts is not None
+                else ConfigHelper.get_int_from_env(self.TP_MAX_ATTEMPTS_VARIABLE_NAME, self.DEFAULT_MAX_ATTEMPTS)
+            ),
+            1,
+        )
+        self._base_delay = (
+            base_delay
+            if base_delay is not None
+            else ConfigHelper.get_int_from_env(self.TP_BASE_DELAY_VARIABLE_NAME, self.DEFAULT_BASE_DELAY_MS) / 1000.0
+        )
+        self._max_delay = (
+            max_delay
+            if max_delay is not None
+            else ConfigHelper.get_int_from_env(self.TP_MAX_DELAY_VARIABLE_NAME, self.DEFAULT_MAX_DELAY_MS) / 1000.0
+        )
+
+    @property
+    def max_attempts(self):
+        """Getter for the maximum number of attempts to send a report"""
+        return self._max_attempts
+
+    def is_retryable(self, response):
+        """Returns True if a report rejected with the given response may be accepted when sent again
+
+        Args:
+            response (requests.Response): The response returned by the Agent
+
+        Returns:
+            bool: False for client errors other than timeouts and throttling, True otherwise
+        """
+        return not 400 <= response.status_code < 500 or response.status_code in self.RETRYABLE_STATUS_CODES
+
+    def delay(self, attempt, response=None):
+        """Returns the time to wait before the next attempt
+
+        Args:
+            attempt (int): Zero based number of the attempt that failed
+            response (requests.Response): The response returned by the Agent, None if no response was received
+
+        Returns:
+            float: the delay in seconds
+        """
+        if response is not None and response.status_code in self.RETRY_AFTER_STATUS_CODES:
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self._max_delay)
+        return random.uniform(0, min(self._base_delay * (2**attempt), self._max_delay))
+
+    @staticmethod
+    def _parse_retry_after(value):
+        """Parses a Retry-After header value, either a number of seconds or an HTTP date
+
+        Args:
+            value (str): The Retry-After header value
+
+        Returns:
+            float: the delay in seconds, None if the value is missing or invalid
+        """
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if retry_at is None:
+            return None
+        return max(retry_at.timestamp() - time.time(), 0.0)
@@ -0,0 +1,83 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import argparse
+import logging
+import os
+import sys
+
+from src.testproject.sdk.internal.agent.report_spool import ReportSpool
+from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+
+
+def main(args=None):
+    """Sends the reports left unsent in the spool directory by sessions that stopped before delivering them
+
+    The reports are sent through a Generic driver session, and added to the report of its project and job. Its
+    reporting thread replays the spools when it starts, and the session is only closed once the Agent accepted the
+    reports or the timeout passed.
+
+    Args:
+        args (list): Command line arguments, taken from sys.argv if not provided
+
+    Returns:
+        int: the process exit code
+    """
+    parser = argparse.ArgumentParser(description="Send the TestProject reports left unsent by previous sessions.")
+    parser.add_argument(
+        "--spool-dir",
+        default=os.getenv(ReportSpool.TP_SPOOL_DIR_VARIABLE_NAME),
+        help="directory holding the report spools (defaults to TP_REPORTS_SPOOL_DIR)",
+    )
+    parser.add_argument("--token", help="developer token (defaults to TP_DEV_TOKEN)")
+    parser.add_argument("--agent-url", help="Agent address (defaults to TP_AGENT_URL)")
+    parser.add_argument("--project-name", help="project to add the reports to")
+    parser.add_argument("--job-name", help="job to add the reports to")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="maximum time in seconds to wait for the Agent to accept the reports (defaults to no limit)",
+    )
+    arguments = parser.parse_args(args)
+
+    if not arguments.spool_dir:
+        parser.error("the spool directory must be set using --spool-dir or TP_REPORTS_SPOOL_DIR")
+    if not os.path.isdir(arguments.spool_dir):
+        logging.info("Spool directory {} does not exist, there is nothing to send".format(arguments.spool_dir))
+        return 0
+
+    # The session replays the spool when it starts, and quitting waits until the reports are sent
+    os.environ[ReportSpool.TP_SPOOL_DIR_VARIABLE_NAME] = arguments.spool_dir
+    os.environ[ReportsQueue.TP_NONBLOCKING_STOP_VARIABLE_NAME] = "false"
+    from src.testproject.sdk.drivers.webdriver.generic import Generic
+
+    driver = Generic(
+        token=arguments.token,
+        agent_url=arguments.agent_url,
+        project_name=arguments.project_name,
+        job_name=arguments.job_name,
+    )
+    reports_queue = driver.command_executor.agent_client.agent_reports_queue
+    sent = reports_queue.wait_sent(arguments.timeout)
+    driver.quit()
+
+    if not sent or reports_queue.failed_reports:
+        logging.error(
+            "Not all reports were sent to the Agent, the reports left are kept in {}".format(arguments.spool_dir)
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import urllib3
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+from src.testproject.helpers import ConfigHelper
+
+
+class ConnectionHelper:
+    """Provides helper methods for the persistent connection used to send WebDriver commands to the Agent"""
+
+    DEFAULT_POOL_SIZE = 4
+    TP_DRIVER_POOL_SIZE_VARIABLE_NAME = "TP_DRIVER_POOL_SIZE"
+
+    @classmethod
+    def create_pool_manager(cls, pool_size=None):
+        """Creates the pool of keep-alive connections used by a command executor
+
+        Args:
+            pool_size (int): Maximum number of connections kept open to the Agent,
+                defaults to the value of the TP_DRIVER_POOL_SIZE environment variable
+
+        Returns:
+            urllib3.PoolManager: pool manager that reuses connections between commands
+        """
+        if pool_size is None:
+            pool_size = ConfigHelper.get_int_from_env(cls.TP_DRIVER_POOL_SIZE_VARIABLE_NAME, cls.DEFAULT_POOL_SIZE)
+        # get_timeout() returns None when no timeout was set, meaning that requests never time out
+        return urllib3.PoolManager(maxsize=pool_size, timeout=RemoteConnection.get_timeout())
+
+    @staticmethod
+    def get_connection_stats(pool_manager):
+        """Collects connection reuse metrics from a pool manager
+
+        Args:
+            pool_manager (urllib3.PoolManager): The pool manager used by a command executor
+
+        Returns:
+            dict: number of requests sent, connections opened and requests that reused an open connection
+        """
+        requests_sent = 0
+        connections_opened = 0
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+        return {
+            "requests": requests_sent,
+            "connections": connections_opened,
+            "reused": max(requests_sent - connections_opened, 0),
+        }
@@ -16,6 +16,7 @@ from selenium.webdriver.remote.command import Command
 
 from appium.webdriver.appium_connection import AppiumConnection
 from src.testproject.sdk.internal.agent import AgentClient
+from src.testproject.sdk.internal.helpers.connection_helper import ConnectionHelper
 from src.testproject.sdk.internal.helpers.reporting_command_executor import ReportingCommandExecutor
 
 
@@ -25,14 +26,22 @@ class CustomAppiumCommandExecutor(AppiumConnection, ReportingCommandExecutor):
     Args:
         agent_client (AgentClient): Client used to communicate with the TestProject Agent
         remote_server_addr (str): Remote server (Agent) address
+        keep_alive (bool): True to reuse open connections to the Agent between commands, False otherwise
     """
 
-    def __init__(self, agent_client, remote_server_addr):
-        AppiumConnection.__init__(self, remote_server_addr=remote_server_addr)
+    def __init__(self, agent_client, remote_server_addr, keep_alive=True):
+        AppiumConnection.__init__(self, remote_server_addr=remote_server_addr, keep_alive=keep_alive)
+        if keep_alive:
+            self._conn = ConnectionHelper.create_pool_manager()
         ReportingCommandExecutor.__init__(
             self, agent_client=agent_client, command_executor=self, remote_connection=super()
         )
 
+    @property
+    def connection_stats(self):
+        """Getter for the connection reuse metrics, None if keep-alive is disabled"""
+        return ConnectionHelper.get_connection_stats(self._conn) if self.keep_alive else None
+
     def execute(self, command, params, skip_reporting=False):
         """Execute an Appium command
 
@@ -44,11 +53,17 @@ class CustomAppiumCommandExecutor(AppiumConnection, ReportingCommandExecutor):
         Returns:
             response: Response returned by the Selenium remote WebDriver server
         """
+        if self.fast_path and command != Command.QUIT:
+            # Nothing to report or apply, send the command as it is
+            self.step_helper.track_implicit_wait(command, params)
+            return super().execute(command=command, params=params)
+
         self.update_known_test_name()
 
         response = {}
 
         self.step_helper.handle_timeout(self.settings.timeout)
+        self.step_helper.track_implicit_wait(command, params)
 
         # Handling sleep before execution
         self.step_helper.handle_sleep(self.settings.sleep_timing_type, self.settings.sleep_time, command)
@@ -60,6 +75,10 @@ class CustomAppiumCommandExecutor(AppiumConnection, ReportingCommandExecutor):
         # Handling sleep after execution
         self.step_helper.handle_sleep(self.settings.sleep_timing_type, self.settings.sleep_time, command, True)
 
+        if not self.disable_redaction:
+            # Keep track of found elements and page changes, so password fields are known before typing into them
+            self.redact_helper.observe(command, response)
+
         result = response.get("value")
 
         passed = self.is_command_passed(response=response)
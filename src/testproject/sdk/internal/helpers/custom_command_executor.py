@@ -12,9 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from selenium.webdriver.remote.command import Command
 from selenium.webdriver.remote.remote_connection import RemoteConnection
 
 from src.testproject.sdk.internal.agent import AgentClient
+from src.testproject.sdk.internal.helpers.connection_helper import ConnectionHelper
 from src.testproject.sdk.internal.helpers.reporting_command_executor import ReportingCommandExecutor
 
 
@@ -24,15 +26,23 @@ class CustomCommandExecutor(RemoteConnection, ReportingCommandExecutor):
     Args:
         agent_client (AgentClient): Client used to communicate with the TestProject Agent
         remote_server_addr (str): Remote server (Agent) address
+        keep_alive (bool): True to reuse open connections to the Agent between commands, False otherwise
     """
 
-    def __init__(self, agent_client, remote_server_addr):
-        RemoteConnection.__init__(self, remote_server_addr=remote_server_addr)
+    def __init__(self, agent_client, remote_server_addr, keep_alive=True):
+        RemoteConnection.__init__(self, remote_server_addr=remote_server_addr, keep_alive=keep_alive)
+        if keep_alive:
+            self._conn = ConnectionHelper.create_pool_manager()
         ReportingCommandExecutor.__init__(
             self, agent_client=agent_client, command_executor=self, remote_connection=super()
         )
         self.w3c = self.step_helper.w3c  # Selenium expects the w3c as a class member
 
+    @property
+    def connection_stats(self):
+        """Getter for the connection reuse metrics, None if keep-alive is disabled"""
+        return ConnectionHelper.get_connection_stats(self._conn) if self.keep_alive else None
+
     def execute(self, command, params, skip_reporting=False):
         """Execute a Selenium command
 
@@ -44,9 +54,15 @@ class CustomCommandExecutor(RemoteConnection, ReportingCommandExecutor):
         Returns:
             response: Response returned by the Selenium remote WebDriver server
         """
+        if self.fast_path and command != Command.QUIT:
+            # Nothing to report or apply, send the command as it is
+            self.step_helper.track_implicit_wait(command, params)
+            return super().execute(command=command, params=params)
+
         self.update_known_test_name()
 
         self.step_helper.handle_timeout(self.settings.timeout)
+        self.step_helper.track_implicit_wait(command, params)
 
         # Handling sleep before execution
         self.step_helper.handle_sleep(self.settings.sleep_timing_type, self.settings.sleep_time, command)
@@ -56,6 +72,10 @@ class CustomCommandExecutor(RemoteConnection, ReportingCommandExecutor):
         # Handling sleep after execution
         self.step_helper.handle_sleep(self.settings.sleep_timing_type, self.settings.sleep_time, command, True)
 
+        if not self.disable_redaction:
+            # Keep track of found elements and page changes, so password fields are known before typing into them
+            self.redact_helper.observe(command, response)
+
         result = response.get("value")
 
         passed = self.is_command_passed(response=response)
@@ -12,21 +12,50 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 from selenium.webdriver.remote.command import Command
 
 
 class RedactHelper:
     """Class providing helper methods for command redaction
 
+    Whether an element is secured (a password field) is cached per session, so that typing into the same element again
+    does not cost another round trip. Element IDs returned by find element commands are remembered, and on web sessions
+    the first cache miss resolves all of them in a single script call. The cache is cleared whenever the page or window
+    changes, as the elements it holds no longer exist.
+
     Args:
         command_executor: The command executor used to send WebDriver commands (Selenium or Appium)
 
     Attributes:
         _command_executor: The command executor used to send WebDriver commands (Selenium or Appium)
+        _secured_elements (dict): Whether an element is secured, by element ID
+        _unresolved_elements (collections.OrderedDict): IDs of elements found but not resolved yet, oldest first
     """
 
+    # Commands after which the previously found elements no longer exist
+    INVALIDATING_COMMANDS = frozenset(
+        [Command.GET, Command.GO_BACK, Command.GO_FORWARD, Command.REFRESH, Command.SWITCH_TO_WINDOW, Command.CLOSE]
+    )
+    FIND_ELEMENT_COMMANDS = frozenset(
+        [Command.FIND_ELEMENT, Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENT, Command.FIND_CHILD_ELEMENTS]
+    )
+    # Keys an element reference is stored under in W3C and JSON Wire Protocol responses
+    ELEMENT_KEYS = ("element-6066-11e4-a52e-4f735466cecf", "ELEMENT")
+    SECURED_TYPES = ("password", "XCUIElementTypeSecureTextField")
+    # Maximum number of elements resolved in a single script call
+    MAX_RESOLVED_ELEMENTS = 100
+    # Maximum number of elements cached, the cache is cleared when it is reached
+    MAX_CACHED_ELEMENTS = 10000
+    RESOLVE_TYPES_SCRIPT = (
+        "return Array.prototype.map.call(arguments, function (e) { return e.getAttribute('type'); });"
+    )
+
     def __init__(self, command_executor):
         self._command_executor = command_executor
+        self._secured_elements = {}
+        self._unresolved_elements = collections.OrderedDict()
 
     def redact_command(self, command, params):
         """Redacts sensitive contents (passwords) so they do not appear in the reports
@@ -50,6 +79,30 @@ class RedactHelper:
 
         return params
 
+    def observe(self, command, response):
+        """Keeps the cache in line with the page, based on an executed command and its response
+
+        Args:
+            command (str): The command that was executed
+            response (dict): The response returned by the Selenium remote WebDriver server
+        """
+        if command in self.INVALIDATING_COMMANDS:
+            self.clear()
+        elif command in self.FIND_ELEMENT_COMMANDS and response:
+            value = response.get("value")
+            for element in value if isinstance(value, list) else [value]:
+                element_id = self._element_id(element)
+                if element_id is not None and element_id not in self._secured_elements:
+                    self._unresolved_elements[element_id] = None
+            # Only the most recently found elements are worth resolving ahead of time
+            while len(self._unresolved_elements) > self.MAX_RESOLVED_ELEMENTS:
+                self._unresolved_elements.popitem(last=False)
+
+    def clear(self):
+        """Forgets all cached and unresolved elements"""
+        self._secured_elements.clear()
+        self._unresolved_elements.clear()
+
     def _redaction_required(self, element_id):
         """Checks if the element should be redacted
 
@@ -59,17 +112,70 @@ class RedactHelper:
         Returns:
             bool: True if the element should be redacted, False otherwise
         """
+        secured = self._secured_elements.get(element_id)
+        if secured is not None:
+            return secured
+
         capabilities = self._command_executor.agent_client.agent_session.capabilities
         platform_name = capabilities.get("platformName")
         browser_name = capabilities.get("browserName")
 
         # Check if element is a mobile password element
-        if platform_name.casefold() == "android":
-            # Check that we're not dealing with mobile web
-            if browser_name is None or browser_name == "":
-                return self._is_android_password_element(element_id)
+        if platform_name.casefold() == "android" and (browser_name is None or browser_name == ""):
+            secured = self._is_android_password_element(element_id)
+        elif browser_name:
+            secured = self._resolve_secured_elements(element_id)
+        else:
+            secured = self._is_secured_element(element_id)
+
+        self._cache(element_id, secured)
+        return secured
+
+    def _cache(self, element_id, secured):
+        """Caches whether an element is secured"""
+        if len(self._secured_elements) >= self.MAX_CACHED_ELEMENTS:
+            self._secured_elements.clear()
+        self._secured_elements[element_id] = secured
+        self._unresolved_elements.pop(element_id, None)
+
+    def _resolve_secured_elements(self, element_id):
+        """Checks if a web element is secured, resolving all unresolved elements in the same script call
 
-        return self._is_secured_element(element_id)
+        Args:
+            element_id (str): The ID of the element under investigation
+
+        Returns:
+            bool: True if the element is a secured element, False otherwise
+        """
+        self._unresolved_elements.pop(element_id, None)
+        element_ids = [element_id] + list(self._unresolved_elements)[-(self.MAX_RESOLVED_ELEMENTS - 1) :]
+        w3c = self._command_executor.step_helper.w3c
+        element_key = self.ELEMENT_KEYS[0] if w3c else self.ELEMENT_KEYS[1]
+        script_params = {
+            "sessionId": self._command_executor.agent_client.agent_session.session_id,
+            "script": self.RESOLVE_TYPES_SCRIPT,
+            "args": [{element_key: _id} for _id in element_ids],
+        }
+        script_response = self._command_executor.execute(
+            Command.W3C_EXECUTE_SCRIPT if w3c else Command.EXECUTE_SCRIPT, script_params, True
+        )
+        types = script_response.get("value") if script_response.get("status", 0) == 0 else None
+        if not isinstance(types, list) or len(types) != len(element_ids):
+            # One of the elements is gone, resolve the element under investigation on its own
+            self._unresolved_elements.clear()
+            return self._is_secured_element(element_id)
+
+        for _id, element_type in zip(element_ids[1:], types[1:]):
+            self._cache(_id, element_type in self.SECURED_TYPES)
+        return types[0] in self.SECURED_TYPES
+
+    def _element_id(self, element):
+        """Returns the ID of an element reference found in a response, None if it is not an element reference"""
+        if isinstance(element, dict):
+            for key in self.ELEMENT_KEYS:
+                if key in element:
+                    return element[key]
+        return None
 
     def _is_android_password_element(self, element_id):
         """Checks if the element is an Android password element
@@ -12,14 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import inspect
+import collections
+import copy
 import logging
 import time
 
 from selenium.webdriver.remote.command import Command
 
 from src.testproject.classes import StepSettings
-from src.testproject.helpers import ReportHelper
+from src.testproject.helpers import ConfigHelper, ReportHelper, TestLifecycleHelper, WaitScopeHelper
+from src.testproject.helpers.screenshot_helper import ScreenshotHelper
 from src.testproject.helpers.step_helper import StepHelper
 from src.testproject.rest.messages import CustomTestReport, DriverCommandReport
 from src.testproject.sdk.internal.agent import AgentClient
@@ -45,8 +47,17 @@ class ReportingCommandExecutor:
         inside WebDriverWait
         _latest_known_test_name (str): contains latest known test name
         _excluded_test_names (list): contains a list of test names that should not be reported
+        _redact_helper (RedactHelper): Redacts typed passwords, caching which elements are password fields
+        _fast_path (bool): True if commands are forwarded to the driver without being reported or having step
+        settings applied to them
+        _flight_recorder (collections.deque): Ring buffer holding the latest passed command reports until a failure
+        occurs, None if every command is reported
+        _flight_recorder_screenshot (bool): True if a screenshot is taken when a command fails in flight recorder mode
     """
 
+    TP_FLIGHT_RECORDER_SIZE_VARIABLE_NAME = "TP_REPORTS_FLIGHT_RECORDER_SIZE"
+    TP_FLIGHT_RECORDER_SCREENSHOT_VARIABLE_NAME = "TP_REPORTS_FLIGHT_RECORDER_SCREENSHOT"
+
     def __init__(self, agent_client, command_executor, remote_connection):
         self._agent_client = agent_client
         self._command_executor = command_executor
@@ -61,6 +72,13 @@ class ReportingCommandExecutor:
             remote_connection, agent_client.agent_session.dialect == "W3C", agent_client.agent_session.session_id
         )
         self._settings = StepSettings()
+        self._redact_helper = RedactHelper(self)
+        self._fast_path = False
+        self._flight_recorder = None
+        self.flight_recorder_size = ConfigHelper.get_int_from_env(self.TP_FLIGHT_RECORDER_SIZE_VARIABLE_NAME, 0)
+        self._flight_recorder_screenshot = ConfigHelper.get_bool_from_env(
+            self.TP_FLIGHT_RECORDER_SCREENSHOT_VARIABLE_NAME, False
+        )
 
     @property
     def disable_reports(self):
@@ -71,6 +89,7 @@ class ReportingCommandExecutor:
     def disable_reports(self, value):
         """Setter for the disable_reports flag"""
         self._disable_reports = value
+        self._update_fast_path()
 
     @property
     def disable_auto_test_reports(self):
@@ -126,12 +145,48 @@ class ReportingCommandExecutor:
     def settings(self, value):
         """Setter for the settings object."""
         self._settings = value
+        self._update_fast_path()
 
     @property
     def step_helper(self):
         """Getter for the StepHelper object."""
         return self._step_helper
 
+    @property
+    def fast_path(self):
+        """Getter for the fast path flag, True if commands are forwarded to the driver as they are"""
+        return self._fast_path
+
+    @property
+    def redact_helper(self):
+        """Getter for the redact helper"""
+        return self._redact_helper
+
+    @property
+    def flight_recorder_size(self):
+        """Getter for the number of passed command reports held back until a failure occurs, 0 if all are reported"""
+        return self._flight_recorder.maxlen if self._flight_recorder is not None else 0
+
+    @flight_recorder_size.setter
+    def flight_recorder_size(self, value):
+        """Setter for the number of passed command reports held back until a failure occurs, 0 to report all"""
+        if value > 0:
+            # Keep the latest command reports already held back
+            self._flight_recorder = collections.deque(self._flight_recorder or (), maxlen=value)
+        else:
+            self.flush_flight_recorder()
+            self._flight_recorder = None
+
+    @property
+    def flight_recorder_screenshot(self):
+        """Getter for the flag telling whether a screenshot is taken when a command fails in flight recorder mode"""
+        return self._flight_recorder_screenshot
+
+    @flight_recorder_screenshot.setter
+    def flight_recorder_screenshot(self, value):
+        """Setter for the flag telling whether a screenshot is taken when a command fails in flight recorder mode"""
+        self._flight_recorder_screenshot = value
+
     @property
     def test_name(self):
         """Getter for the latest known test name"""
@@ -142,6 +197,21 @@ class ReportingCommandExecutor:
         """Setter for the latest known test name"""
         self._latest_known_test_name = new_name
 
+    def _update_fast_path(self):
+        """Switches the fast path on when commands need neither to be reported nor to have step settings applied"""
+        fast_path = (
+            self._disable_reports
+            and self._settings.timeout <= 0
+            and not (self._settings.sleep_timing_type and self._settings.sleep_time > 0)
+        )
+        if fast_path and not self._fast_path:
+            # Commands on the fast path do not apply step settings, so revert the implicit wait of a step right away
+            self._step_helper.handle_timeout(self._settings.timeout)
+        elif self._fast_path and not fast_path:
+            # Test names are not followed on the fast path, catch up with the test running now
+            self._latest_known_test_name = ReportHelper.infer_test_name()
+        self._fast_path = fast_path
+
     def _report_command(self, command, params, result, passed):
         """Reports a driver command to the TestProject platform
 
@@ -159,33 +229,33 @@ class ReportingCommandExecutor:
 
         # Report commands to the agent only if reports are not disabled
         if self._disable_reports or self.disable_command_reports:
-            logging.debug("Command [{}] - [{'Passed' if passed is True else 'Failed'}]".format(command))
+            logging.debug("Command [%s] - [%s]", command, "Passed" if passed is True else "Failed")
             return
 
         if not self._disable_redaction:
-            params = RedactHelper(self).redact_command(command, params)
+            params = self._redact_helper.redact_command(command, params)
 
         # If the command is executed as part of a wait loop, we don't want to report it every time
-        self._is_webdriverwait = False
-
-        # See if the command is executed inside a wait loop
-        for frame in inspect.stack().__reversed__():
-            if str(frame.filename).find("wait.py") > 0:
-                self._is_webdriverwait = True
-                break
+        self._is_webdriverwait = WaitScopeHelper.in_wait_scope()
 
         # Handle step result and message.
         passed, step_message = self.step_helper.handle_step_result(
             step_result=passed, invert_result=self.settings.invert_result, always_pass=self.settings.always_pass
         )
-        screenshot = (
-            self.create_screenshot()
-            if self.step_helper.take_screenshot(self.settings.screenshot_condition, passed)
-            else None
+        if self._flight_recorder is not None:
+            # Only failed commands are reported right away, so screenshots are only taken at the point of failure
+            take_screenshot = not passed and (
+                self._flight_recorder_screenshot
+                or self.step_helper.take_screenshot(self.settings.screenshot_condition, passed)
+            )
+        else:
+            take_screenshot = self.step_helper.take_screenshot(self.settings.screenshot_condition, passed)
+        screenshot = self.create_screenshot() if take_screenshot else None
+
+        driver_command_report = DriverCommandReport(
+            command, params, self._detach_result(result), passed, screenshot, step_message
         )
 
-        driver_command_report = DriverCommandReport(command, params, result, passed, screenshot, step_message)
-
         if self._is_webdriverwait:
             if not self._disable_reports and not self.disable_command_reports:
                 # Only stash the command for reporting later when driver command reporting is enabled
@@ -195,28 +265,97 @@ class ReportingCommandExecutor:
         if not self._disable_reports and not self.disable_command_reports:
             if self._stashed_command is not None:
                 # report the stashed command and clear it
-                self.agent_client.report_driver_command(self._stashed_command)
+                self._submit_command_report(self._stashed_command)
                 self._stashed_command = None
             # report the current command
-            self.agent_client.report_driver_command(driver_command_report)
+            self._submit_command_report(driver_command_report)
+
+    def _submit_command_report(self, driver_command_report):
+        """Sends a command report to the Agent, or holds it back in the flight recorder if the command passed
+
+        Args:
+            driver_command_report (DriverCommandReport): The command report
+        """
+        if self._flight_recorder is not None:
+            if driver_command_report.passed:
+                self._flight_recorder.append(driver_command_report)
+                return
+            # Report the commands that led to the failure first
+            self.flush_flight_recorder()
+        self.agent_client.report_driver_command(driver_command_report)
+
+    def flush_flight_recorder(self):
+        """Reports the command reports held back by the flight recorder, typically because a failure occurred"""
+        while self._flight_recorder:
+            self.agent_client.report_driver_command(self._flight_recorder.popleft())
+
+    @classmethod
+    def _detach_result(cls, result):
+        """Returns a command result the driver will not modify once the command returns
+
+        Selenium replaces element references nested in a result with WebElement objects, in place. Reports are only
+        serialized later by the reporting thread, so results holding nested objects are copied.
+        """
+        return copy.deepcopy(result) if cls._modified_by_driver(result) else result
+
+    @classmethod
+    def _modified_by_driver(cls, value):
+        """Returns True if Selenium modifies the value in place when unwrapping a command result"""
+        if isinstance(value, dict):
+            return any(isinstance(item, (dict, list)) for item in value.values())
+        if isinstance(value, list):
+            return any(cls._modified_by_driver(item) for item in value)
+        return False
 
     def update_known_test_name(self):
         """Infers the current test name and if different from the latest known test name, reports a test"""
-        current_test_name = ReportHelper.infer_test_name()
+        managed_test = TestLifecycleHelper.current_test()
+        if managed_test is not None:
+            # The test framework plugin reports the test when it ends, there is nothing to infer
+            self._latest_known_test_name = managed_test.name
+            return
 
-        # Actions inside a unittest tearDown or tearDownClass method should be reported as part of the test
-        in_unittest_teardown = ReportHelper.find_unittest_teardown()
+        current_test_name = ReportHelper.infer_test_name()
 
-        if current_test_name not in [self._latest_known_test_name, "Unnamed Test"] and not in_unittest_teardown:
+        # Actions inside a unittest tearDown or tearDownClass method should be reported as part of the test.
+        # Walking the call stack to find out is only needed when the test name changed.
+        if (
+            current_test_name not in [self._latest_known_test_name, "Unnamed Test"]
+            and not ReportHelper.find_unittest_teardown()
+        ):
             # the name of the test method has changed and we're not inside a unittest teardown method,
             # so we need to report a test
             if not self.disable_auto_test_reports:
                 self.report_test()
+            elif self._flight_recorder is not None:
+                # Commands of the previous test should not be reported along with a failure of the next one
+                self._flight_recorder.clear()
             # update the latest known test name for future reports
             self._latest_known_test_name = current_test_name
 
     def report_test(self):
-        """Sends a test report to the Agent if this option is not explicitly disabled"""
+        """Sends a test report to the Agent if this option is not explicitly disabled
+
+        While a test framework plugin manages the test lifecycle, the running test is reported with its outcome,
+        at most once.
+        """
+        passed, message = True, None
+        managed_test = TestLifecycleHelper.current_test()
+        if managed_test is not None:
+            if managed_test.reported or managed_test.skipped:
+                return
+            managed_test.reported = True
+            self._latest_known_test_name = managed_test.name
+            passed, message = managed_test.passed, managed_test.message
+            logging.debug(
+                "Test [{}] - [{}] in {:.3f} s".format(
+                    managed_test.name, "Passed" if passed else "Failed", managed_test.duration
+                )
+            )
+
+        if passed and self._flight_recorder is not None:
+            # Commands that led to a passed test are not reported
+            self._flight_recorder.clear()
 
         if not self._latest_known_test_name == "Unnamed Test":
 
@@ -231,21 +370,30 @@ class ReportingCommandExecutor:
                 logging.debug(
                     "Test [{}] - Reporting skipped (marked as 'To be excluded')".format(self._latest_known_test_name)
                 )
+                if self._flight_recorder is not None:
+                    self._flight_recorder.clear()
                 return
 
-            custom_test_report = CustomTestReport(name=self._latest_known_test_name, passed=True)
+            if not passed:
+                # Report the commands that led to the test failure first
+                self.flush_flight_recorder()
+
+            custom_test_report = CustomTestReport(name=self._latest_known_test_name, passed=passed, message=message)
             self.agent_client.report_test(custom_test_report)
 
     def create_screenshot(self):
         """Creates a screenshot (PNG) and returns it as a base64 encoded string
 
+        When the step settings or the environment ask for screenshots to be downscaled or re-encoded, the screenshot is
+        processed by worker threads and returned as a ProcessedScreenshot, resolved when its report is serialized.
+
         Returns:
             str: The base64 encoded screenshot in PNG format (or None if screenshot taking fails)
         """
         create_screenshot_params = {"sessionId": self.agent_client.agent_session.session_id}
         create_screenshot_response = self._command_executor.execute(Command.SCREENSHOT, create_screenshot_params, True)
         try:
-            return create_screenshot_response["value"]
+            return ScreenshotHelper.process(create_screenshot_response["value"], self.settings)
         except KeyError as ke:
             logging.error("Error occurred creating a screenshot: {}".format(ke))
             logging.error("Response from RemoteWebDriver: {}".format(create_screenshot_response))
@@ -258,7 +406,7 @@ class ReportingCommandExecutor:
         if not self._disable_reports and not self.disable_command_reports:
             if self._stashed_command is not None:
                 # report the stashed command and clear it
-                self.agent_client.report_driver_command(self._stashed_command)
+                self._submit_command_report(self._stashed_command)
                 self._stashed_command = None
 
     @staticmethod
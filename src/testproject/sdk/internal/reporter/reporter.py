@@ -51,6 +51,10 @@ class Reporter:
 
         if not self._command_executor.disable_reports:
 
+            if not passed:
+                # Report the commands that led to the failure first
+                self._command_executor.flush_flight_recorder()
+
             step_report = StepReport(
                 description,
                 message,
@@ -83,6 +87,10 @@ class Reporter:
                         "when creating a driver instance to avoid duplicates in the report"
                     )
 
+            if not passed:
+                # Report the commands that led to the failure first
+                self._command_executor.flush_flight_recorder()
+
             test_report = CustomTestReport(name=name, passed=passed, message=message)
 
             self._command_executor.agent_client.report_test(test_report)
@@ -122,6 +130,19 @@ class Reporter:
         """
         self._command_executor.disable_redaction = disabled
 
+    def flight_recorder(self, size, screenshot=False):
+        """Enables or disables flight recorder mode for driver command reports
+
+        In flight recorder mode, the latest passed driver commands are held back in memory and only reported when a
+        command, step or test fails, right before the failure. Steps, tests and failed commands are always reported.
+
+        Args:
+            size (int): Number of passed driver commands held back, set to 0 to report all driver commands.
+            screenshot (bool): Set to True to take a screenshot when a driver command fails.
+        """
+        self._command_executor.flight_recorder_size = size
+        self._command_executor.flight_recorder_screenshot = screenshot
+
     def exclude_test_names(self, excluded_test_names):
         """Excludes a list of test names (as strings) from being reported
 
@@ -0,0 +1,27 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import sys
+
+import src
+
+
+def test_classes_package_is_imported_on_its_own():
+    # A fresh interpreter, the test session already imported the helpers package the classes package must not need
+    root = os.path.dirname(os.path.dirname(os.path.abspath(src.__file__)))
+    result = subprocess.run([sys.executable, "-c", "import src.testproject.classes"], cwd=root, capture_output=True)
+
+    assert result.returncode == 0, result.stderr.decode()
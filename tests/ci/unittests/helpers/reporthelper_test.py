@@ -16,7 +16,13 @@ import os
 import pytest
 
 from src.testproject.enums import ReportNamingElement
-from src.testproject.helpers import ReportHelper
+from src.testproject.helpers import ReportHelper, TestLifecycleHelper
+
+
+@pytest.fixture(autouse=True)
+def unmanaged_test(monkeypatch):
+    """Infers names as if no plugin managed the running test, such as the SDK's pytest plugin when it is installed"""
+    monkeypatch.setattr(TestLifecycleHelper, "_TestLifecycleHelper__current_test", None)
 
 
 def test_test_name_is_inferred_correctly_from_method_name():
@@ -40,3 +46,40 @@ def test_test_name_is_inferred_correctly_from_method_name_and_parameter_values(
         ReportHelper.infer_name_from_pytest_info_for(current_test_info, ReportNamingElement.Test)
         == f"test_test_name_is_inferred_correctly_from_method_name_and_parameter_values[{parameter}]"
     )
+
+
+def test_inferred_names_are_cached_until_pytest_test_changes(monkeypatch, mocker):
+    monkeypatch.setenv("PYTEST_CURRENT_TEST", "tests/web/login_test.py::test_login (call)")
+    parse = mocker.spy(ReportHelper, "infer_name_from_pytest_info_for")
+
+    assert ReportHelper.infer_test_name() == "test_login"
+    assert ReportHelper.infer_test_name() == "test_login"
+    assert ReportHelper.infer_job_name() == "login_test"
+    assert parse.call_count == 2
+
+    monkeypatch.setenv("PYTEST_CURRENT_TEST", "tests/web/login_test.py::test_logout (call)")
+
+    assert ReportHelper.infer_test_name() == "test_logout"
+    assert parse.call_count == 3
+
+
+def test_decorator_test_name_invalidates_cached_names(monkeypatch):
+    monkeypatch.setenv("PYTEST_CURRENT_TEST", "tests/web/login_test.py::test_login (call)")
+    assert ReportHelper.infer_test_name() == "test_login"
+
+    monkeypatch.setenv("TP_TEST_NAME", "Login with valid credentials")
+    assert ReportHelper.infer_test_name() == "Login with valid credentials"
+
+    monkeypatch.delenv("TP_TEST_NAME")
+    assert ReportHelper.infer_test_name() == "test_login"
+
+
+def test_names_inferred_from_call_stack_are_not_cached(monkeypatch, mocker):
+    monkeypatch.delenv("PYTEST_CURRENT_TEST")
+    find_in_call_stack = mocker.patch.object(
+        ReportHelper, "_ReportHelper__find_name_in_call_stack_for", side_effect=["test_one", "test_two"]
+    )
+
+    assert ReportHelper.infer_test_name() == "test_one"
+    assert ReportHelper.infer_test_name() == "test_two"
+    assert find_in_call_stack.call_count == 2
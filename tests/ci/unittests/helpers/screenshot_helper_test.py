@@ -0,0 +1,91 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import io
+from concurrent.futures import Future
+
+import pytest
+
+from src.testproject.classes import DriverStepSettings, StepSettings
+from src.testproject.enums import ScreenshotFormat
+from src.testproject.helpers import screenshot_helper
+from src.testproject.helpers.screenshot_helper import ProcessedScreenshot, ScreenshotHelper
+from src.testproject.rest.messages import DriverCommandReport
+
+SCREENSHOT = base64.b64encode(b"\x89PNG screenshot").decode("ascii")
+
+
+@pytest.fixture(autouse=True)
+def clear_env(monkeypatch):
+    for variable_name in (
+        ScreenshotHelper.TP_FORMAT_VARIABLE_NAME,
+        ScreenshotHelper.TP_MAX_DIMENSION_VARIABLE_NAME,
+        ScreenshotHelper.TP_QUALITY_VARIABLE_NAME,
+    ):
+        monkeypatch.delenv(variable_name, raising=False)
+
+
+def test_options_are_taken_from_settings_then_environment(monkeypatch):
+    monkeypatch.setenv(ScreenshotHelper.TP_FORMAT_VARIABLE_NAME, "WebP")
+    monkeypatch.setenv(ScreenshotHelper.TP_MAX_DIMENSION_VARIABLE_NAME, "1280")
+
+    assert ScreenshotHelper.options(StepSettings()) == (ScreenshotFormat.WebP, 1280, ScreenshotHelper.DEFAULT_QUALITY)
+    assert ScreenshotHelper.options(
+        StepSettings(screenshot_format=ScreenshotFormat.Jpeg, screenshot_max_dimension=0, screenshot_quality=150)
+    ) == (ScreenshotFormat.Jpeg, 0, 100)
+
+
+def test_screenshot_is_kept_as_taken_without_options():
+    assert ScreenshotHelper.process(SCREENSHOT, StepSettings()) is SCREENSHOT
+
+
+def test_screenshot_is_kept_as_taken_without_pillow(monkeypatch):
+    monkeypatch.setattr(screenshot_helper, "Image", None)
+
+    assert ScreenshotHelper.process(SCREENSHOT, StepSettings(screenshot_max_dimension=800)) is SCREENSHOT
+
+
+def test_screenshot_is_reported_as_taken_when_processing_fails():
+    future = Future()
+    future.set_exception(OSError("cannot identify image file"))
+    report = DriverCommandReport("findElement", {}, {}, False, ProcessedScreenshot(future, SCREENSHOT))
+
+    assert report.to_json()["screenshot"] == SCREENSHOT
+
+
+def test_screenshot_is_downscaled_and_reencoded():
+    image_module = pytest.importorskip("PIL.Image")
+    output = io.BytesIO()
+    image_module.new("RGBA", (3840, 2160), (30, 120, 200, 255)).save(output, "PNG")
+    screenshot = base64.b64encode(output.getvalue()).decode("ascii")
+
+    processed = ScreenshotHelper.process(
+        screenshot, StepSettings(screenshot_format=ScreenshotFormat.Jpeg, screenshot_max_dimension=1280)
+    )
+    image = image_module.open(io.BytesIO(base64.b64decode(str(processed))))
+
+    assert image.format == "JPEG"
+    assert image.size == (1280, 720)
+
+
+def test_step_settings_inherit_screenshot_options(mocker):
+    driver = mocker.Mock()
+    driver.command_executor.settings = StepSettings(screenshot_format=ScreenshotFormat.Jpeg, screenshot_quality=60)
+
+    step_settings = DriverStepSettings(driver, StepSettings(screenshot_quality=90)).step_settings
+
+    assert step_settings.screenshot_format is ScreenshotFormat.Jpeg
+    assert step_settings.screenshot_max_dimension is None
+    assert step_settings.screenshot_quality == 90
@@ -0,0 +1,60 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from selenium.webdriver.remote.command import Command
+
+from src.testproject.helpers.step_helper import StepHelper
+
+
+@pytest.fixture()
+def step_helper(mocker):
+    return StepHelper(mocker.Mock(), True, "1234")
+
+
+def implicit_waits(step_helper):
+    return [call.args[1]["implicit"] for call in step_helper.executor.execute.call_args_list]
+
+
+def test_implicit_wait_is_only_set_when_step_timeout_changes(step_helper):
+    for timeout in [5000, 5000, 5000, 2000, 2000]:
+        step_helper.handle_timeout(timeout)
+
+    assert implicit_waits(step_helper) == [5000, 2000]
+
+
+def test_implicit_wait_is_not_set_without_step_timeout(step_helper):
+    step_helper.handle_timeout(-1)
+    step_helper.restore_timeout(-1)
+    step_helper.handle_timeout(-1)
+
+    step_helper.executor.execute.assert_not_called()
+
+
+def test_user_implicit_wait_is_restored_after_step(step_helper):
+    step_helper.track_implicit_wait(Command.SET_TIMEOUTS, {"implicit": 1000})
+    step_helper.handle_timeout(5000)
+    step_helper.restore_timeout(-1)
+    step_helper.handle_timeout(-1)
+    step_helper.handle_timeout(-1)
+
+    assert implicit_waits(step_helper) == [5000, 1000]
+
+
+def test_implicit_wait_is_kept_when_previous_settings_have_a_timeout(step_helper):
+    step_helper.handle_timeout(5000)
+    step_helper.restore_timeout(5000)
+    step_helper.handle_timeout(5000)
+
+    assert implicit_waits(step_helper) == [5000]
@@ -0,0 +1,45 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from selenium.webdriver.support.wait import WebDriverWait
+
+from src.testproject.helpers import WaitScopeHelper
+
+
+def test_commands_outside_wait_scope_are_not_detected():
+    assert not WaitScopeHelper.in_wait_scope()
+
+
+def test_wait_scope_is_restored_on_exit():
+    with WaitScopeHelper.wait_scope():
+        with WaitScopeHelper.wait_scope():
+            assert WaitScopeHelper.in_wait_scope()
+        assert WaitScopeHelper.in_wait_scope()
+    assert not WaitScopeHelper.in_wait_scope()
+
+
+def test_wait_scope_does_not_leak_to_other_threads():
+    detected = []
+    with WaitScopeHelper.wait_scope():
+        thread = threading.Thread(target=lambda: detected.append(WaitScopeHelper.in_wait_scope()))
+        thread.start()
+        thread.join()
+
+    assert detected == [False]
+
+
+def test_selenium_webdriverwait_is_detected_without_explicit_scope():
+    assert WebDriverWait(driver=None, timeout=1).until(lambda driver: WaitScopeHelper.in_wait_scope())
@@ -0,0 +1,120 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+import src
+from src.testproject.helpers import TestLifecycleHelper
+from src.testproject.plugins import pytest_plugin
+
+pytest_plugins = ["pytester"]
+
+PLUGIN = "src.testproject.plugins.pytest_plugin"
+# The plugin is loaded by module name, rather than through its entry point whether the SDK is installed or not
+PLUGIN_ARGS = ("-p", "no:testproject", "-p", PLUGIN)
+
+
+@pytest.fixture()
+def reported_tests(monkeypatch, mocker):
+    """Replaces the active driver with one recording the managed tests it is asked to report"""
+    reported = []
+
+    def report_test():
+        test = TestLifecycleHelper.current_test()
+        reported.append((test.name, test.passed, test.message, test.skipped))
+
+    driver = mocker.Mock()
+    driver.command_executor.disable_auto_test_reports = False
+    driver.command_executor.report_test.side_effect = report_test
+    monkeypatch.setattr(pytest_plugin, "_active_driver", lambda: driver)
+    return reported
+
+
+def test_names_are_taken_from_the_running_test(testdir):
+    testdir.makepyfile(login_test="""
+        from src.testproject.helpers import ReportHelper, TestLifecycleHelper
+
+        def test_login():
+            assert TestLifecycleHelper.current_test().name == "test_login"
+            assert ReportHelper.infer_job_name() == "login_test"
+        """)
+    result = testdir.runpytest_inprocess(*PLUGIN_ARGS, "--testproject-report-tests")
+
+    result.assert_outcomes(passed=1)
+    assert TestLifecycleHelper.current_test() is None
+
+
+def test_tests_are_reported_with_their_outcome(testdir, reported_tests):
+    testdir.makepyfile(login_test="""
+        import pytest
+
+        def test_passing():
+            pass
+
+        def test_failing():
+            assert 1 == 2
+
+        @pytest.mark.skip()
+        def test_skipped():
+            pass
+        """)
+    result = testdir.runpytest_inprocess(*PLUGIN_ARGS)
+
+    result.assert_outcomes(passed=1, failed=1, skipped=1)
+    assert reported_tests[0] == ("test_passing", True, None, False)
+    assert reported_tests[1][:2] == ("test_failing", False)
+    assert reported_tests[1][2].startswith("AssertionError")
+    # Skipped tests are handed to the executor, which does not report them
+    assert reported_tests[2][3] is True
+
+
+def test_plugin_loads_before_the_sdk_is_imported(testdir, monkeypatch):
+    # A fresh interpreter, as when pytest loads the plugin through its entry point
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(os.path.abspath(src.__file__))))
+    testdir.makepyfile(trivial_test="""
+        def test_trivial():
+            pass
+        """)
+    result = testdir.runpytest_subprocess(*PLUGIN_ARGS)
+
+    result.assert_outcomes(passed=1)
+
+
+def test_tests_are_not_managed_without_a_driver(testdir):
+    testdir.makepyfile(login_test="""
+        from src.testproject.helpers import TestLifecycleHelper
+
+        def test_login():
+            assert TestLifecycleHelper.current_test() is None
+        """)
+    result = testdir.runpytest_inprocess(*PLUGIN_ARGS)
+
+    result.assert_outcomes(passed=1)
+
+
+def test_managed_test_ends_when_reporting_it_fails(testdir, monkeypatch, mocker):
+    driver = mocker.Mock()
+    driver.command_executor.disable_auto_test_reports = False
+    driver.command_executor.report_test.side_effect = IOError("Agent is gone")
+    monkeypatch.setattr(pytest_plugin, "_active_driver", lambda: driver)
+    testdir.makepyfile(login_test="""
+        def test_login():
+            pass
+        """)
+    testdir.runpytest_inprocess(*PLUGIN_ARGS)
+
+    assert driver.command_executor.report_test.called
+    assert TestLifecycleHelper.current_test() is None
@@ -86,3 +86,15 @@ def test_to_json_with_screenshot(dcr_with_screenshot):
         "message": None,
         "type": "Command",
     }
+
+
+def test_instances_with_dict_parameters_can_be_hashed(dcr):
+    another_dcr = DriverCommandReport(
+        command="command",
+        command_params={"param": "value"},
+        result={"result": "value"},
+        passed=True,
+    )
+
+    assert hash(another_dcr) == hash(dcr)
+    assert len({dcr, another_dcr}) == 1
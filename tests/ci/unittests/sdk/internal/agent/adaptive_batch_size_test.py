@@ -0,0 +1,50 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from src.testproject.sdk.internal.agent.adaptive_batch_size import AdaptiveBatchSize
+
+
+@pytest.fixture()
+def batch_size():
+    return AdaptiveBatchSize(initial_size=10, min_size=1, max_size=12, target_latency_ms=100)
+
+
+def test_size_grows_additively_while_reports_are_waiting(batch_size):
+    batch_size.on_batch_sent(round_trip_ms=20, passed=True, backlog=50)
+    batch_size.on_batch_sent(round_trip_ms=20, passed=True, backlog=50)
+    assert batch_size.size == 12
+
+    # Never grows beyond the maximum size
+    batch_size.on_batch_sent(round_trip_ms=20, passed=True, backlog=50)
+    assert batch_size.size == 12
+
+
+def test_size_does_not_grow_when_reporting_keeps_up(batch_size):
+    batch_size.on_batch_sent(round_trip_ms=20, passed=True, backlog=0)
+    assert batch_size.size == 10
+
+
+def test_size_is_halved_when_agent_is_slow(batch_size):
+    batch_size.on_batch_sent(round_trip_ms=500, passed=True, backlog=50)
+    assert batch_size.size == 5
+    assert batch_size.latency_ms == 500
+
+
+def test_size_is_halved_on_failure_down_to_minimum(batch_size):
+    for _ in range(10):
+        batch_size.on_batch_sent(round_trip_ms=20, passed=False, backlog=50)
+    assert batch_size.size == 1
+    assert batch_size.error_rate > 0.5
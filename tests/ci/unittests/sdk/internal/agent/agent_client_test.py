@@ -21,6 +21,7 @@ from src.testproject.sdk.addons import ActionProxy
 from src.testproject.rest.messages.agentstatusresponse import AgentStatusResponse
 from src.testproject.sdk.exceptions import SdkException, AgentConnectException
 from src.testproject.sdk.internal.agent import AgentClient
+from src.testproject.sdk.internal.agent.agent_client import Endpoint
 from src.testproject.helpers import ConfigHelper
 
 
@@ -109,3 +110,48 @@ def test_action_proxy_payload_is_correctly_formatted():
     assert payload["className"] == "my_classname"
     assert payload["guid"] == "my_guid"
     assert payload["parameters"] == {"key": "value"}
+
+
+@responses.activate
+def test_agent_requests_share_a_single_transport(mocked_agent_address, mocker):
+
+    responses.add(responses.GET, "http://localhost:9876/api/status", json={"tag": "1.2.3"}, status=200)
+
+    transport = AgentClient._get_transport()
+    request = mocker.spy(transport, "request")
+
+    AgentClient.get_agent_version(token="1234")
+    AgentClient.get_agent_version(token="1234")
+
+    assert AgentClient._get_transport() is transport
+    assert request.call_count == 2
+    assert request.call_args.kwargs["timeout"] == Endpoint.GetStatus.timeout / 1000.0
+
+
+@responses.activate
+def test_send_request_applies_timeout_and_request_parameters(mocker):
+
+    responses.add(responses.POST, "http://localhost:9876/api/addons/executions", json={"key": "value"}, status=200)
+
+    # Arrange - Create a client without starting a session with the Agent
+    agent_client = AgentClient.__new__(AgentClient)
+    agent_client._token = "1234"
+    request = mocker.spy(AgentClient._get_transport(), "request")
+
+    result = agent_client.send_request(
+        "POST",
+        "http://localhost:9876/api/addons/executions",
+        {"guid": "my_guid"},
+        {"skipReporting": "true"},
+        timeout=Endpoint.AddonExecution.timeout,
+    )
+
+    assert result.passed
+    assert result.data == {"key": "value"}
+    assert responses.calls[0].request.url.endswith("?skipReporting=true")
+    assert responses.calls[0].request.headers["Authorization"] == "1234"
+    assert request.call_args.kwargs["timeout"] == Endpoint.AddonExecution.timeout / 1000.0
+
+
+def test_every_endpoint_defines_a_timeout():
+    assert all(endpoint.timeout > 0 for endpoint in Endpoint)
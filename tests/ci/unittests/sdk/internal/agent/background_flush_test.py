@@ -0,0 +1,55 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+
+from src.testproject.sdk.internal.agent.background_flush import BackgroundFlush
+from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+from tests.ci.unittests.sdk.internal.agent.fakes import GatedTransport, command
+
+REPORT_URL = "http://localhost:9876/api/development/report/command"
+
+
+def test_nonblocking_stop_keeps_sending_reports_in_the_background(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_NONBLOCKING_QUIT", "true")
+    transport = GatedTransport()
+    reports_queue = ReportsQueue(token="1234", transport=transport)
+    reports_queue.submit(report_as_json=command(0), url=REPORT_URL, block=False)
+
+    start = time.monotonic()
+    reports_queue.stop()
+
+    assert time.monotonic() - start < 1
+    assert reports_queue in BackgroundFlush.pending()
+
+    transport.gate.set()
+
+    assert BackgroundFlush.flush(timeout=5)
+    assert transport.reports == [command(0)]
+    assert reports_queue not in BackgroundFlush.pending()
+
+
+def test_reports_of_next_queue_wait_for_queues_stopped_before():
+    transport = GatedTransport()
+    first_queue = ReportsQueue(token="1234", transport=transport)
+    first_queue.submit(report_as_json=command(0), url=REPORT_URL, block=False)
+    first_queue.stop(block=False)
+
+    second_queue = ReportsQueue(token="1234", transport=transport)
+    second_queue.submit(report_as_json=command(1), url=REPORT_URL, block=False)
+    transport.gate.set()
+    second_queue.stop()
+
+    assert transport.reports == [command(0), command(1)]
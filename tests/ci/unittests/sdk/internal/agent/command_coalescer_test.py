@@ -0,0 +1,107 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pytest
+
+from src.testproject.rest.messages import CustomTestReport, DriverCommandReport
+from src.testproject.sdk.internal.agent.command_coalescer import CommandCoalescer
+
+COMMAND_URL = "http://localhost:9876/api/development/report/command"
+TEST_URL = "http://localhost:9876/api/development/report/test"
+
+
+@pytest.fixture()
+def submitted():
+    return []
+
+
+@pytest.fixture()
+def coalescer(submitted):
+    return CommandCoalescer(lambda report, url: submitted.append(report))
+
+
+def find_elements(value="#submit", result=None):
+    return DriverCommandReport(
+        "findElements", {"using": "css selector", "value": value}, result if result is not None else [], True
+    )
+
+
+def test_run_of_identical_commands_is_reported_once(coalescer, submitted):
+    for _ in range(5):
+        coalescer.submit(find_elements(), COMMAND_URL)
+    coalescer.submit(find_elements(result=[{"element-6066": "1"}]), COMMAND_URL)
+    coalescer.flush()
+
+    assert [report.repeat_count for report in submitted] == [5, 1]
+    assert submitted[0].to_json()["message"].startswith("Repeated 5 times in ")
+    assert submitted[1].to_json()["message"] is None
+
+
+def test_parameters_are_compared_regardless_of_key_order(coalescer, submitted):
+    coalescer.submit(DriverCommandReport("findElement", {"using": "id", "value": "a"}, {}, True), COMMAND_URL)
+    coalescer.submit(DriverCommandReport("findElement", {"value": "a", "using": "id"}, {}, True), COMMAND_URL)
+    coalescer.flush()
+
+    assert len(submitted) == 1
+    assert submitted[0].repeat_count == 2
+
+
+def test_held_command_is_reported_before_other_reports(coalescer, submitted):
+    coalescer.submit(find_elements(), COMMAND_URL)
+    coalescer.submit(find_elements(), COMMAND_URL)
+    test_report = CustomTestReport(name="test_polling", passed=True)
+    coalescer.submit(test_report, TEST_URL)
+
+    assert len(submitted) == 2
+    assert submitted[0].repeat_count == 2
+    assert submitted[1] is test_report
+
+
+def test_commands_with_screenshots_are_not_coalesced(coalescer, submitted):
+    for _ in range(2):
+        report = find_elements()
+        report.screenshot = "base64_screenshot"
+        coalescer.submit(report, COMMAND_URL)
+
+    assert [report.repeat_count for report in submitted] == [1, 1]
+
+
+def test_only_listed_commands_are_coalesced(monkeypatch, submitted):
+    monkeypatch.setenv("TP_REPORTS_COALESCE_COMMANDS", "findElement, getElementAttribute")
+    coalescer = CommandCoalescer.from_env(lambda report, url: submitted.append(report))
+    for _ in range(3):
+        coalescer.submit(find_elements(), COMMAND_URL)
+    coalescer.flush()
+
+    assert coalescer.commands == {"findElement", "getElementAttribute"}
+    assert len(submitted) == 3
+
+
+def test_coalescing_is_turned_off_by_default(monkeypatch):
+    monkeypatch.delenv("TP_REPORTS_COALESCE_COMMANDS", raising=False)
+
+    assert CommandCoalescer.from_env(lambda report, url: None) is None
+
+
+def test_all_commands_are_coalesced_when_turned_on(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_COALESCE_COMMANDS", "*")
+
+    assert CommandCoalescer.from_env(lambda report, url: None).commands is None
+
+
+def test_coalescing_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_COALESCE_COMMANDS", "none")
+
+    assert CommandCoalescer.from_env(lambda report, url: None) is None
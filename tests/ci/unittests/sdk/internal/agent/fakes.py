@@ -0,0 +1,43 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from json import loads
+
+import requests
+
+
+class GatedTransport:
+    """Transport stub holding the reports back until its gate is opened, then recording them"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.reports = []
+
+    def post(self, url, token, json=None, timeout=None, compression=None, data=None, content_encoding=None):
+        self.gate.wait()
+        self.reports.append(loads(data))
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+def command(index=0, name="findElement", passed=True):
+    """Returns a driver command report as submitted to the reports queue"""
+    return {"type": "Command", "commandName": name, "index": index, "passed": passed}
+
+
+def closing_test(name):
+    """Returns a test report, which closes the test the reports submitted before it belong to"""
+    return {"type": "Test", "name": name, "passed": True}
@@ -0,0 +1,54 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import requests
+
+from src.testproject.sdk.internal.agent import json_serializer
+from src.testproject.sdk.internal.agent.json_serializer import JsonSerializer
+from src.testproject.sdk.internal.agent.reports_queue import QueueItem
+from src.testproject.sdk.internal.agent.retry_policy import RetryPolicy
+
+REPORT = {"type": "Command", "commandName": "executeScript", "result": {"rows": list(range(100))}}
+
+
+def test_json_encoder_is_used_when_orjson_is_not_installed(monkeypatch):
+    monkeypatch.setattr(json_serializer, "orjson", None)
+
+    serializer = JsonSerializer(encoder="orjson")
+
+    assert serializer.encoder == JsonSerializer.JSON
+    assert json.loads(serializer.dumps(REPORT)) == REPORT
+
+
+def test_encoder_is_taken_from_environment(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_JSON_ENCODER", "json")
+
+    assert JsonSerializer().encoder == JsonSerializer.JSON
+
+
+def test_report_is_serialized_once_across_retries(mocker):
+    dumps = mocker.spy(JsonSerializer.instance(), "dumps")
+    failed = requests.Response()
+    failed.status_code = 500
+    transport = mocker.Mock()
+    transport.post.return_value = failed
+
+    item = QueueItem(report_as_json=REPORT, url="http://localhost:8585/api/development/report/command", token="1234")
+    item.send(transport, RetryPolicy(max_attempts=3, base_delay=0))
+
+    assert transport.post.call_count == 3
+    assert dumps.call_count == 1
+    assert json.loads(transport.post.call_args.kwargs["data"]) == REPORT
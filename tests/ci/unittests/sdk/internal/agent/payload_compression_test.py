@@ -0,0 +1,124 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import json
+import zlib
+
+import pytest
+import responses
+
+from src.testproject.classes import BatchSettings
+from src.testproject.sdk.internal.agent.http_transport import HttpTransport
+from src.testproject.sdk.internal.agent.payload_compression import PayloadCompression
+from src.testproject.sdk.internal.agent.reports_queue_batch import ReportsQueueBatch
+
+BATCH_URL = "http://localhost:9876/api/development/report/batch"
+SCREENSHOT_REPORT = {"type": "Step", "screenshot": "iVBORw0KGgo" * 500}
+
+
+@pytest.mark.parametrize("encoding, decompress", [("gzip", gzip.decompress), ("deflate", zlib.decompress)])
+def test_body_above_threshold_is_compressed(encoding, decompress):
+    body = json.dumps(SCREENSHOT_REPORT).encode("utf-8")
+
+    data, content_encoding = PayloadCompression(encoding, threshold_bytes=1024).encode(body)
+
+    assert content_encoding == encoding
+    assert len(data) < len(body)
+    assert decompress(data) == body
+
+
+def test_body_below_threshold_is_sent_as_is():
+    body = json.dumps({"type": "Test", "passed": True}).encode("utf-8")
+
+    assert PayloadCompression("gzip", threshold_bytes=1024).encode(body) == (body, None)
+
+
+def test_invalid_compression_in_environment_disables_compression(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_COMPRESSION", "brotli")
+
+    assert PayloadCompression.from_settings(None, None, "TP_REPORTS_COMPRESSION", "TP_THRESHOLD") is None
+
+
+@responses.activate
+def test_batches_are_posted_compressed():
+    responses.add(responses.POST, BATCH_URL, status=200)
+
+    reports_queue = ReportsQueueBatch(
+        "1234",
+        BATCH_URL,
+        HttpTransport(),
+        BatchSettings(compression="gzip", compression_threshold_bytes=100),
+        compression_supported=True,
+    )
+    reports_queue.submit(report_as_json=SCREENSHOT_REPORT, url=None, block=False)
+    reports_queue.stop()
+
+    request = responses.calls[0].request
+    assert request.headers["Content-Encoding"] == "gzip"
+    assert request.headers["Content-Type"] == "application/json"
+    assert json.loads(gzip.decompress(request.body)) == [SCREENSHOT_REPORT]
+
+
+def test_compression_is_disabled_when_agent_does_not_support_it(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_COMPRESSION", "gzip")
+
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, HttpTransport(), compression_supported=False)
+    reports_queue.stop()
+
+    assert reports_queue.compression is None
+
+
+def compressed_batch_queue():
+    return ReportsQueueBatch(
+        "1234",
+        BATCH_URL,
+        HttpTransport(),
+        BatchSettings(compression="gzip", compression_threshold_bytes=100),
+        compression_supported=True,
+    )
+
+
+@responses.activate
+def test_batches_are_compressed_once_however_many_attempts(monkeypatch, mocker):
+    monkeypatch.setenv("TP_REPORTS_RETRY_BASE_DELAY_MS", "1")
+    responses.add(responses.POST, BATCH_URL, status=503)
+    responses.add(responses.POST, BATCH_URL, status=200)
+
+    reports_queue = compressed_batch_queue()
+    encode = mocker.spy(reports_queue.compression, "encode")
+    reports_queue.submit(report_as_json=SCREENSHOT_REPORT, url=None, block=False)
+    reports_queue.stop()
+
+    assert encode.call_count == 1
+    assert [call.request.headers["Content-Encoding"] for call in responses.calls] == ["gzip", "gzip"]
+    assert responses.calls[0].request.body == responses.calls[1].request.body
+
+
+@responses.activate
+def test_batches_are_sent_uncompressed_once_the_agent_rejected_compression(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_MAX_ATTEMPTS", "1")
+    responses.add(responses.POST, BATCH_URL, status=415)
+    responses.add(responses.POST, BATCH_URL, status=200)
+
+    reports_queue = compressed_batch_queue()
+    reports_queue.submit(report_as_json=SCREENSHOT_REPORT, url=None, block=False)
+    reports_queue.stop()
+
+    # The rejected batch is sent again uncompressed, without counting against the attempts
+    assert len(responses.calls) == 2
+    assert "Content-Encoding" not in responses.calls[1].request.headers
+    assert json.loads(responses.calls[1].request.body) == [SCREENSHOT_REPORT]
+    assert reports_queue.compression.rejected
+    assert reports_queue.failed_reports == 0
@@ -0,0 +1,153 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from src.testproject.rest.messages.reportitemtype import ReportItemType
+from src.testproject.rest.messages.stepreport import StepReport
+from src.testproject.sdk.internal.agent.memory_report_sink import MemoryReportSink
+from src.testproject.sdk.internal.agent.report_fan_out import IsolatedReportSink, ReportFanOut
+from src.testproject.sdk.internal.agent.report_metrics_sink import ReportMetricsSink
+from src.testproject.sdk.internal.agent.report_sink import ReportSink
+from tests.ci.unittests.sdk.internal.agent.fakes import command
+
+REPORT_URL = "http://localhost:9876/api/development/report/command"
+
+
+class GatedSink(ReportSink):
+    """Sink stub holding reports back until its gate is opened"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.reports = []
+
+    def submit(self, report_as_json, url, block):
+        self.entered.set()
+        self.gate.wait()
+        self.reports.append(report_as_json)
+
+
+class FailingSink(ReportSink):
+    """Sink stub failing to handle every report"""
+
+    def submit(self, report_as_json, url, block):
+        raise IOError("disk full")
+
+
+def test_reports_fan_out_to_all_sinks():
+    primary = MemoryReportSink()
+    collector = MemoryReportSink()
+    metrics = ReportMetricsSink()
+    fan_out = ReportFanOut(primary, [collector, metrics])
+
+    for report in (command(name="findElement"), command(name="click", passed=False), command(name="findElement")):
+        fan_out.submit(report_as_json=report, url=REPORT_URL, block=False)
+    fan_out.stop(block=True)
+
+    assert primary.reports == collector.reports
+    assert [report["commandName"] for report in collector.reports] == ["findElement", "click", "findElement"]
+    assert metrics.counts == {(ReportItemType.Command.value, True): 2, (ReportItemType.Command.value, False): 1}
+    assert metrics.commands == {"findElement": 2, "click": 1}
+
+
+def test_slow_sink_does_not_block_primary():
+    primary = MemoryReportSink()
+    slow = GatedSink()
+    fan_out = ReportFanOut(primary, [])
+    fan_out._sinks = [IsolatedReportSink(slow, buffer_size=2)]
+
+    fan_out.submit(report_as_json=command(0), url=REPORT_URL, block=False)
+    assert slow.entered.wait(timeout=5)
+    for index in range(1, 5):
+        fan_out.submit(report_as_json=command(index), url=REPORT_URL, block=False)
+
+    # The primary sink got every report while the slow sink holds on to the first one
+    assert len(primary.reports) == 5
+    sink = fan_out.sinks[0]
+    assert sink.draining
+
+    slow.gate.set()
+    fan_out.stop(block=True)
+
+    # One report was being handled and two were buffered, the others were dropped
+    assert [report["index"] for report in slow.reports] == [0, 1, 2]
+    assert sink.dropped == 2
+    assert not fan_out.draining
+
+
+def test_slow_sink_buffer_is_bounded_by_bytes():
+    slow = GatedSink()
+    fan_out = ReportFanOut(MemoryReportSink(), [])
+    fan_out._sinks = [IsolatedReportSink(slow, max_bytes=5000)]
+
+    fan_out.submit(report_as_json=dict(command(0), screenshot="x" * 3000), url=REPORT_URL, block=False)
+    assert slow.entered.wait(timeout=5)
+    for index in range(1, 4):
+        fan_out.submit(report_as_json=dict(command(index), screenshot="x" * 3000), url=REPORT_URL, block=False)
+
+    sink = fan_out.sinks[0]
+    # The first report was being handled, only one of the others fit in the buffer
+    assert sink.dropped == 2
+    assert 3000 < sink.buffered_bytes <= 5000
+
+    slow.gate.set()
+    fan_out.stop(block=True)
+
+    assert [report["index"] for report in slow.reports] == [0, 1]
+    assert sink.buffered_bytes == 0
+
+
+def test_report_objects_are_converted_to_json_once_for_all_sinks():
+    primary = MemoryReportSink()
+    collector = MemoryReportSink()
+    fan_out = ReportFanOut(primary, [collector])
+
+    fan_out.submit_report(report=StepReport("Log in", "", True), url=REPORT_URL, block=False)
+    fan_out.stop(block=True)
+
+    assert primary.reports[0]["guid"] == collector.reports[0]["guid"]
+
+
+def test_failing_sink_is_isolated():
+    primary = MemoryReportSink()
+    collector = MemoryReportSink()
+    fan_out = ReportFanOut(primary, [FailingSink(), collector])
+
+    fan_out.submit(report_as_json=command(name="click"), url=REPORT_URL, block=False)
+    fan_out.submit(report_as_json=command(name="quit"), url=REPORT_URL, block=False)
+    fan_out.stop(block=True)
+
+    assert len(primary.reports) == 2
+    assert len(collector.reports) == 2
+    assert fan_out.sinks[0].failed == 2
+
+
+def test_registered_factories_create_sinks(monkeypatch):
+    monkeypatch.delenv(ReportFanOut.TP_SINKS_VARIABLE_NAME, raising=False)
+    primary = MemoryReportSink()
+    assert ReportFanOut.from_env(primary) is primary
+
+    collector = MemoryReportSink()
+    factory = lambda: collector  # noqa: E731
+    ReportFanOut.register(factory)
+    try:
+        monkeypatch.setenv(ReportFanOut.TP_SINKS_VARIABLE_NAME, "metrics")
+        fan_out = ReportFanOut.from_env(primary)
+    finally:
+        ReportFanOut.unregister(factory)
+
+    assert fan_out.primary is primary
+    assert [type(sink.sink) for sink in fan_out.sinks] == [ReportMetricsSink, MemoryReportSink]
+    fan_out.stop(block=True)
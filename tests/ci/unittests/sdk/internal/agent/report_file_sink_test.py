@@ -0,0 +1,105 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import os
+import time
+
+from src.testproject.sdk.internal.agent.report_file_sink import ReportFileSink
+from src.testproject.sdk.internal.agent.reports_queue_file import ReportsQueueFile
+from tests.ci.unittests.sdk.internal.agent.fakes import command
+
+
+def read_all(directory):
+    paths = ReportFileSink.complete_files(directory)
+    return [json.loads(report) for path in paths for report in ReportFileSink.read(path)]
+
+
+def test_files_are_rotated_and_completed_on_close(tmp_path):
+    sink = ReportFileSink(str(tmp_path), max_file_bytes=100)
+    for i in range(5):
+        sink.write(json.dumps(command(i)).encode("utf-8"))
+
+    # The file being written is not complete yet
+    assert len(ReportFileSink.complete_files(str(tmp_path))) == len(sink.files)
+
+    sink.close()
+
+    assert len(sink.files) > 1
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(ReportFileSink.PART_SUFFIX)]
+    assert read_all(str(tmp_path)) == [command(i) for i in range(5)]
+
+
+def test_reports_queue_writes_compressed_report_files(monkeypatch, tmp_path):
+    monkeypatch.setenv("TP_REPORTS_FILE_DIR", str(tmp_path))
+    monkeypatch.setenv("TP_REPORTS_FILE_COMPRESSION", "GZIP")
+
+    reports_queue = ReportsQueueFile("1234", ReportFileSink.from_env())
+    for i in range(3):
+        reports_queue.submit(report_as_json=command(i), url=None, block=False)
+    reports_queue.submit(report_as_json={"type": "Test", "name": "test_one", "passed": True}, url=None, block=False)
+    reports_queue.stop()
+
+    assert all(path.endswith(".ndjson.gz") for path in reports_queue.sink.files)
+    assert read_all(str(tmp_path)) == [command(i) for i in range(3)] + [
+        {"type": "Test", "name": "test_one", "passed": True}
+    ]
+
+
+def leave(sink):
+    """Releases the file being written without completing it, as a process that died would, a while ago"""
+    sink._locked_file.close()
+    for name in os.listdir(sink.directory):
+        past = time.time() - ReportFileSink.PART_FILE_GRACE_SECONDS - 1
+        os.utime(os.path.join(sink.directory, name), (past, past))
+
+
+def test_files_left_incomplete_are_read_up_to_their_last_full_report(tmp_path):
+    sink = ReportFileSink(str(tmp_path))
+    for i in range(3):
+        sink.write(json.dumps(command(i)).encode("utf-8"))
+    sink._file.write(b'{"type": "Command", "comm')
+    sink.flush()
+    leave(sink)
+
+    assert [path.endswith(ReportFileSink.PART_SUFFIX) for path in ReportFileSink.complete_files(str(tmp_path))] == [
+        True
+    ]
+    assert read_all(str(tmp_path)) == [command(i) for i in range(3)]
+
+
+def test_compressed_files_left_incomplete_are_read_up_to_their_last_full_report(tmp_path):
+    sink = ReportFileSink(str(tmp_path), compression=ReportFileSink.GZIP)
+    for i in range(3):
+        sink.write(json.dumps(command(i)).encode("utf-8"))
+    sink.flush()
+    leave(sink)
+
+    assert read_all(str(tmp_path)) == [command(i) for i in range(3)]
+
+
+def test_files_being_written_are_not_complete(tmp_path):
+    sink = ReportFileSink(str(tmp_path))
+    sink.write(json.dumps(command(0)).encode("utf-8"))
+    sink.flush()
+    past = time.time() - ReportFileSink.PART_FILE_GRACE_SECONDS - 1
+    for name in os.listdir(str(tmp_path)):
+        os.utime(os.path.join(str(tmp_path), name), (past, past))
+
+    # The file is locked by its writer, however long ago it was written to
+    assert ReportFileSink.complete_files(str(tmp_path)) == []
+
+    sink.close()
+    assert read_all(str(tmp_path)) == [command(0)]
@@ -0,0 +1,161 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from json import loads
+
+import requests
+
+from src.testproject.classes import BatchSettings
+from src.testproject.sdk.internal.agent.report_sender import ReportSender
+from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+from src.testproject.sdk.internal.agent.reports_queue_batch import ReportsQueueBatch
+from tests.ci.unittests.sdk.internal.agent.fakes import closing_test, command
+
+BATCH_URL = "http://localhost:9876/api/development/report/batch"
+COMMAND_URL = "http://localhost:9876/api/development/report/command"
+
+
+class ConcurrentTransport:
+    """Transport stub recording when each batch was being sent and how many were sent at the same time"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.events = []
+
+    def post(self, url, token, json=None, timeout=None, compression=None, data=None, content_encoding=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            report = loads(data)
+            self.events.append(("start", report))
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+            self.events.append(("end", report))
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+def test_single_worker_runs_tasks_in_order():
+    sender = ReportSender(1)
+    calls = []
+    for i in range(5):
+        sender.submit(lambda i=i: calls.append(i), fence=i == 2)
+
+    assert sender.wait(timeout=1)
+    assert calls == [0, 1, 2, 3, 4]
+
+
+def test_failing_task_does_not_stop_the_sender():
+    sender = ReportSender(2)
+    calls = []
+    sender.submit(lambda: 1 / 0)
+    sender.submit(lambda: calls.append("sent"))
+
+    assert sender.wait(timeout=1)
+    assert calls == ["sent"]
+
+
+def test_worker_threads_stop_with_the_queue():
+    reports_queue = ReportsQueue("1234", transport=ConcurrentTransport(delay=0), workers=3)
+    threads = list(reports_queue._sender._threads)
+    reports_queue.submit(report_as_json=command(0), url=COMMAND_URL, block=False)
+    reports_queue.stop()
+
+    assert len(threads) == 3
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_workers_are_taken_from_environment(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_SENDER_WORKERS", "3")
+
+    reports_queue = ReportsQueue("1234", transport=ConcurrentTransport(delay=0))
+    reports_queue.stop()
+
+    assert reports_queue.workers == 3
+
+
+def test_reports_are_stamped_with_session_and_test_sequence_numbers():
+    class RecordingQueue(ReportsQueue):
+        stamped = []
+
+        def _handle_report(self, item):
+            if item.report_as_json is not None:
+                self.stamped.append((item.sequence, item.test_sequence))
+
+    reports_queue = RecordingQueue("1234", transport=ConcurrentTransport(delay=0))
+    for report in [command(0), closing_test("test_0"), command(1), command(2), closing_test("test_1")]:
+        reports_queue.submit(report_as_json=report, url=COMMAND_URL, block=False)
+    reports_queue.stop()
+
+    assert reports_queue.stamped == [(0, 0), (1, 0), (2, 1), (3, 1), (4, 1)]
+
+
+def test_tasks_sharing_a_key_run_one_at_a_time_in_order():
+    sender = ReportSender(4)
+    lock = threading.Lock()
+    running = {"a": 0, "b": 0}
+    overlaps = []
+    calls = []
+
+    def task(key, index):
+        with lock:
+            running[key] += 1
+            overlaps.append(dict(running))
+        time.sleep(0.02)
+        with lock:
+            running[key] -= 1
+            calls.append((key, index))
+
+    for index in range(4):
+        for key in ("a", "b"):
+            sender.submit(lambda key=key, index=index: task(key, index), key=key)
+
+    assert sender.wait(timeout=5)
+    sender.shutdown()
+    # Tasks of different keys ran at the same time, tasks of the same key never did
+    assert any(overlap == {"a": 1, "b": 1} for overlap in overlaps)
+    assert all(count <= 1 for overlap in overlaps for count in overlap.values())
+    assert [index for key, index in calls if key == "a"] == [0, 1, 2, 3]
+    assert [index for key, index in calls if key == "b"] == [0, 1, 2, 3]
+
+
+def test_batches_of_a_test_are_sent_in_order_within_test_boundaries():
+    transport = ConcurrentTransport(delay=0.02)
+    reports_queue = ReportsQueueBatch(
+        "1234", BATCH_URL, transport, BatchSettings(max_batch_size=1, linger_ms=0), workers=4
+    )
+    reports = [
+        command(0),
+        command(1),
+        command(2),
+        closing_test("test_0"),
+        command(3),
+        command(4),
+        closing_test("test_1"),
+    ]
+    for report in reports:
+        reports_queue.submit(report_as_json=report, url=COMMAND_URL, block=False)
+    reports_queue.stop()
+
+    # The reports of a test reach the Agent one at a time, in the order they were submitted, followed by the test report
+    assert transport.max_in_flight == 1
+    sent = [(event, batch[0]) for event, batch in transport.events]
+    assert sent == [(event, report) for report in reports for event in ("start", "end")]
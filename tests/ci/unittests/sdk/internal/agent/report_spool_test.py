@@ -0,0 +1,200 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+
+import requests
+
+from src.testproject.sdk.internal.agent.report_spool import ReportSpool
+from src.testproject.sdk.internal.agent.reports_queue import ReportsQueue
+from tests.ci.unittests.sdk.internal.agent.fakes import GatedTransport, closing_test, command
+
+COMMAND_ENDPOINT = "/api/development/report/command"
+TEST_ENDPOINT = "/api/development/report/test"
+
+
+class StatusTransport:
+    """Transport stub responding to every report with the same status"""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def post(self, url, token, json=None, timeout=None, compression=None, data=None, content_encoding=None):
+        response = requests.Response()
+        response.status_code = self.status_code
+        return response
+
+
+def encoded(report):
+    return json.dumps(report).encode("utf-8")
+
+
+def abandon(spool):
+    """Releases the spool files without cleaning up, as a process that died would"""
+    spool._segment.close()
+    for ack_file in spool._ack_files.values():
+        ack_file.close()
+    spool._lock_file.close()
+
+
+def replay(directory):
+    replayed = []
+    ReportSpool.replay(directory, replayed.extend, TEST_ENDPOINT)
+    return replayed
+
+
+def test_spool_is_deleted_when_all_reports_are_acknowledged(tmp_path):
+    spool = ReportSpool(str(tmp_path), segment_bytes=100, fsync=ReportSpool.FSYNC_ALWAYS)
+    for i in range(5):
+        spool.append(i, COMMAND_ENDPOINT, encoded(command(i)))
+    spool.acknowledge(0, 2)
+
+    # Segments holding only acknowledged reports are deleted right away
+    assert len([name for name in os.listdir(spool.path) if name.endswith(".jsonl")]) == 2
+
+    spool.acknowledge(3, 4)
+    spool.close()
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_unacknowledged_reports_are_replayed_and_interrupted_test_is_closed(tmp_path):
+    spool = ReportSpool(str(tmp_path), segment_bytes=150)
+    spool.append(0, COMMAND_ENDPOINT, encoded(command(0)))
+    spool.append(1, TEST_ENDPOINT, encoded(closing_test("test_one")))
+    spool.append(2, COMMAND_ENDPOINT, encoded(command(2)))
+    spool.acknowledge(0, 0)
+    abandon(spool)
+
+    replayed = replay(str(tmp_path))
+
+    assert replayed[:2] == [(TEST_ENDPOINT, closing_test("test_one")), (COMMAND_ENDPOINT, command(2))]
+    assert replayed[2][0] == TEST_ENDPOINT
+    assert replayed[2][1]["name"] == ReportSpool.INTERRUPTED_TEST_NAME
+    assert not replayed[2][1]["passed"]
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_partially_written_report_is_skipped(tmp_path):
+    spool = ReportSpool(str(tmp_path))
+    spool.append(0, TEST_ENDPOINT, encoded(closing_test("test_one")))
+    spool._segment.write(b'{"sequence": 1, "endpoint": ')
+    abandon(spool)
+
+    assert replay(str(tmp_path)) == [(TEST_ENDPOINT, closing_test("test_one"))]
+
+
+def test_spool_of_running_process_is_not_replayed(tmp_path):
+    spool = ReportSpool(str(tmp_path))
+    spool.append(0, COMMAND_ENDPOINT, encoded(command(0)))
+
+    assert replay(str(tmp_path)) == []
+
+    spool.acknowledge(0, 0)
+    spool.close()
+
+
+def test_reports_not_accepted_by_agent_are_kept_in_spool(tmp_path, monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_MAX_ATTEMPTS", "1")
+    spool = ReportSpool(str(tmp_path))
+
+    reports_queue = ReportsQueue("1234", transport=StatusTransport(500), spool=spool)
+    reports_queue.submit(report_as_json=command(0), url="http://localhost:8585" + COMMAND_ENDPOINT, block=False)
+    reports_queue.submit(report_as_json=closing_test("test_one"), url=None, block=False)
+    reports_queue.stop()
+
+    assert replay(str(tmp_path)) == [(COMMAND_ENDPOINT, command(0)), (None, closing_test("test_one"))]
+
+
+def test_reports_accepted_by_agent_are_removed_from_spool(tmp_path):
+    spool = ReportSpool(str(tmp_path))
+
+    reports_queue = ReportsQueue("1234", transport=StatusTransport(200), spool=spool)
+    for i in range(3):
+        reports_queue.submit(report_as_json=command(i), url="http://localhost:8585" + COMMAND_ENDPOINT, block=False)
+    reports_queue.stop()
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_reports_are_spooled_before_they_are_queued(tmp_path):
+    spool = ReportSpool(str(tmp_path))
+    transport = GatedTransport()
+
+    reports_queue = ReportsQueue("1234", transport=transport, spool=spool)
+    for i in range(20):
+        reports_queue.submit(report_as_json=command(i), url="http://localhost:8585" + COMMAND_ENDPOINT, block=False)
+
+    # The Agent has not acknowledged any report, yet all of them are already on disk
+    with open(os.path.join(spool.path, ReportSpool.SEGMENT_FILE_FORMAT.format(0)), "rb") as segment:
+        assert [json.loads(line)["report"] for line in segment] == [command(i) for i in range(20)]
+
+    transport.gate.set()
+    reports_queue.stop()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_spools_are_replayed_by_reporting_thread_ahead_of_session_reports(tmp_path):
+    spool = ReportSpool(str(tmp_path))
+    spool.append(0, COMMAND_ENDPOINT, encoded(command(0)))
+    spool.append(1, COMMAND_ENDPOINT, encoded(command(1)))
+    abandon(spool)
+    replaying_threads = []
+
+    def replay_spools(submit):
+        replaying_threads.append(threading.current_thread())
+        ReportSpool.replay(
+            str(tmp_path),
+            lambda reports: submit([("http://localhost:8585" + endpoint, report) for endpoint, report in reports]),
+            TEST_ENDPOINT,
+        )
+
+    transport = GatedTransport()
+    reports_queue = ReportsQueue("1234", transport=transport, spool=ReportSpool(str(tmp_path)), replay=replay_spools)
+    reports_queue.submit(report_as_json=command(2), url="http://localhost:8585" + COMMAND_ENDPOINT, block=False)
+    reports_queue.submit(report_as_json=closing_test("test_one"), url=None, block=False)
+    transport.gate.set()
+    assert reports_queue.wait_sent(timeout=5)
+    reports_queue.stop()
+
+    assert replaying_threads and replaying_threads[0] is not threading.current_thread()
+    assert transport.reports[:2] == [command(0), command(1)]
+    assert transport.reports[2]["name"] == ReportSpool.INTERRUPTED_TEST_NAME
+    assert transport.reports[3:] == [command(2), closing_test("test_one")]
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_replayed_reports_are_replayed_again_in_order_if_not_accepted(tmp_path, monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_MAX_ATTEMPTS", "1")
+    spool = ReportSpool(str(tmp_path))
+    spool.append(0, COMMAND_ENDPOINT, encoded(command(0)))
+    abandon(spool)
+
+    # The session spooled a report of its own before it replayed the previous session
+    session_spool = ReportSpool(str(tmp_path))
+    session_spool.append(0, COMMAND_ENDPOINT, encoded(command(1)))
+    reports_queue = ReportsQueue(
+        "1234",
+        transport=StatusTransport(500),
+        spool=session_spool,
+        replay=lambda submit: ReportSpool.replay(str(tmp_path), submit, TEST_ENDPOINT),
+    )
+    reports_queue.stop()
+
+    replayed = replay(str(tmp_path))
+    assert replayed[0] == (COMMAND_ENDPOINT, command(0))
+    assert replayed[1][1]["name"] == ReportSpool.INTERRUPTED_TEST_NAME
+    assert replayed[2] == (COMMAND_ENDPOINT, command(1))
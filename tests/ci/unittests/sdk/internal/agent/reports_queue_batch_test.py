@@ -0,0 +1,126 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from json import loads
+
+import pytest
+import requests
+
+from src.testproject.classes import BatchSettings
+from src.testproject.sdk.internal.agent.json_serializer import JsonSerializer
+from src.testproject.sdk.internal.agent.reports_queue_batch import ReportsQueueBatch
+from tests.ci.unittests.sdk.internal.agent.fakes import command
+
+BATCH_URL = "http://localhost:9876/api/development/report/batch"
+COMMAND_URL = "http://localhost:9876/api/development/report/command"
+
+
+class RecordingTransport:
+    """Transport stub recording the batches posted to the Agent"""
+
+    def __init__(self, delay=0):
+        self.batches = []
+        self.delay = delay
+
+    def post(self, url, token, json=None, timeout=None, compression=None, data=None, content_encoding=None):
+        time.sleep(self.delay)
+        self.batches.append(loads(data))
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+@pytest.fixture()
+def transport():
+    return RecordingTransport()
+
+
+def test_batch_settings_take_precedence_over_environment(monkeypatch, transport):
+    monkeypatch.setenv("TP_MAX_REPORTS_BATCH_SIZE", "5")
+    monkeypatch.setenv("TP_REPORTS_BATCH_LINGER_MS", "10")
+
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, transport, BatchSettings(max_batch_size=7))
+    reports_queue.stop()
+
+    assert reports_queue.max_batch_size == 7
+    assert reports_queue.linger_ms == 10
+    assert reports_queue.max_batch_bytes == ReportsQueueBatch.MAX_REPORT_BATCH_BYTES
+
+
+def test_reports_are_collected_during_linger_time(transport):
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, transport, BatchSettings(max_batch_size=100, linger_ms=500))
+    for i in range(5):
+        reports_queue.submit(report_as_json=command(i), url=COMMAND_URL, block=False)
+        time.sleep(0.01)
+    reports_queue.stop()
+
+    assert transport.batches == [[command(i) for i in range(5)]]
+
+
+def test_batch_is_sent_when_linger_time_passes(transport):
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, transport, BatchSettings(max_batch_size=100, linger_ms=20))
+    reports_queue.submit(report_as_json=command(0), url=COMMAND_URL, block=False)
+    time.sleep(0.2)
+
+    assert transport.batches == [[command(0)]]
+    reports_queue.stop()
+
+
+def test_batch_is_split_on_maximum_count(transport):
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, transport, BatchSettings(max_batch_size=2, linger_ms=500))
+    for i in range(5):
+        reports_queue.submit(report_as_json=command(i), url=COMMAND_URL, block=False)
+    reports_queue.stop()
+
+    assert [len(batch) for batch in transport.batches] == [2, 2, 1]
+
+
+def test_batch_is_split_on_maximum_payload_size(transport):
+    report_bytes = len(JsonSerializer.instance().dumps(command(0)))
+    reports_queue = ReportsQueueBatch(
+        "1234", BATCH_URL, transport, BatchSettings(max_batch_size=100, max_batch_bytes=report_bytes * 2, linger_ms=500)
+    )
+    for i in range(5):
+        reports_queue.submit(report_as_json=command(i), url=COMMAND_URL, block=False)
+    reports_queue.stop()
+
+    assert [len(batch) for batch in transport.batches] == [2, 2, 1]
+
+
+def test_batch_is_sent_at_test_boundary(transport):
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, transport, BatchSettings(max_batch_size=100, linger_ms=5000))
+    reports_queue.submit(report_as_json=command(0), url=COMMAND_URL, block=False)
+    reports_queue.submit(report_as_json={"type": "Test", "name": "test_one", "passed": True}, url=None, block=False)
+    time.sleep(0.2)
+
+    assert len(transport.batches) == 1
+    assert transport.batches[0][-1]["type"] == "Test"
+    reports_queue.stop()
+
+
+def test_adaptive_batch_size_is_enabled_from_environment(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_ADAPTIVE_BATCH", "true")
+    # A slightly slow Agent lets a backlog build up while the first batches are sent
+    transport = RecordingTransport(delay=0.01)
+
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, transport, BatchSettings(max_batch_size=4, linger_ms=500))
+    for i in range(20):
+        reports_queue.submit(report_as_json=command(i), url=COMMAND_URL, block=False)
+    reports_queue.stop()
+
+    assert reports_queue.adaptive_batch_size is not None
+    assert sum(len(batch) for batch in transport.batches) == 20
+    # Batches grow while the queue holds a backlog and the Agent responds quickly
+    assert reports_queue.max_batch_size > 4
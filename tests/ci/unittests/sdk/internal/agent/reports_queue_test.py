@@ -0,0 +1,259 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+
+import requests
+import responses
+
+from src.testproject.enums import QueueOverflowPolicy
+from src.testproject.rest.messages import CustomTestReport, DriverCommandReport
+from src.testproject.sdk.internal.agent.http_transport import HttpTransport
+from src.testproject.sdk.internal.agent.reports_queue import QueueItem, ReportsQueue
+from src.testproject.sdk.internal.agent.reports_queue_batch import ReportsQueueBatch
+from tests.ci.unittests.sdk.internal.agent.fakes import GatedTransport, command
+
+REPORT_URL = "http://localhost:9876/api/development/report/command"
+BATCH_URL = "http://localhost:9876/api/development/report/batch"
+
+
+def test_transport_uses_configured_pool_size_and_timeouts(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_POOL_SIZE", "3")
+    transport = HttpTransport(read_timeout=5)
+
+    assert transport.pool_size == 3
+    assert transport.timeout == (HttpTransport.DEFAULT_CONNECT_TIMEOUT, 5)
+    assert transport._session.get_adapter("http://localhost:9876")._pool_maxsize == 3
+
+
+@responses.activate
+def test_queue_item_is_retried_on_unexpected_status():
+    responses.add(responses.POST, REPORT_URL, status=500)
+    responses.add(responses.POST, REPORT_URL, status=200)
+
+    QueueItem(report_as_json={"key": "value"}, url=REPORT_URL, token="1234").send(HttpTransport())
+
+    assert len(responses.calls) == 2
+    assert responses.calls[1].request.headers["Authorization"] == "1234"
+
+
+@responses.activate
+def test_queue_item_is_retried_on_connection_error():
+    responses.add(responses.POST, REPORT_URL, body=requests.exceptions.ConnectionError())
+    responses.add(responses.POST, REPORT_URL, status=200)
+
+    QueueItem(report_as_json={"key": "value"}, url=REPORT_URL, token="1234").send(HttpTransport())
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_all_reports_are_sent_through_the_shared_transport(mocker):
+    responses.add(responses.POST, REPORT_URL, status=200)
+    transport = HttpTransport()
+    post = mocker.spy(transport, "post")
+
+    reports_queue = ReportsQueue(token="1234", transport=transport)
+    for i in range(5):
+        reports_queue.submit(report_as_json={"index": i}, url=REPORT_URL, block=False)
+    reports_queue.stop()
+
+    assert post.call_count == 5
+    assert [json.loads(call.request.body)["index"] for call in responses.calls] == list(range(5))
+
+
+@responses.activate
+def test_batch_queue_sends_reports_through_the_shared_transport(mocker):
+    responses.add(responses.POST, BATCH_URL, status=200)
+    transport = HttpTransport()
+    post = mocker.spy(transport, "post")
+
+    reports_queue = ReportsQueueBatch(token="1234", url=BATCH_URL, transport=transport)
+    reports_queue.submit(report_as_json={"index": 0}, url=REPORT_URL, block=False)
+    reports_queue.stop()
+
+    assert post.call_count >= 1
+    assert all(call.request.url == BATCH_URL for call in responses.calls)
+
+
+def screenshot_command(index):
+    return {"type": "Command", "index": index, "passed": True, "screenshot": "x" * 1000}
+
+
+def fill_queue(policy, reports):
+    """Submits reports to a queue whose budget fits a single screenshot while the Agent is not responding"""
+    transport = GatedTransport()
+    reports_queue = ReportsQueue(token="1234", transport=transport, max_bytes=1500, overflow_policy=policy)
+    reports_queue.submit(report_as_json=reports[0], url=REPORT_URL, block=False)
+    # Wait for the first report to be taken by the reporting thread, the others then wait in the queue
+    while reports_queue.queued_bytes > 0:
+        time.sleep(0.01)
+    for report in reports[1:]:
+        reports_queue.submit(report_as_json=report, url=REPORT_URL, block=False)
+    return reports_queue, transport
+
+
+def test_overflow_policy_is_taken_from_environment(monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_QUEUE_MAX_BYTES", "1024")
+    monkeypatch.setenv("TP_REPORTS_QUEUE_OVERFLOW_POLICY", "Spill_To_Disk")
+
+    reports_queue = ReportsQueue(token="1234", transport=GatedTransport())
+    reports_queue._transport.gate.set()
+    reports_queue.stop()
+
+    assert reports_queue.max_bytes == 1024
+    assert reports_queue.overflow_policy is QueueOverflowPolicy.SpillToDisk
+
+
+def test_block_policy_blocks_producer_until_reports_are_sent():
+    reports_queue, transport = fill_queue(QueueOverflowPolicy.Block, [screenshot_command(0), screenshot_command(1)])
+    producer = threading.Thread(
+        target=reports_queue.submit,
+        kwargs={"report_as_json": screenshot_command(2), "url": REPORT_URL, "block": False},
+    )
+    producer.start()
+    producer.join(timeout=0.2)
+
+    assert producer.is_alive()
+
+    transport.gate.set()
+    producer.join(timeout=1)
+    reports_queue.stop()
+
+    assert [report["index"] for report in transport.reports] == [0, 1, 2]
+
+
+def test_drop_screenshots_policy_removes_screenshots_from_reports():
+    reports_queue, transport = fill_queue(
+        QueueOverflowPolicy.DropScreenshots, [screenshot_command(0), screenshot_command(1), screenshot_command(2)]
+    )
+    transport.gate.set()
+    reports_queue.stop()
+
+    assert [report["index"] for report in transport.reports] == [0, 1, 2]
+    assert [report["screenshot"] is None for report in transport.reports] == [False, False, True]
+
+
+def test_drop_passed_commands_policy_keeps_failed_commands():
+    reports_queue, transport = fill_queue(
+        QueueOverflowPolicy.DropPassedCommands,
+        [screenshot_command(0), screenshot_command(1), screenshot_command(2), command(3, passed=False)],
+    )
+    transport.gate.set()
+    reports_queue.stop()
+
+    assert [report["index"] for report in transport.reports] == [0, 1, 3]
+
+
+def test_spill_to_disk_policy_keeps_reports_in_order():
+    reports_queue, transport = fill_queue(
+        QueueOverflowPolicy.SpillToDisk, [screenshot_command(i) for i in range(5)] + [{"type": "Test", "index": 5}]
+    )
+
+    assert reports_queue.queued_bytes <= reports_queue.max_bytes
+
+    transport.gate.set()
+    reports_queue.stop()
+
+    assert [report["index"] for report in transport.reports] == list(range(6))
+    assert transport.reports[3] == screenshot_command(3)
+
+
+def test_report_objects_are_serialized_by_the_reporting_thread(mocker):
+    serializing_threads = []
+    report = DriverCommandReport("findElement", {"using": "id", "value": "name"}, None, True)
+    mocker.patch.object(
+        report, "to_json", side_effect=lambda: serializing_threads.append(threading.current_thread()) or {"index": 0}
+    )
+    transport = mocker.Mock()
+    transport.post.return_value.raise_for_status.return_value = None
+
+    reports_queue = ReportsQueueBatch("1234", BATCH_URL, transport)
+    reports_queue.submit_report(report=report, url=REPORT_URL, block=False)
+    reports_queue.submit_report(report=CustomTestReport("test_one", True), url=REPORT_URL, block=False)
+    reports_queue.stop()
+
+    assert serializing_threads and threading.current_thread() not in serializing_threads
+    test_report = CustomTestReport("test_one", True).to_json()
+    assert json.loads(transport.post.call_args.kwargs["data"]) == [{"index": 0}, test_report]
+
+
+def test_estimated_size_counts_container_results():
+    elements = [{"element-6066-11e4-a52e-4f735466cecf": "0.{}-{}".format(i, "f" * 32)} for i in range(500)]
+    script_result = {"rows": [{"id": i, "name": "row {}".format(i), "cells": ["x" * 20] * 5} for i in range(200)]}
+    for result in (elements, script_result):
+        report = DriverCommandReport("executeScript", {"script": "return rows()", "args": []}, result, True)
+        actual = len(json.dumps(report.to_json()))
+
+        assert 0.8 * actual <= ReportsQueue._estimated_size(report) <= 1.5 * actual
+
+
+def test_reports_are_taken_in_submission_order_whatever_their_lane():
+    reports_queue, transport = fill_queue(
+        QueueOverflowPolicy.Block,
+        [
+            screenshot_command(0),
+            {"type": "Command", "index": 1, "passed": True},
+            command(2, passed=False),
+            {"type": "Step", "index": 3},
+            {"type": "Test", "index": 4},
+            {"type": "Step", "index": 5},
+        ],
+    )
+    transport.gate.set()
+    reports_queue.stop()
+
+    # Lanes only decide which reports are dropped first, the Agent builds the test timeline from the report order
+    assert [report["index"] for report in transport.reports] == [0, 1, 2, 3, 4, 5]
+
+
+def test_drop_lower_priority_policy_makes_room_for_test_reports():
+    reports_queue, transport = fill_queue(
+        QueueOverflowPolicy.DropLowerPriority,
+        [screenshot_command(0), screenshot_command(1), {"type": "Test", "index": 2, "message": "x" * 1000}],
+    )
+    transport.gate.set()
+    reports_queue.stop()
+
+    assert [report["index"] for report in transport.reports] == [0, 2]
+
+
+def test_wait_sent_returns_once_the_agent_accepted_the_reports():
+    transport = GatedTransport()
+    reports_queue = ReportsQueue(token="1234", transport=transport)
+    for i in range(3):
+        reports_queue.submit(report_as_json={"index": i}, url=REPORT_URL, block=False)
+
+    assert not reports_queue.wait_sent(0.1)
+    transport.gate.set()
+    assert reports_queue.wait_sent(5)
+    assert [report["index"] for report in transport.reports] == [0, 1, 2]
+    assert reports_queue.failed_reports == 0
+    reports_queue.stop()
+
+
+def test_wait_sent_counts_the_reports_the_agent_did_not_accept(mocker, monkeypatch):
+    monkeypatch.setenv("TP_REPORTS_MAX_ATTEMPTS", "1")
+    response = requests.Response()
+    response.status_code = 400
+    transport = mocker.Mock(post=mocker.Mock(return_value=response))
+    reports_queue = ReportsQueue(token="1234", transport=transport)
+    for i in range(2):
+        reports_queue.submit(report_as_json={"index": i}, url=REPORT_URL, block=False)
+
+    assert reports_queue.wait_sent(5)
+    assert reports_queue.failed_reports == 2
+    reports_queue.stop()
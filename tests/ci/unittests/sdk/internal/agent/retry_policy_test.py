@@ -0,0 +1,149 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import requests
+import responses
+
+from src.testproject.enums import QueueOverflowPolicy
+from src.testproject.sdk.internal.agent.circuit_breaker import CircuitBreaker
+from src.testproject.sdk.internal.agent.http_transport import HttpTransport
+from src.testproject.sdk.internal.agent.reports_queue import QueueItem, ReportsQueue
+from src.testproject.sdk.internal.agent.retry_policy import RetryPolicy
+
+REPORT_URL = "http://localhost:9876/api/development/report/command"
+
+
+def response(status_code, retry_after=None):
+    result = requests.Response()
+    result.status_code = status_code
+    if retry_after is not None:
+        result.headers["Retry-After"] = retry_after
+    return result
+
+
+def test_backoff_delay_grows_exponentially_with_jitter():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.1, max_delay=0.5)
+
+    for attempt, ceiling in enumerate([0.1, 0.2, 0.4, 0.5, 0.5]):
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_retry_after_is_honored_for_throttling_responses():
+    policy = RetryPolicy(base_delay=0.1, max_delay=10)
+
+    assert policy.delay(0, response(429, retry_after="3")) == 3
+    assert policy.delay(0, response(503, retry_after="120")) == 10
+    assert policy.delay(0, response(500, retry_after="3")) <= 0.1
+    assert 0 < policy.delay(0, response(503, retry_after="Wed, 21 Oct 2065 07:28:00 GMT")) <= 10
+
+
+def test_client_errors_are_not_retried():
+    policy = RetryPolicy()
+
+    assert not policy.is_retryable(response(400))
+    assert policy.is_retryable(response(429))
+    assert policy.is_retryable(response(502))
+
+
+@responses.activate
+def test_rejected_report_is_sent_once():
+    responses.add(responses.POST, REPORT_URL, status=400)
+
+    passed = QueueItem(report_as_json={"key": "value"}, url=REPORT_URL, token="1234").send(
+        HttpTransport(), RetryPolicy(base_delay=0)
+    )
+
+    assert not passed
+    assert len(responses.calls) == 1
+
+
+def test_circuit_opens_after_consecutive_failures_and_closes_when_probe_succeeds():
+    agent_recovered = threading.Event()
+    probes = []
+
+    def probe():
+        probes.append(time.monotonic())
+        return agent_recovered.is_set()
+
+    breaker = CircuitBreaker(probe=probe, failure_threshold=3, probe_interval=0.01)
+    for _ in range(2):
+        breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+
+    sender = threading.Thread(target=breaker.wait_until_closed)
+    sender.start()
+    sender.join(timeout=0.1)
+    assert sender.is_alive()
+    assert len(probes) >= 2
+
+    agent_recovered.set()
+    sender.join(timeout=1)
+    assert not sender.is_alive()
+    assert not breaker.is_open
+
+
+@responses.activate
+def test_attempts_are_held_while_circuit_is_open():
+    responses.add(responses.POST, REPORT_URL, body=requests.exceptions.ConnectionError())
+    breaker = CircuitBreaker(failure_threshold=2, probe_interval=0.2)
+
+    start = time.monotonic()
+    QueueItem(report_as_json={"key": "value"}, url=REPORT_URL, token="1234").send(
+        HttpTransport(), RetryPolicy(max_attempts=3, base_delay=0), breaker
+    )
+
+    # The third attempt waited for the probe interval, letting a single attempt through which failed again
+    assert len(responses.calls) == 3
+    assert time.monotonic() - start >= 0.2
+    assert breaker.is_open
+
+
+def test_senders_give_up_once_the_circuit_was_open_too_long():
+    breaker = CircuitBreaker(probe=lambda: False, failure_threshold=1, probe_interval=0.05, max_open_duration=0.2)
+    breaker.record_failure()
+
+    start = time.monotonic()
+    assert not breaker.wait_until_closed()
+    assert 0.2 <= time.monotonic() - start < 2
+    # Later reports are given up on right away while the Agent keeps failing
+    start = time.monotonic()
+    assert not breaker.wait_until_closed()
+    assert time.monotonic() - start < 0.2
+
+
+def test_unreachable_agent_does_not_block_submitters_forever(monkeypatch, mocker):
+    monkeypatch.setenv("TP_REPORTS_MAX_ATTEMPTS", "1")
+    monkeypatch.setenv("TP_REPORTS_CIRCUIT_FAILURE_THRESHOLD", "1")
+    monkeypatch.setenv("TP_REPORTS_CIRCUIT_PROBE_INTERVAL_MS", "50")
+    monkeypatch.setenv("TP_REPORTS_CIRCUIT_MAX_OPEN_MS", "200")
+    transport = mocker.Mock()
+    transport.post.side_effect = requests.exceptions.ConnectionError()
+    reports_queue = ReportsQueue(
+        token="1234", transport=transport, max_bytes=1500, overflow_policy=QueueOverflowPolicy.Block
+    )
+
+    start = time.monotonic()
+    for index in range(10):
+        reports_queue.submit(report_as_json={"index": index, "screenshot": "x" * 1000}, url=REPORT_URL, block=False)
+    reports_queue.stop()
+
+    assert time.monotonic() - start < 5
+    assert reports_queue.failed_reports == 10
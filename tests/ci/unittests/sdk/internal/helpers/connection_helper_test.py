@@ -0,0 +1,59 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src.testproject.sdk.internal.helpers.connection_helper import ConnectionHelper
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"value": null}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    server = HTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}/status".format(server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_size_is_read_from_environment(monkeypatch):
+    monkeypatch.setenv("TP_DRIVER_POOL_SIZE", "2")
+    pool_manager = ConnectionHelper.create_pool_manager()
+    assert pool_manager.connection_pool_kw["maxsize"] == 2
+
+
+def test_connection_is_reused_between_requests(server_url):
+    pool_manager = ConnectionHelper.create_pool_manager()
+    for _ in range(3):
+        pool_manager.request("GET", server_url)
+
+    assert ConnectionHelper.get_connection_stats(pool_manager) == {"requests": 3, "connections": 1, "reused": 2}
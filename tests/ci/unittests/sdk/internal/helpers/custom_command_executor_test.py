@@ -0,0 +1,102 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+from src.testproject.classes import StepSettings
+from src.testproject.sdk.internal.helpers.custom_command_executor import CustomCommandExecutor
+
+
+@pytest.fixture()
+def executor(mocker):
+    mocker.patch.object(RemoteConnection, "execute", return_value={"status": 0, "value": None})
+    agent_client = mocker.Mock()
+    agent_client.agent_session.dialect = "W3C"
+    agent_client.agent_session.session_id = "1234"
+    executor = CustomCommandExecutor(agent_client, "http://localhost:8585", keep_alive=False)
+    mocker.spy(executor, "update_known_test_name")
+    return executor
+
+
+def test_commands_skip_reporting_when_reports_are_disabled(executor):
+    executor.disable_reports = True
+    executor.execute(Command.GET_TITLE, {"sessionId": "1234"})
+
+    assert executor.fast_path
+    assert executor.update_known_test_name.call_count == 0
+    assert RemoteConnection.execute.call_count == 1
+
+
+def test_step_settings_turn_the_fast_path_off(executor):
+    executor.disable_reports = True
+    executor.settings = StepSettings(timeout=5000)
+    executor.execute(Command.GET_TITLE, {"sessionId": "1234"})
+
+    assert not executor.fast_path
+    assert executor.update_known_test_name.call_count == 1
+    # The step timeout is applied before the command
+    assert [call.kwargs.get("command") or call.args[0] for call in RemoteConnection.execute.call_args_list] == [
+        Command.SET_TIMEOUTS,
+        Command.GET_TITLE,
+    ]
+
+
+def test_enabling_reports_turns_the_fast_path_off(executor):
+    executor.disable_reports = True
+    executor.disable_reports = False
+    executor.execute(Command.GET_TITLE, {"sessionId": "1234"})
+
+    assert not executor.fast_path
+    assert executor.update_known_test_name.call_count == 1
+
+
+def test_results_modified_by_selenium_are_copied_for_the_report(executor):
+    element = {"element-6066-11e4-a52e-4f735466cecf": "1"}
+    nested = {"form": {"field": element}}
+
+    assert executor._detach_result(element) is element
+    elements = [element, element]
+    assert executor._detach_result(elements) is elements
+    assert executor._detach_result(nested) == nested and executor._detach_result(nested) is not nested
+
+
+def test_flight_recorder_reports_passed_commands_only_before_a_failure(executor):
+    executor.flight_recorder_size = 2
+    for _ in range(3):
+        executor.execute(Command.GET_TITLE, {"sessionId": "1234"})
+
+    assert executor.agent_client.report_driver_command.call_count == 0
+
+    RemoteConnection.execute.return_value = {"status": 7, "value": None}
+    executor.execute(Command.FIND_ELEMENT, {"sessionId": "1234", "using": "id", "value": "missing"})
+
+    reports = [call.args[0] for call in executor.agent_client.report_driver_command.call_args_list]
+    # Only the latest passed commands are kept, followed by the failure
+    assert [(report.command, report.passed) for report in reports] == [
+        (Command.GET_TITLE, True),
+        (Command.GET_TITLE, True),
+        (Command.FIND_ELEMENT, False),
+    ]
+
+
+def test_flight_recorder_drops_commands_of_passed_tests(executor):
+    executor.flight_recorder_size = 10
+    executor.execute(Command.GET_TITLE, {"sessionId": "1234"})
+    executor.report_test()
+    executor.flush_flight_recorder()
+
+    assert executor.agent_client.report_driver_command.call_count == 0
+    assert executor.agent_client.report_test.call_count == 1
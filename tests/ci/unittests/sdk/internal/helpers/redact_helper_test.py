@@ -0,0 +1,78 @@
+# Copyright 2021 TestProject (https://testproject.io)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from selenium.webdriver.remote.command import Command
+
+from src.testproject.sdk.internal.helpers.redact_helper import RedactHelper
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+class StubExecutor:
+    """Command executor stub answering attribute and script commands from a map of element types"""
+
+    def __init__(self, mocker, types, browser_name="chrome"):
+        self.types = types
+        self.commands = []
+        self.agent_client = mocker.Mock()
+        self.agent_client.agent_session.capabilities = {"platformName": "Linux", "browserName": browser_name}
+        self.agent_client.agent_session.session_id = "1234"
+        self.step_helper = mocker.Mock(w3c=True)
+
+    def execute(self, command, params, skip_reporting=False):
+        self.commands.append(command)
+        if command == Command.W3C_EXECUTE_SCRIPT:
+            return {"value": [self.types[arg[ELEMENT_KEY]] for arg in params["args"]]}
+        return {"value": self.types[params["id"]]}
+
+
+def send_keys(element_id):
+    return {"id": element_id, "text": "secret", "value": list("secret")}
+
+
+@pytest.fixture()
+def executor(mocker):
+    return StubExecutor(mocker, {"user": "text", "pass": "password", "other": "email"})
+
+
+def test_found_elements_are_resolved_in_a_single_script_call(executor):
+    helper = RedactHelper(executor)
+    helper.observe(
+        Command.FIND_ELEMENTS, {"value": [{ELEMENT_KEY: "user"}, {ELEMENT_KEY: "pass"}, {ELEMENT_KEY: "other"}]}
+    )
+
+    assert helper.redact_command(Command.SEND_KEYS_TO_ELEMENT, send_keys("user"))["text"] == "secret"
+    assert helper.redact_command(Command.SEND_KEYS_TO_ELEMENT, send_keys("pass"))["text"] == "***"
+    assert helper.redact_command(Command.SEND_KEYS_TO_ELEMENT, send_keys("pass"))["text"] == "***"
+    assert executor.commands == [Command.W3C_EXECUTE_SCRIPT]
+
+
+def test_navigation_clears_cached_elements(executor):
+    helper = RedactHelper(executor)
+    helper.redact_command(Command.SEND_KEYS_TO_ELEMENT, send_keys("pass"))
+    helper.observe(Command.GET, {"value": None})
+    helper.redact_command(Command.SEND_KEYS_TO_ELEMENT, send_keys("pass"))
+
+    assert len(executor.commands) == 2
+
+
+def test_native_elements_are_checked_one_by_one(mocker):
+    executor = StubExecutor(mocker, {"pass": "XCUIElementTypeSecureTextField", "user": "text"}, browser_name="")
+    helper = RedactHelper(executor)
+    helper.observe(Command.FIND_ELEMENT, {"value": {ELEMENT_KEY: "user"}})
+
+    assert helper.redact_command(Command.SEND_KEYS_TO_ELEMENT, send_keys("pass"))["text"] == "***"
+    assert helper.redact_command(Command.SEND_KEYS_TO_ELEMENT, send_keys("pass"))["text"] == "***"
+    assert executor.commands == [Command.GET_ELEMENT_ATTRIBUTE]